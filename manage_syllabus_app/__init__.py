@@ -5,6 +5,8 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from manage_syllabus_app.routing import RoutingSession
+
 
 # Tải các biến môi trường từ file .env
 load_dotenv()
@@ -17,17 +19,50 @@ db_host = os.getenv("DB_HOST")
 db_name = os.getenv("DB_NAME")
 db_uri = f"mysql+pymysql://{db_user}:{db_pass}@{db_host}/{db_name}?charset=utf8mb4"
 app.config["SECRET_KEY"] = "d4e2a8c1b9f0e1d3c5a7b6f8e9d0c1b2"
-app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+# DATABASE_URL (vd. sqlite:///synthetic.db) ghi đè cấu hình MySQL, tiện chạy thử tải trên máy cá nhân
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL") or db_uri
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Bản sao chỉ đọc (tùy chọn): request GET đọc từ đây, ghi và đọc-sau-ghi vẫn dùng CSDL chính (xem routing.py).
+# Thử trên máy cá nhân bằng hai tệp SQLite, vd. DATABASE_REPLICA_URL=sqlite:///replica.db + flask replica-snapshot
+if os.getenv("DATABASE_REPLICA_URL"):
+    app.config["SQLALCHEMY_BINDS"] = {"replica": os.getenv("DATABASE_REPLICA_URL")}
 app.jinja_env.add_extension('jinja2.ext.do')
 app.config["PAGE_SIZE"] = 4
+app.config["SEARCH_LIMIT"] = 50
+# Số đề cương chèn trong một lô khi nâng cấp hàng loạt sang mẫu mới
+app.config["SYNC_BATCH_SIZE"] = 200
+# Số thao tác tối đa trong một lần gọi POST /syllabus/<id>/batch
+app.config["BATCH_MAX_OPERATIONS"] = 500
+# Luồng nền chạy job nâng cấp; job không cập nhật tiến độ quá JOB_STALE_SECONDS giây được coi là đã chết
+app.config["JOB_WORKERS"] = 2
+app.config["JOB_STALE_SECONDS"] = 300
+# Bộ nhớ đệm cho các bảng danh mục (khoa, giảng viên, PLO, ...)
+app.config["REFERENCE_CACHE_SIZE"] = 128
+app.config["REFERENCE_CACHE_TTL"] = 300
+# Số đếm trên bảng lớn (tổng số đề cương ở trang chủ/quản trị), riêng từng worker và không đồng bộ giữa worker
+app.config["COUNT_CACHE_SIZE"] = 64
+app.config["COUNT_CACHE_TTL"] = 30
+# Cache HTML của từng phần đề cương, khóa theo version đề cương
+app.config["FRAGMENT_CACHE_SIZE"] = 512
+app.config["FRAGMENT_CACHE_TTL"] = 300
+# Số request gần nhất mỗi endpoint dùng để tính phân vị trên /admin/metrics
+app.config["METRICS_WINDOW"] = 500
+# Câu SQL chạy lâu hơn SLOW_QUERY_MS ms được ghi (kèm EXPLAIN) vào SLOW_QUERY_LOG; 0 = tắt.
+# Mặc định ghi vào instance/slow_queries.log, xoay vòng khi đạt SLOW_QUERY_LOG_BYTES.
+app.config["SLOW_QUERY_MS"] = int(os.getenv("SLOW_QUERY_MS", 200))
+app.config["SLOW_QUERY_LOG"] = os.getenv("SLOW_QUERY_LOG")
+app.config["SLOW_QUERY_LOG_BYTES"] = 5 * 1024 * 1024
+app.config["SLOW_QUERY_LOG_BACKUPS"] = 3
 
 login = LoginManager(app=app)
-db = SQLAlchemy(app=app)
+db = SQLAlchemy(app=app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 login.login_view = 'user_login'
 
-from manage_syllabus_app import controllers, commands, admin
+from manage_syllabus_app import routing
+routing.init_app(app, db)
+
+from manage_syllabus_app import controllers, commands, admin, metrics, coverage
 
 
 
@@ -1,24 +1,37 @@
 import math
 
-from flask import render_template, request, jsonify, redirect
+from flask import render_template, request, jsonify, redirect, abort
 from flask_login import login_required, current_user
 
 from manage_syllabus_app import app, dao, db
+from manage_syllabus_app.cache import reference_cache, fragment_cache, count_cache, shared_generation
+from manage_syllabus_app.metrics import endpoint_metrics, read_slow_queries
+from manage_syllabus_app.models import UserRole
 
 
 @app.route('/admin')
 @login_required
 def admin_view():
-    page = request.args.get('page', 1, type=int)
     page_size = app.config.get("PAGE_SIZE", 10)
-    syllabus = []
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    kw = request.args.get('kw', '').strip()
+    filters = {
+        'year': request.args.get('year', type=int),
+        'program': request.args.get('program'),
+        'template': request.args.get('template'),
+    }
+    syllabus, next_cursor, prev_cursor = [], None, None
     total = 0
     if current_user.is_authenticated:
         total = dao.count_syllabuses()
-        syllabus = dao.get_all_syllabuses(page=page, page_size=page_size)
+        if kw:
+            syllabus = dao.search_syllabuses(kw, limit=app.config.get("SEARCH_LIMIT", 50), **filters)
+        else:
+            syllabus, next_cursor, prev_cursor = dao.get_syllabuses_keyset(page_size, after=after, before=before,
+                                                                           **filters)
 
     all_faculties = dao.get_all_faculties()
-    total_pages = math.ceil(total / page_size)
     lecturers = dao.get_lecturers()
     years = dao.get_years()
     programs = dao.get_all_training_program()
@@ -27,14 +40,70 @@ def admin_view():
         'admin/index.html',
         syllabuses=syllabus,
         all_faculties=all_faculties,
-        pages=total_pages,
-        current_page=page,
+        total=total,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
         lecturers=lecturers,
         years=years,
         programs=programs,
+        kw=kw,
+        filters=filters,
     )
 
 
+@app.route('/admin/cache-stats')
+@login_required
+def admin_cache_stats():
+    if current_user.user_role != UserRole.ADMIN:
+        abort(403)
+    return jsonify({
+        'status': 200,
+        'reference_cache': reference_cache.stats(),
+        'fragment_cache': fragment_cache.stats(),
+        'count_cache': count_cache.stats(),
+        'shared_generation': shared_generation(),
+    })
+
+
+@app.route('/admin/metrics', methods=['GET', 'DELETE'])
+@login_required
+def admin_metrics():
+    if current_user.user_role != UserRole.ADMIN:
+        abort(403)
+    if request.method == 'DELETE':
+        endpoint_metrics.reset()
+        return jsonify({
+            'status': 200,
+            'msg': "Đã xóa số liệu"
+        })
+    rows = endpoint_metrics.snapshot()
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'status': 200,
+            'window': endpoint_metrics.window,
+            'endpoints': rows
+        })
+    return render_template('admin/metrics.html', rows=rows, window=endpoint_metrics.window)
+
+
+@app.route('/admin/metrics/slow-queries')
+@login_required
+def admin_slow_queries():
+    if current_user.user_role != UserRole.ADMIN:
+        abort(403)
+    route = request.args.get('route') or None
+    function = request.args.get('function') or None
+    entries = read_slow_queries(limit=request.args.get('limit', 200, type=int), route=route, function=function)
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'status': 200,
+            'threshold_ms': app.config.get('SLOW_QUERY_MS'),
+            'entries': entries
+        })
+    return render_template('admin/slow_queries.html', entries=entries, route=route, function=function,
+                           threshold_ms=app.config.get('SLOW_QUERY_MS'))
+
+
 @app.route('/admin/users')
 @login_required
 def admin_users_view():
@@ -178,6 +247,7 @@ def admin_update_subject(subject_id):
             subject.credit.numberTheory = number_theory
             subject.credit.numberPractice = number_practice
             subject.credit.hourSelfStudy = self_hour_study
+            dao.mark_syllabus_changed(subject_id=subject.id)
             db.session.commit()
             return jsonify({
                 'status': 200,
@@ -335,6 +405,38 @@ def admin_update_training_program(program_id):
                            other_programs=other_programs)
 
 
+@app.route('/admin/training-program/<int:program_id>/plo-coverage')
+@login_required
+def admin_training_program_plo_coverage(program_id):
+    program = dao.get_training_program_by_id(program_id)
+    if not program:
+        return jsonify({
+            'status': 400,
+            'err_msg': "Không tìm thấy chương trình đào tạo"
+        })
+    subjects_by_plo = {}
+    for plo_id, subject_id, subject_name, max_rating, avg_rating, rated_clos in dao.get_plo_coverage(program_id):
+        subjects_by_plo.setdefault(plo_id, []).append({
+            'subject_id': subject_id,
+            'subject_name': subject_name,
+            'max_rating': max_rating,
+            'avg_rating': round(avg_rating, 2),
+            'rated_clos': rated_clos
+        })
+    plos = [{
+        'id': plo.id,
+        'description': plo.description,
+        'max_rating': max((s['max_rating'] for s in subjects_by_plo.get(plo.id, [])), default=0),
+        'subjects': subjects_by_plo.get(plo.id, [])
+    } for plo in dao.get_all_plos()]
+    return jsonify({
+        'status': 200,
+        'program': {'id': program.id, 'name': program.name, 'academic_year': program.academic_year},
+        'plos': plos,
+        'uncovered_plo_ids': [plo['id'] for plo in plos if not plo['subjects']]
+    })
+
+
 @app.route('/admin/syllabus/lecturers/<int:lecturer_id>', methods=['POST'])
 @login_required
 def admin_assign_lecturer_syllabus(lecturer_id):
@@ -349,6 +451,7 @@ def admin_assign_lecturer_syllabus(lecturer_id):
             })
 
         s.lecturer_id = lecturer_id
+        dao.mark_syllabus_changed(syllabus_id=s.id)
         db.session.commit()
         return jsonify({
             "status": 200,
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from sqlalchemy import event, select
+
+from manage_syllabus_app import app, db, dao
+from manage_syllabus_app.models import User, UserRole, Syllabus, TextSubSection, MainSection, CourseObjective, \
+    CourseLearningOutcome, LearningMaterial, TemplateSyllabus, JobStatus, Subject, CloPloAssociation
+from manage_syllabus_app.seed_database import seed_data, generate_synthetic_data
+from manage_syllabus_app.utils import percentile
+
+# =============================================================================
+# BỘ ĐO HIỆU NĂNG CÁC ROUTE CHÍNH (flask bench-endpoints)
+# =============================================================================
+DEFAULT_BUDGET_FILE = os.path.join(app.root_path, 'data', 'bench_budgets.json')
+# Ngân sách độ trễ = p95 đo được x hệ số này (máy đo và máy chạy CI khác nhau)
+LATENCY_HEADROOM = 3.0
+
+
+def populate_bench_database(scale, seed=1):
+    """Tạo bảng và sinh khoảng `scale` đề cương giả lập, chia đều cho hai mẫu (mẫu 1 -> mẫu 2 dùng cho nâng cấp)."""
+    db.create_all()
+    seed_data()
+    generate_synthetic_data(seed=seed, faculties=max(2, scale // 200), subjects=max(20, scale // 5), templates=2,
+                            syllabuses_per_template=max(1, scale // 2), materials=max(50, scale // 2),
+                            log=lambda *args: None)
+    admin = User(name="Bench admin", username="bench-admin", password="x", user_role=UserRole.ADMIN)
+    specialist = User(name="Bench specialist", username="bench-specialist", password="x",
+                      user_role=UserRole.SPECIALIST)
+    db.session.add_all([admin, specialist])
+    db.session.commit()
+    return admin.id, specialist.id
+
+
+def _bench_routes():
+    """Danh sách (nhãn, vai trò, hàm gửi request, hàm chạy sau mỗi lần gửi) của các route cần đo.
+
+    Các id lấy từ dữ liệu vừa sinh bởi populate_bench_database.
+    """
+    syllabus_id = db.session.scalar(select(Syllabus.id).order_by(Syllabus.id))
+    subject_id = db.session.get(Syllabus, syllabus_id).subject_id
+    text_id = db.session.scalar(select(TextSubSection.id).join(MainSection)
+                                .where(MainSection.syllabus_id == syllabus_id,
+                                       TextSubSection.display_mode == 'input').order_by(TextSubSection.id))
+    co_id = db.session.scalar(select(CourseObjective.id).where(CourseObjective.subject_id == subject_id))
+    clo_id = db.session.scalar(select(CourseLearningOutcome.id).where(CourseLearningOutcome.course_objective_id == co_id))
+    plo_id = db.session.scalar(select(CloPloAssociation.plo_id).where(CloPloAssociation.clo_id == clo_id)
+                               .order_by(CloPloAssociation.plo_id))
+    credit_id = db.session.scalar(select(Subject.credit_id).where(Subject.id == subject_id))
+    material_id = db.session.scalar(select(LearningMaterial.id).order_by(LearningMaterial.id))
+    old_template_id, new_template_id = db.session.scalars(
+        select(TemplateSyllabus.id).order_by(TemplateSyllabus.id.desc()).limit(2)).all()[::-1]
+
+    upgrade = {}
+
+    def start_upgrade(client, i):
+        response = client.post('/syllabus/sync-batch-upgrade',
+                               json={'old_template_id': old_template_id, 'new_template_id': new_template_id})
+        upgrade['job_id'] = response.get_json().get('job_id')
+        return response
+
+    def wait_upgrade():
+        # Chỉ request khởi tạo job được đo; chờ job nền xong để lần gửi sau không bị 409
+        while upgrade.get('job_id'):
+            db.session.expire_all()
+            job = dao.get_upgrade_job(upgrade['job_id'])
+            if job is None or job.status in (JobStatus.DONE, JobStatus.FAILED):
+                return
+            time.sleep(0.05)
+
+    return [
+        ("GET /", 'admin', lambda c, i: c.get('/'), None),
+        ("GET /syllabus/<id>/", 'admin', lambda c, i: c.get(f'/syllabus/{syllabus_id}/'), None),
+        ("GET /admin", 'admin', lambda c, i: c.get('/admin'), None),
+        ("GET /specialist/template/<id>", 'specialist',
+         lambda c, i: c.get(f'/specialist/template/{old_template_id}'), None),
+        ("PATCH /text-subsection/<id>", 'admin',
+         lambda c, i: c.patch(f'/text-subsection/{text_id}', json={'content': f"Nội dung đo {i}"}), None),
+        ("PATCH /course-objective/<id>", 'admin',
+         lambda c, i: c.patch(f'/course-objective/{co_id}', json={'content': f"Mục tiêu đo {i}"}), None),
+        ("PATCH /course-learning-outcome/<id>", 'admin',
+         lambda c, i: c.patch(f'/course-learning-outcome/{clo_id}', json={'content': f"CLO đo {i}"}), None),
+        ("PATCH /learning-material/<id>", 'admin',
+         lambda c, i: c.patch(f'/learning-material/{material_id}', json={'name': f"Học liệu đo {i}"}), None),
+        # Giá trị đổi qua mỗi lần gửi để luôn đo đường có ghi (giá trị như cũ chỉ tốn một câu UPDATE)
+        ("PUT /syllabus/update-credits", 'admin',
+         lambda c, i: c.put('/syllabus/update-credits', json={'credit_id': credit_id, 'theory': i % 4 + 1,
+                                                              'practice': i % 3 + 1, 'self_study': i % 5 + 1}), None),
+        ("PUT /clo/<clo>/plo/<plo>", 'admin',
+         lambda c, i: c.put(f'/clo/{clo_id}/plo/{plo_id}', json={'rating': i % 3 + 1}), None),
+        ("POST /syllabus/sync-batch-upgrade", 'admin', start_upgrade, wait_upgrade),
+    ]
+
+
+def run_endpoint_benchmarks(user_ids, iterations=20, log=print):
+    """Gửi mỗi route 1 lần làm nóng + `iterations` lần đo qua test client.
+
+    Trả về {nhãn: {p50_ms, p95_ms, p99_ms, max_queries, peak_kb}}; bộ nhớ đỉnh đo ở một lần gửi riêng
+    có bật tracemalloc để không làm sai lệch độ trễ.
+    """
+    statements = []
+    # Chỉ đếm câu SQL của luồng gửi request, không tính job nền (nâng cấp mẫu) chạy song song
+    request_thread = threading.get_ident()
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda *args: threading.get_ident() == request_thread and statements.append(1))
+    clients = {}
+    for role, user_id in user_ids.items():
+        clients[role] = app.test_client()
+        with clients[role].session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+
+    def send(fn, client, i):
+        # App context riêng cho mỗi request, như khi chạy thật (g, người dùng đăng nhập và session không dùng chung)
+        with app.app_context():
+            response = fn(client, i)
+        status = response.get_json().get('status', 200) if response.is_json else response.status_code
+        if status >= 400:
+            raise RuntimeError(f"{response.request.method} {response.request.path}: HTTP {status}")
+
+    results = {}
+    for label, role, fn, after in _bench_routes():
+        client = clients[role]
+        after = after or (lambda: None)
+        send(fn, client, 0)
+        after()
+
+        latencies, queries = [], []
+        for i in range(1, iterations + 1):
+            statements.clear()
+            start = time.perf_counter()
+            send(fn, client, i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(statements))
+            after()
+
+        tracemalloc.start()
+        send(fn, client, iterations + 1)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        after()
+
+        results[label] = {'p50_ms': round(percentile(latencies, 50), 2), 'p95_ms': round(percentile(latencies, 95), 2),
+                          'p99_ms': round(percentile(latencies, 99), 2), 'max_queries': max(queries),
+                          'peak_kb': round(peak / 1024)}
+        log(f"  -> {label}: {results[label]}")
+    return results
+
+
+def load_budgets(path=DEFAULT_BUDGET_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_budgets(results_by_scale):
+    """Ngân sách từ kết quả đo: số câu SQL giữ nguyên, p95 nhân LATENCY_HEADROOM."""
+    return {str(scale): {label: {'max_queries': r['max_queries'], 'p95_ms': round(r['p95_ms'] * LATENCY_HEADROOM, 1)}
+                         for label, r in results.items()}
+            for scale, results in results_by_scale.items()}
+
+
+def check_budgets(results_by_scale, budgets):
+    """Trả về danh sách vi phạm ngân sách (rỗng nếu tất cả route đều đạt)."""
+    violations = []
+    for scale, results in results_by_scale.items():
+        for label, r in results.items():
+            budget = budgets.get(str(scale), {}).get(label)
+            if budget is None:
+                continue
+            if r['max_queries'] > budget['max_queries']:
+                violations.append(f"[{scale}] {label}: {r['max_queries']} câu SQL > ngân sách {budget['max_queries']}")
+            if r['p95_ms'] > budget['p95_ms']:
+                violations.append(f"[{scale}] {label}: p95 {r['p95_ms']}ms > ngân sách {budget['p95_ms']}ms")
+    return violations
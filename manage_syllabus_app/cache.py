@@ -0,0 +1,291 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, has_request_context
+from jinja2 import pass_context
+from markupsafe import Markup
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from manage_syllabus_app import app, db
+from manage_syllabus_app.models import CacheGeneration
+from manage_syllabus_app.routing import primary_reads
+
+
+# =============================================================================
+# BỘ NHỚ ĐỆM DÙNG CHUNG TOÀN TIẾN TRÌNH
+# =============================================================================
+class TTLCache:
+    """Bộ nhớ đệm LRU giới hạn số phần tử, mỗi phần tử sống tối đa `ttl` giây."""
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Số lần cache bị xóa trong tiến trình này (chỉ để thống kê; khóa/ETag dùng shared_generation())
+        self.generation = 0
+
+    def get(self, key):
+        """Trả về (True, value) nếu còn hạn, ngược lại (False, None)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Xóa các khóa thỏa predicate (xóa toàn bộ nếu không truyền)."""
+        with self._lock:
+            self.generation += 1
+            if predicate is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses,
+                    'generation': self.generation}
+
+
+reference_cache = TTLCache(maxsize=app.config.get('REFERENCE_CACHE_SIZE', 128),
+                           ttl=app.config.get('REFERENCE_CACHE_TTL', 300))
+
+# Model -> tên các hàm DAO phụ thuộc vào bảng của model đó
+_dependents = {}
+
+# =============================================================================
+# THẾ HỆ DANH MỤC DÙNG CHUNG (bảng cache_generation)
+# Mỗi worker có cache riêng; commit sửa danh mục ở bất kỳ worker nào tăng giá trị trong CSDL, các worker khác
+# thấy giá trị mới ở request kế tiếp thì xóa cache danh mục của mình.
+# =============================================================================
+REFERENCE_GENERATION = 'reference'
+_seen_generation = None
+
+
+def shared_generation():
+    """Thế hệ danh mục hiện tại, đọc từ CSDL chính tối đa một lần mỗi request."""
+    global _seen_generation
+    if has_request_context() and 'reference_generation' in g:
+        return g.reference_generation
+    with primary_reads(db.session):
+        value = db.session.scalar(select(CacheGeneration.value)
+                                  .where(CacheGeneration.name == REFERENCE_GENERATION)) or 0
+    if value != _seen_generation:
+        if _seen_generation is not None:
+            reference_cache.invalidate()
+        _seen_generation = value
+    if has_request_context():
+        g.reference_generation = value
+    return value
+
+
+def _detached_copy(obj):
+    """Tạo bản sao detached chỉ gồm các cột, không kéo theo quan hệ đã nạp hay trạng thái expire."""
+    mapper = inspect(obj).mapper
+    clone = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(clone, attr.key, getattr(obj, attr.key))
+    make_transient_to_detached(clone)
+    return clone
+
+
+def _is_mapped(value):
+    return hasattr(value, '_sa_instance_state')
+
+
+def _snapshot(value):
+    if isinstance(value, list):
+        return [_detached_copy(obj) if _is_mapped(obj) else obj for obj in value]
+    return _detached_copy(value) if _is_mapped(value) else value
+
+
+def _attach(value):
+    # merge(load=False) gắn bản sao vào session hiện tại mà không phát sinh truy vấn,
+    # nhờ vậy lazy load quan hệ trên đối tượng trả về vẫn hoạt động bình thường.
+    # Giá trị vô hướng (số đếm, ...) được trả về nguyên vẹn.
+    if isinstance(value, list):
+        return [db.session.merge(obj, load=False) if _is_mapped(obj) else obj for obj in value]
+    return db.session.merge(value, load=False) if _is_mapped(value) else value
+
+
+def cached_reference(*models):
+    """Decorator lưu kết quả hàm DAO đọc bảng danh mục vào reference_cache.
+
+    Kết quả tự động bị xóa khi một trong các `models` được thêm/sửa/xóa và commit.
+    """
+
+    def decorator(f):
+        name = f.__qualname__
+        for model in models:
+            _dependents.setdefault(model, set()).add(name)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            shared_generation()
+            hit, value = reference_cache.get(key)
+            if not hit:
+                # Cache dùng chung cho mọi request nên luôn nạp từ CSDL chính, không từ bản sao có thể trễ
+                with primary_reads(db.session):
+                    value = _snapshot(f(*args, **kwargs))
+                reference_cache.set(key, value)
+            return _attach(value)
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# SỐ ĐẾM THEO TIẾN TRÌNH (không đi qua thế hệ dùng chung)
+# Sửa một đề cương không được tăng cache_generation: việc đó xóa cache danh mục của mọi worker và đổi khóa
+# fragment/ETag của mọi đề cương khác. Số đếm chỉ sống COUNT_CACHE_TTL giây trong từng worker, và được xóa
+# sớm ở worker vừa thêm/xóa bản ghi của bảng được đếm.
+# =============================================================================
+count_cache = TTLCache(maxsize=app.config.get('COUNT_CACHE_SIZE', 64), ttl=app.config.get('COUNT_CACHE_TTL', 30))
+_counted_models = set()
+
+
+def cached_count(*models):
+    """Decorator lưu số đếm trên bảng lớn (đề cương, ...) vào count_cache; có thể trễ tối đa COUNT_CACHE_TTL giây."""
+
+    def decorator(f):
+        name = f.__qualname__
+        _counted_models.update(models)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hit, value = count_cache.get(key)
+            if not hit:
+                value = f(*args, **kwargs)
+                count_cache.set(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def _is_counted(cls):
+    return any(issubclass(cls, model) for model in _counted_models)
+
+
+def invalidate(*models):
+    """Xóa chủ động các kết quả phụ thuộc vào `models` (không truyền gì = xóa hết)."""
+    if not models:
+        reference_cache.invalidate()
+        return
+    names = set()
+    for model in models:
+        names |= _dependents.get(model, set())
+    if names:
+        reference_cache.invalidate(lambda key: key[0] in names)
+
+
+# =============================================================================
+# TỰ ĐỘNG XÓA CACHE KHI GHI DỮ LIỆU
+# =============================================================================
+def _mark_dirty(session, classes):
+    tracked = session.info.setdefault('reference_cache_dirty', set())
+    for cls in classes:
+        for model in _dependents:
+            if issubclass(cls, model):
+                tracked.add(model)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_models(session, flush_context):
+    # Chỉ tính bản ghi đổi cột: thêm phần tử vào quan hệ (vd. backref type_material.learning_materials khi
+    # thêm học liệu) không ghi gì vào bảng danh mục nên không được tăng thế hệ dùng chung
+    modified = (obj for obj in session.dirty if session.is_modified(obj, include_collections=False))
+    _mark_dirty(session, {type(obj) for obj in (*session.new, *modified, *session.deleted)})
+    if any(_is_counted(type(obj)) for obj in (*session.new, *session.deleted)):
+        session.info['count_cache_dirty'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_statements(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark_dirty(orm_execute_state.session, {mapper.class_})
+            if not orm_execute_state.is_update and _is_counted(mapper.class_):
+                orm_execute_state.session.info['count_cache_dirty'] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_shared_generation(session):
+    session.flush()
+    if session.info.get('reference_cache_dirty'):
+        session.connection().execute(update(CacheGeneration.__table__)
+                                     .where(CacheGeneration.name == REFERENCE_GENERATION)
+                                     .values(value=CacheGeneration.value + 1))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('count_cache_dirty', None):
+        count_cache.invalidate()
+    dirty = session.info.pop('reference_cache_dirty', None)
+    if dirty:
+        invalidate(*dirty)
+        if has_request_context():
+            # Phần còn lại của request đọc lại thế hệ mới
+            g.pop('reference_generation', None)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('reference_cache_dirty', None)
+    session.info.pop('count_cache_dirty', None)
+
+
+# =============================================================================
+# CACHE HTML ĐÃ RENDER CỦA TỪNG PHẦN ĐỀ CƯƠNG
+# =============================================================================
+fragment_cache = TTLCache(maxsize=app.config.get('FRAGMENT_CACHE_SIZE', 512),
+                          ttl=app.config.get('FRAGMENT_CACHE_TTL', 300))
+
+
+@app.template_global()
+@pass_context
+def render_section(context, part):
+    """Render 'partials/_<code>.html' của một MainSection, dùng lại HTML đã cache nếu đề cương chưa đổi.
+
+    Khóa gồm (id đề cương, code phần, version đề cương) cùng vai trò người dùng, chế độ chỉnh sửa và
+    thế hệ danh mục dùng chung, vì các yếu tố này cũng làm thay đổi HTML sinh ra.
+    """
+    syllabus = context['syllabus']
+    user = context.get('current_user')
+    role = user.user_role.name if user is not None and user.is_authenticated else None
+    key = (syllabus.id, part.code, syllabus.version, role, bool(context.get('is_editing')),
+           shared_generation())
+
+    hit, html = fragment_cache.get(key)
+    if not hit:
+        template = context.environment.get_template('partials/_' + part.code + '.html')
+        html = Markup(template.render(context.get_all(), part=part))
+        fragment_cache.set(key, html)
+    return html
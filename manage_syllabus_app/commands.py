@@ -1,23 +1,31 @@
 import hashlib
 import os
-
-from flask import  json
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import Flask, json
+from sqlalchemy import event, text
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash
 
 
-from manage_syllabus_app import app, db, dao
+from manage_syllabus_app import app, db, dao, jobs, services, benchmarks, routing, coverage
 from manage_syllabus_app.models import User, UserRole, Lecturer, MainSection, TextSubSection, SelectionSubSection, \
-    ReferenceSubSection
-from manage_syllabus_app.seed_database import seed_data, seed_data_2, seed_data_3, seed_data_4
-import unicodedata
+    ReferenceSubSection, Syllabus, SYLLABUS_FTS_DDL, build_syllabus_search_text, Faculty, Credit, Subject, \
+    TemplateSyllabus, ProgrammeLearningOutcome
+from manage_syllabus_app.seed_database import seed_data, seed_data_2, seed_data_3, seed_data_4, seed_data_3_bulk, \
+    generate_synthetic_data, SYNTHETIC_MAX_SEED, SYNTHETIC_MAX_SUBJECTS
+from manage_syllabus_app.utils import strip_accents
 import re
 import traceback
 
 
 
-def strip_accents(s):
-   return ''.join(c for c in unicodedata.normalize('NFD', s)
-                  if unicodedata.category(c) != 'Mn')
 @app.cli.command("create-db")
 def create_db():
     """Tạo tất cả các bảng trong cơ sở dữ liệu."""
@@ -25,6 +33,29 @@ def create_db():
         db.create_all()
         print("Đã tạo cơ sở dữ liệu thành công!")
 
+@app.cli.command("reindex-search")
+def reindex_search():
+    """Tính lại cột search_text của mọi đề cương và dựng lại chỉ mục FTS5 (SQLite)."""
+    with app.app_context():
+        syllabuses = Syllabus.query.options(joinedload(Syllabus.subject), joinedload(Syllabus.lecturer)).all()
+        for syllabus in syllabuses:
+            syllabus.search_text = build_syllabus_search_text(db.session, syllabus)
+        if db.engine.dialect.name == 'sqlite':
+            for statement in SYLLABUS_FTS_DDL:
+                db.session.execute(text(statement))
+            db.session.execute(text("INSERT INTO syllabus_fts(syllabus_fts) VALUES ('rebuild')"))
+        db.session.commit()
+        print(f"Đã cập nhật chỉ mục tìm kiếm cho {len(syllabuses)} đề cương.")
+
+@app.cli.command("rebuild-plo-coverage")
+def rebuild_plo_coverage():
+    """Dựng lại toàn bộ bảng độ phủ PLO theo chương trình đào tạo (sau khi nạp dữ liệu trực tiếp)."""
+    with app.app_context():
+        start = time.perf_counter()
+        rows = coverage.rebuild_plo_coverage(db.session)
+        db.session.commit()
+        print(f"Đã dựng lại {rows} dòng độ phủ PLO trong {time.perf_counter() - start:.2f}s.")
+
 @app.cli.command("seed-db")
 def seed_db():
     """Thêm dữ liệu mẫu vào cơ sở dữ liệu."""
@@ -33,8 +64,66 @@ def seed_db():
         seed_data_2()
         seed_data_3()
         seed_data_4()
+        coverage.rebuild_plo_coverage(db.session)
+        db.session.commit()
         print("Đã thêm dữ liệu mẫu thành công!")
 
+@app.cli.command("seed-bulk")
+@click.option('--file', 'json_path', type=click.Path(exists=True, dir_okay=False),
+              help="Tệp dữ liệu cùng định dạng data/data.json (mặc định: data/data.json).")
+@click.option('--chunk-size', default=200, help="Số đề cương chèn trong một lô.")
+def seed_bulk(json_path, chunk_size):
+    """Gieo dữ liệu đề cương theo lô (executemany), thay cho seed_data_3 khi dữ liệu lớn."""
+    with app.app_context():
+        seed_data()
+        # seed_data_2 không kiểm tra trùng nên chỉ chạy khi chưa có PLO nào
+        if not ProgrammeLearningOutcome.query.first():
+            seed_data_2()
+        seed_data_3_bulk(json_path, chunk_size=chunk_size)
+        coverage.rebuild_plo_coverage(db.session)
+        db.session.commit()
+
+@app.cli.command("gen-synthetic")
+@click.option('--seed', default=1, show_default=True, type=click.IntRange(0, SYNTHETIC_MAX_SEED),
+              help="Hạt giống ngẫu nhiên; cùng seed cho cùng dữ liệu.")
+@click.option('--faculties', default=5, show_default=True)
+@click.option('--lecturers-per-faculty', default=10, show_default=True)
+@click.option('--subjects', default=200, show_default=True, type=click.IntRange(1, SYNTHETIC_MAX_SUBJECTS))
+@click.option('--templates', default=1, show_default=True)
+@click.option('--syllabuses-per-template', default=500, show_default=True)
+@click.option('--objectives-per-subject', default=3, show_default=True)
+@click.option('--clos-per-objective', default=3, show_default=True)
+@click.option('--plos', default=12, show_default=True, help="Chỉ dùng khi bảng PLO còn trống.")
+@click.option('--materials', default=500, show_default=True)
+@click.option('--assessments-per-syllabus', default=3, show_default=True)
+@click.option('--methods-per-assessment', default=2, show_default=True)
+@click.option('--sessions-per-syllabus', default=15, show_default=True)
+@click.option('--chunk-size', default=500, show_default=True, help="Số dòng/đề cương mỗi lần chèn.")
+def gen_synthetic(seed, **volumes):
+    """Sinh dữ liệu giả lập tất định để kiểm thử tải (SQLite qua DATABASE_URL hoặc MySQL)."""
+    with app.app_context():
+        db.create_all()
+        seed_data()
+        generate_synthetic_data(seed=seed, **volumes)
+
+@app.cli.command("replica-snapshot")
+def replica_snapshot():
+    """Chép toàn bộ CSDL chính sang bản sao, chỉ cho SQLite (thử định tuyến bản sao trên máy cá nhân).
+
+    Chạy lại lệnh này bất cứ lúc nào để mô phỏng bản sao bắt kịp; giữa hai lần chạy bản sao bị "trễ".
+    """
+    with app.app_context():
+        replica = db.engines.get(routing.REPLICA_BIND)
+        if replica is None or db.engine.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            raise click.UsageError("Cần DATABASE_URL và DATABASE_REPLICA_URL đều là SQLite.")
+        source, target = db.engine.raw_connection(), replica.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            source.close()
+            target.close()
+        print(f"Đã chép {db.engine.url.database} -> {replica.url.database}")
+
 @app.cli.command("seed-accounts")
 def seed_accounts():
     """Tạo các tài khoản mẫu: 1 Admin và 3 Giảng viên."""
@@ -86,129 +175,219 @@ def seed_accounts():
         print("Thêm tài khoản thành công!")
 
 
+def _parse_shard(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise click.BadParameter("định dạng phải là i/N, vd 0/4")
+    if total < 1 or not 0 <= index < total:
+        raise click.BadParameter("cần 0 <= i < N")
+    return index, total
+
+
 @app.cli.command("sync-structures")
-def sync_structure():
+@click.option('--chunk-size', default=500, help="Số đề cương nạp và commit trong một lô.")
+@click.option('--verbose', is_flag=True, help="In chi tiết từng thay đổi.")
+@click.option('--dry-run', is_flag=True,
+              help="Không ghi gì; in báo cáo JSON Lines (mỗi dòng một đề cương lệch cấu trúc) ra stdout.")
+@click.option('--shard', callback=_parse_shard, help="Chỉ xử lý phân đoạn id i/N (i từ 0 tới N-1).")
+@click.option('--workers', default=1, type=click.IntRange(min=1),
+              help="Chia đề cương thành N phân đoạn theo id, chạy song song trên N tiến trình.")
+def sync_structure(chunk_size, verbose, dry_run, shard, workers):
     '''
     Đồng bộ cấu trúc cho từng đề cương dựa trên tệp JSON được định nghĩa
     trong cột 'structure_file' của đề cương đó.
     '''
+    # Mỗi tiến trình tự nhận phân đoạn i/N của mình; không lặng lẽ mở rộng --shard ra toàn bộ bảng
+    if shard and workers > 1:
+        raise click.UsageError("--shard không dùng chung được với --workers > 1")
+    # Ở chế độ dry-run, stdout chỉ dành cho báo cáo
+    log = (lambda message: click.echo(message, err=True)) if dry_run else print
+    report = lambda record: click.echo(json.dumps(record, ensure_ascii=False))
     try:
         with app.app_context():
-            # Lấy đường dẫn gốc của thư mục chứa các tệp cấu trúc JSON
-            structures_dir = os.path.join(app.root_path, 'data', 'structures')
-            # Giá trị mặc định nếu cột 'structure_file' bị NULL
-            default_structure_file = 'syllabus_2025.json'
-
-            all_syllabuses = dao.get_all_syllabuses()
-            change_count = 0
-            print(f"Bắt đầu đồng bộ cấu trúc cho {len(all_syllabuses)} đề cương...")
-
-            for syllabus in all_syllabuses:
-                structure_name = syllabus.structure_file or default_structure_file
-                json_path = os.path.join(structures_dir, structure_name)
-
-                # 1. Kiểm tra và đọc tệp JSON cấu trúc
-                if not os.path.exists(json_path):
-                    print(
-                        f"  -> CẢNH BÁO: Bỏ qua syllabus '{syllabus.name}'. Không tìm thấy tệp cấu trúc: {structure_name}")
-                    continue
-
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        syllabus_specific_structure = json.load(f)
-                    print(f"\n  -> Đang đồng bộ '{syllabus.name}' với cấu trúc '{structure_name}'...")
-                except Exception as e:
-                    print(
-                        f"  -> LỖI: Bỏ qua syllabus '{syllabus.name}'. Không thể đọc/phân tích JSON '{structure_name}': {e}")
-                    continue
-
-                # 2. Lấy danh sách code/tên chuẩn từ JSON để so sánh
-                master_part_codes = {p['code'] for p in syllabus_specific_structure}
-
-                # --- GIAI ĐOẠN 2.1: DỌN DẸP CÁC PHẦN KHÔNG CÒN TỒN TẠI ---
-                parts_to_delete = [p for p in syllabus.main_sections if p.code not in master_part_codes]
-                if parts_to_delete:
-                    for part in parts_to_delete:
-                        print(f"    -> Xóa MainSection cũ '{part.name}' khỏi '{syllabus.name}'")
-                        db.session.delete(part)
-                        change_count += 1
-
-                # --- GIAI ĐOẠN 2.2: THÊM VÀ ĐỒNG BỘ CÁC PHẦN ---
-                existing_part_codes = {p.code for p in syllabus.main_sections}
-
-                # Thêm MainSection còn thiếu
-                for part_def in syllabus_specific_structure:
-                    if part_def['code'] not in existing_part_codes:
-                        new_part = MainSection(name=part_def['name'], code=part_def['code'],
-                                               position=part_def['position'])
-                        syllabus.main_sections.append(new_part)
-                        change_count += 1
-                        print(f"    -> Thêm MainSection mới '{part_def['name']}' vào '{syllabus.name}'")
-
-                # Đồng bộ SubSection cho từng MainSection
-                for part in syllabus.main_sections:
-                    # Tìm định nghĩa phần tương ứng trong JSON
-                    part_def = next((p for p in syllabus_specific_structure if p['code'] == part.code), None)
-
-                    if part_def:
-                        # Cập nhật lại tên và vị trí (phòng trường hợp thay đổi)
-                        if part.name != part_def['name']:
-                            part.name = part_def['name']
-                            change_count += 1
-                        if part.position != part_def['position']:
-                            part.position = part_def['position']
-                            change_count += 1
-
-                        master_sub_names = {s['name'] for s in part_def['sub_sections']}
-
-                        # Dọn dẹp SubSection cũ
-                        subs_to_delete = [s for s in part.sub_sections if s.name not in master_sub_names]
-                        if subs_to_delete:
-                            for sub in subs_to_delete:
-                                print(f"      -> Xóa SubSection cũ '{sub.name}' khỏi phần '{part.name}'")
-                                db.session.delete(sub)
-                                change_count += 1
-
-                        # Thêm/Cập nhật SubSection
-                        existing_sub_names = {s.name for s in part.sub_sections}
-                        for sub_def in part_def['sub_sections']:
-                            if sub_def['name'] not in existing_sub_names:
-                                # Logic tạo SubSection mới
-                                new_sub = None
-                                if sub_def['type'] == 'text':
-                                    new_sub = TextSubSection(name=sub_def['name'], position=sub_def['position'],
-                                                             content='')
-                                elif sub_def['type'] == 'selection':
-                                    new_sub = SelectionSubSection(name=sub_def['name'], position=sub_def['position'],
-                                                                  attribute_group_id=sub_def['attribute_group_id'])
-                                elif sub_def['type'] == 'reference':
-                                    new_sub = ReferenceSubSection(name=sub_def['name'], position=sub_def['position'],
-                                                                  reference_code=sub_def['reference_code'])
-
-                                if new_sub:
-                                    part.sub_sections.append(new_sub)
-                                    change_count += 1
-                                    print(f"      -> Thêm SubSection mới '{sub_def['name']}' vào phần '{part.name}'")
-                            else:
-                                # Logic cập nhật SubSection đã có (ví dụ: position, type...)
-                                existing_sub = next((s for s in part.sub_sections if s.name == sub_def['name']), None)
-                                if existing_sub:
-                                    if existing_sub.position != sub_def['position']:
-                                        existing_sub.position = sub_def['position']
-                                        change_count += 1
-                                    # Bạn cũng có thể cập nhật `type` hoặc `reference_code` ở đây nếu cần
-
-            if change_count > 0:
-                db.session.commit()
-                print(f"\n✅ Đồng bộ thành công! {change_count} thay đổi đã được áp dụng.")
+            if workers > 1:
+                stats = {'syllabuses': 0, 'changes': 0, 'skipped': 0}
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(services.run_sync_shard, (i, workers), chunk_size, dry_run, verbose)
+                               for i in range(workers)]
+                    for future in futures:
+                        shard_stats = future.result()
+                        for record in shard_stats.pop('report'):
+                            report(record)
+                        for key in stats:
+                            stats[key] += shard_stats[key]
+            else:
+                stats = services.sync_syllabus_structures(chunk_size=chunk_size, verbose=verbose, log=log,
+                                                          dry_run=dry_run, shard=shard, report=report)
+
+            if dry_run:
+                log(f"\nℹ️ Dry-run: {stats['changes']} thay đổi sẽ được áp dụng cho {stats['syllabuses']} đề cương.")
+            elif stats['changes'] > 0:
+                print(f"\n✅ Đồng bộ thành công! {stats['changes']} thay đổi đã được áp dụng.")
             else:
                 print("\nℹ️ Cấu trúc của tất cả đề cương đã được đồng bộ. Không có gì thay đổi.")
+            if stats['skipped']:
+                log(f"   Bỏ qua {stats['skipped']} đề cương do thiếu/lỗi tệp cấu trúc.")
     except Exception as e:
         print(f"\n❌ ĐÃ XẢY RA LỖI NGHIÊM TRỌNG: {e}")
         traceback.print_exc()
         db.session.rollback()
 
 
+@app.cli.command("resume-upgrade-jobs")
+def resume_upgrade_jobs():
+    """Chạy tiếp ngay trong lệnh các job nâng cấp mẫu bị dừng giữa chừng (vd server chết khi đang chạy)."""
+    with app.app_context():
+        resumed = jobs.resume_stale_jobs()
+        for job in resumed:
+            print(f"Job {job.id}: {job.status.name} ({job.processed}/{job.total})" +
+                  (f" - {job.error}" if job.error else ""))
+        print(f"Đã chạy tiếp {len(resumed)} job.")
+
+
+@app.cli.command("bench-merge")
+@click.option('--count', default=2000, help="Số đề cương cần merge (nhân bản từ dữ liệu hiện có).")
+def bench_merge(count):
+    """Đo thông lượng services.merge_syllabus_structures, so với chi phí tuần tự hóa một đề cương qua lại.
+
+    Chi phí tuần tự hóa (JSON gửi đi + pickle kết quả về) là mức tối thiểu một pool tiến trình phải trả cho mỗi
+    đề cương; khi nó lớn hơn thời gian merge thì chia việc sang nhiều tiến trình không thể nhanh hơn.
+    """
+    with app.app_context():
+        syllabuses = dao.get_syllabuses_for_structure()
+        if not syllabuses:
+            print("Chưa có đề cương nào để đo.")
+            return
+        template = syllabuses[0].template.structure
+        sources = [s.to_structure_json() for s in syllabuses]
+        structures = [sources[i % len(sources)] for i in range(count)]
+
+        start = time.perf_counter()
+        merged = services.merge_syllabus_structures(template, structures)
+        merge_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for structure, result in zip(structures, merged):
+            json.loads(json.dumps(structure, ensure_ascii=False, default=str))
+            pickle.loads(pickle.dumps(result))
+        transfer_seconds = time.perf_counter() - start
+
+        print(f"Merge tuần tự: {merge_seconds:.2f}s ({count / merge_seconds:.0f} đề cương/s, "
+              f"{merge_seconds / count * 1e6:.0f} µs/đề cương)")
+        print(f"Tuần tự hóa qua lại: {transfer_seconds / count * 1e6:.0f} µs/đề cương "
+              f"({transfer_seconds / merge_seconds:.1f}x thời gian merge)")
+
+
+@app.cli.command("bench-sync-structures")
+@click.option('--count', default=10000, help="Số đề cương tổng hợp cần tạo.")
+@click.option('--chunk-size', default=500, help="Số đề cương mỗi lô.")
+def bench_sync_structures(count, chunk_size):
+    """Đo services.sync_syllabus_structures trên CSDL SQLite tạm trong bộ nhớ (không đụng tới CSDL thật)."""
+    bench_app = Flask(__name__)
+    bench_app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(bench_app)
+    with bench_app.app_context():
+        db.create_all()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+        with open(os.path.join(app.root_path, 'data', 'structures', services.DEFAULT_STRUCTURE_FILE),
+                  encoding='utf-8') as f:
+            structure = json.load(f)
+        db.session.add_all([Faculty(id=1, name="Khoa"), Lecturer(id=1, name="Giảng viên", faculty_id=1),
+                            Credit(id=1, numberTheory=3, numberPractice=1, hourSelfStudy=6),
+                            Subject(id="BENCH", name="Môn học", credit_id=1),
+                            TemplateSyllabus(id=1, name="Mẫu", structure=structure)])
+        db.session.commit()
+
+        # Mỗi đề cương lệch khỏi tệp cấu trúc theo một trong bốn kiểu
+        items = []
+        for i in range(count):
+            drifted = json.loads(json.dumps(structure))
+            if i % 4 == 0:
+                drifted.pop()
+            elif i % 4 == 1:
+                drifted[0]['sub_sections'][0]['name'] += " (cũ)"
+            elif i % 4 == 2:
+                for sub in drifted[-1]['sub_sections']:
+                    sub['position'] += 1
+            else:
+                drifted.append({'name': "Phần cũ", 'code': 'legacy', 'position': 99, 'sub_sections': []})
+            items.append({'syllabus': {'name': f"Đề cương {i}", 'subject_id': "BENCH", 'faculty_id': 1,
+                                       'lecturer_id': 1, 'template_id': 1}, 'structure': drifted})
+        services.bulk_insert_syllabuses(items, chunk_size=chunk_size)
+        db.session.commit()
+
+        for label in ("Lần 1", "Lần 2 (đã đồng bộ)"):
+            statements.clear()
+            start = time.perf_counter()
+            stats = services.sync_syllabus_structures(chunk_size=chunk_size, log=lambda *args: None)
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {stats['syllabuses']} đề cương, {stats['changes']} thay đổi, "
+                  f"{len(statements)} câu SQL, {elapsed:.2f}s ({stats['syllabuses'] / elapsed:.0f} đề cương/s)")
+
+
+
+@app.cli.command("bench-endpoints")
+@click.option('--scales', default="100,1000", show_default=True,
+              help="Các quy mô (số đề cương) cần đo, cách nhau bởi dấu phẩy.")
+@click.option('--iterations', default=20, show_default=True, help="Số lần đo mỗi route.")
+@click.option('--budgets', 'budget_file', default=benchmarks.DEFAULT_BUDGET_FILE, show_default=True,
+              type=click.Path(dir_okay=False), help="Tệp JSON ngân sách số câu SQL và độ trễ p95.")
+@click.option('--record', is_flag=True, help="Ghi kết quả lần đo này làm ngân sách mới thay vì kiểm tra.")
+@click.option('--run-scale', type=int, hidden=True)
+def bench_endpoints(scales, iterations, budget_file, record, run_scale):
+    """Đo độ trễ p50/p95/p99, số câu SQL và bộ nhớ đỉnh của các route chính trên CSDL SQLite sinh sẵn.
+
+    Mỗi quy mô chạy trong một tiến trình con với DATABASE_URL trỏ tới tệp SQLite tạm (không đụng CSDL thật).
+    Thoát với mã 1 nếu có route vượt ngân sách.
+    """
+    if run_scale is not None:
+        # Tiến trình con: chỉ in kết quả JSON ra stdout, nhật ký ra stderr
+        with app.app_context():
+            if db.engine.dialect.name != 'sqlite':
+                raise click.UsageError("Chỉ chạy bộ đo trên CSDL SQLite tạm.")
+            admin_id, specialist_id = benchmarks.populate_bench_database(run_scale)
+            results = benchmarks.run_endpoint_benchmarks({'admin': admin_id, 'specialist': specialist_id},
+                                                         iterations=iterations,
+                                                         log=lambda msg: click.echo(msg, err=True))
+        click.echo(json.dumps(results))
+        return
+
+    results_by_scale = {}
+    for scale in [int(s) for s in scales.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.db'))
+            print(f"Quy mô {scale} đề cương...")
+            proc = subprocess.run([sys.executable, '-m', 'flask', '--app', 'manage_syllabus_app.index',
+                                   'bench-endpoints', '--run-scale', str(scale), '--iterations', str(iterations)],
+                                  env=env, stdout=subprocess.PIPE, text=True)
+            if proc.returncode != 0:
+                raise click.ClickException(f"Tiến trình đo quy mô {scale} lỗi (mã {proc.returncode}).")
+            results_by_scale[scale] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"{'quy mô':>7} {'route':<38} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL':>5} {'đỉnh KB':>8}")
+    for scale, results in results_by_scale.items():
+        for label, r in results.items():
+            print(f"{scale:>7} {label:<38} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+                  f"{r['max_queries']:>5} {r['peak_kb']:>8}")
+
+    if record:
+        budgets = benchmarks.load_budgets(budget_file)
+        budgets.update(benchmarks.make_budgets(results_by_scale))
+        with open(budget_file, 'w', encoding='utf-8') as f:
+            json.dump(budgets, f, ensure_ascii=False, indent=2)
+        print(f"Đã ghi ngân sách vào {budget_file}")
+        return
+    violations = benchmarks.check_budgets(results_by_scale, benchmarks.load_budgets(budget_file))
+    for violation in violations:
+        print(f"❌ {violation}")
+    if violations:
+        sys.exit(1)
+    print("✅ Tất cả route đều trong ngân sách.")
 
 '''
 (.venv) PS D:\PythonProject> set FLASK_APP=manage_syllabus_app.index
@@ -222,4 +401,4 @@ def sync_structure():
 D:\PythonProject\manage_syllabus>py -3.10 -m venv .venv
 D:\PythonProject\manage_syllabus>.venv\Scripts\activate
 
-'''
\ No newline at end of file
+'''
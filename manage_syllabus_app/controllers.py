@@ -1,12 +1,14 @@
 from datetime import datetime
 import math, json
 
-from manage_syllabus_app import app, dao, login, services
+from manage_syllabus_app import app, dao, login, services, jobs
 import functools
 from flask import render_template, request, url_for, flash, jsonify, abort, Blueprint, session
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import redirect
 from manage_syllabus_app import db
+from manage_syllabus_app.decorators import conditional_syllabus, conditional_json, read_primary
+from manage_syllabus_app.cache import shared_generation
 
 from manage_syllabus_app.models import Faculty, Lecturer, Credit, Subject, Syllabus, RequirementSubject, \
     TypeRequirement, MainSection, LearningMaterial, TypeLearningMaterial, TextSubSection, \
@@ -20,20 +22,21 @@ from manage_syllabus_app.models import Faculty, Lecturer, Credit, Subject, Sylla
 def index():
     page_size = app.config["PAGE_SIZE"]
     total = dao.count_syllabuses()
-    page = request.args.get('page', 1, type=int)
-    syllabus = []
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    syllabus, next_cursor, prev_cursor = [], None, None
     if current_user.is_authenticated:
         if current_user.user_role == UserRole.ADMIN:
-            total = dao.count_syllabuses()
-            syllabus = dao.get_all_syllabuses(page=page, page_size=page_size)
+            syllabus, next_cursor, prev_cursor = dao.get_syllabuses_keyset(page_size, after=after, before=before)
 
         elif current_user.user_role == UserRole.USER and current_user.lecturer_id:
             total = dao.count_syllabuses(lecturer_id=current_user.lecturer_id)
-            syllabus = dao.get_syllabuses_by_lecturer_id(lecturer_id=current_user.lecturer_id,
-                                                         page=page, page_size=page_size)
+            syllabus, next_cursor, prev_cursor = dao.get_syllabuses_keyset(page_size, after=after, before=before,
+                                                                           lecturer_id=current_user.lecturer_id)
     all_faculties = dao.get_all_faculties()
     return render_template('index.html', syllabuses=syllabus, all_faculties=all_faculties,
-                           pages=math.ceil(total / page_size), current_page=page)
+                           total=total,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 
 @app.route('/specialist/editor')
@@ -86,8 +89,9 @@ def specialist_template_detail(template_id):
 
 @app.route('/syllabus/<int:syllabus_id>/')
 @login_required
+@conditional_syllabus
 def syllabus_detail(syllabus_id):
-    syllabus = dao.get_syllabus_by_id(syllabus_id)
+    syllabus = dao.load_syllabus_for_detail(syllabus_id)
     all_faculties = dao.get_all_faculties()
     all_lecturers = dao.get_lecturers()
     all_type_subjects = dao.get_all_type_subjects()
@@ -96,7 +100,7 @@ def syllabus_detail(syllabus_id):
     plos = dao.get_all_plos()
     sorted_plos = dao.get_sorted_plos_for_syllabus(syllabus_id)
     type_assessments = dao.get_type_assessments()
-    assessments = dao.get_assessments_by_syllabus(syllabus_id)
+    assessments = syllabus.assessments
     clos = dao.get_clos_by_subject_id(syllabus.subject_id)
     schedule_groups = dao.get_schedule_groups()
     teaching_sessions = dao.get_teaching_sessions(syllabus_id)
@@ -156,60 +160,31 @@ def user_logout():
 
 
 @app.route('/syllabus/sync-batch-upgrade', methods=['POST'])
+@login_required
 def syllabus_sync_batch_upgrade():
     try:
         data = request.json
-        old_template_id = data['old_template_id']
-        new_template_id = data['new_template_id']
+        old_template_id = int(data['old_template_id'])
+        new_template_id = int(data['new_template_id'])
         new_template = dao.get_template_by_id(new_template_id)
         if not new_template:
             return jsonify({
                 'status': 400,
                 'err_msg': "Không tìm thấy mẫu đề cương này"
             })
-        new_structure = new_template.structure
 
-        syllabuses = Syllabus.query.filter_by(template_id=old_template_id).all()
-        if not syllabuses:
+        job, started = jobs.start_template_upgrade(old_template_id, new_template_id, current_user.id)
+        if not started:
             return jsonify({
-                'status': 400,
-                'err_msg': "không có đề cương nào để đồng bộ"
+                'status': 409,
+                'err_msg': "Đang có tiến trình đồng bộ khác cho mẫu đề cương này",
+                'job_id': job.id
             })
-
-        count = 0
-        for syllabus in syllabuses:
-            print(f"DEBUG SYLLABUS ID: {syllabus.id}")
-            print(f"DEBUG Count Learning Materials: {len(syllabus.learning_materials)}")
-            exist = Syllabus.query.filter_by(
-                id=syllabus.id,
-                template_id=new_template_id,
-                lecturer_id=syllabus.lecturer_id
-            ).first()
-            if exist: continue
-            old_obj = syllabus.to_structure_json()
-
-            new_syllabus_structure = services.merge_syllabus_data(new_structure, old_obj)
-            now = datetime.now().strftime("%d/%m/%Y")
-            s = Syllabus(
-                name=f"{syllabus.name} {new_template.name}",
-                subject=syllabus.subject,
-                lecturer=syllabus.lecturer,
-                faculty=syllabus.faculty,
-                template=new_template,
-                status=f"{current_user.name} đã tạo đề cương ngày {now}"
-            )
-            services.build_syllabus_structure(new_syllabus=s, json_structure_syllabus=new_syllabus_structure)
-            count = count + 1
-            db.session.add(s)
-
-        print(f"Đã khởi tạo {count} đề cương mới")
-        db.session.commit()
         return jsonify({
             'status': 200,
-            'msg': f'Đã đồng bộ và tạo mới {count} đề cương.',
+            'msg': 'Đã bắt đầu đồng bộ đề cương theo mẫu mới.',
+            'job_id': job.id
         })
-
-
     except Exception as e:
         return jsonify({
             'status': 500,
@@ -217,6 +192,22 @@ def syllabus_sync_batch_upgrade():
         })
 
 
+@app.route('/syllabus/sync-jobs/<int:job_id>', methods=['GET'])
+@login_required
+@read_primary
+def syllabus_sync_job_status(job_id):
+    job = dao.get_upgrade_job(job_id)
+    if not job:
+        return jsonify({
+            'status': 404,
+            'err_msg': "Không tìm thấy tiến trình đồng bộ"
+        })
+    return jsonify({
+        'status': 200,
+        'job': job.to_dict()
+    })
+
+
 @app.route('/syllabus/create_from_template/<template_id>', methods=['GET'])
 def create_from_template(template_id):
     template_id = template_id
@@ -312,27 +303,68 @@ def draft_delete():
 
 
 # API ĐỀ CƯƠNG USER
-@app.route('/text-subsection/<int:section_id>', methods=['PATCH'])
-def update_text_subsection(section_id):
+@app.route('/syllabus/<int:syllabus_id>/batch', methods=['POST'])
+@login_required
+def syllabus_batch(syllabus_id):
     try:
-        s = TextSubSection.query.get(section_id)
-        if not s:
+        syllabus = db.session.get(Syllabus, syllabus_id)
+        if not syllabus:
             return jsonify({
                 "status": 400,
-                "err_msg": "Không tìm thấy tiểu mục"
+                "err_msg": "Không tìm thấy đề cương"
             })
-
-        data = request.json
-        if dao.update_text_sub_section(data.get('content'), s):
+        operations = (request.json or {}).get('operations')
+        if not isinstance(operations, list) or not operations:
             return jsonify({
-                "status": 200,
-                "msg": "Cập nhật thành công"
+                "status": 400,
+                "err_msg": "Thiếu danh sách thao tác"
             })
-        else:
+        if len(operations) > app.config.get('BATCH_MAX_OPERATIONS', 500):
+            return jsonify({
+                "status": 400,
+                "err_msg": "Quá nhiều thao tác trong một lần lưu"
+            })
+        results = services.apply_syllabus_batch(syllabus, operations)
+        failed = sum(1 for r in results if r['status'] != 200)
+        return jsonify({
+            "status": 200,
+            "msg": f"Đã lưu {len(results) - failed}/{len(results)} thay đổi",
+            "failed": failed,
+            "results": results
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "status": 500,
+            "err_msg": str(e)
+        })
+
+
+def _patch_result(affected):
+    # affected = 0: giá trị không đổi, không có câu ghi nào và version đề cương giữ nguyên
+    return {
+        "status": 200,
+        "msg": "Cập nhật thành công" if affected else "Không có thay đổi",
+        "affected": affected
+    }
+
+
+@app.route('/text-subsection/<int:section_id>', methods=['PATCH'])
+def update_text_subsection(section_id):
+    try:
+        content = request.json.get('content')
+        if not content:
             return jsonify({
                 "status": 400,
                 "err_msg": "Lỗi cập nhật"
             })
+        affected = dao.update_text_sub_section(section_id, content)
+        if affected is None:
+            return jsonify({
+                "status": 400,
+                "err_msg": "Không tìm thấy tiểu mục"
+            })
+        return jsonify(_patch_result(affected))
     except Exception as e:
         return jsonify({
             "status": 500,
@@ -347,6 +379,7 @@ def update_table_subsection(section_id):
         data = request.json
         data_table = data.get('data_table')
         s.data = data_table
+        dao.mark_syllabus_changed(sub_section_id=section_id)
         db.session.commit()
         return jsonify({
             "status": 200,
@@ -362,23 +395,19 @@ def update_table_subsection(section_id):
 @app.route('/course-objective/<int:co_id>', methods=['PATCH'])
 def update_course_objective(co_id):
     try:
-        co = dao.get_co_by_id(co_id)
-        if not co:
+        content = request.json.get('content')
+        if not content:
             return jsonify({
                 "status": 400,
-                "err_msg": "Không tìm thấy mục tiêu môn học"
-            })
-        data = request.json
-        if dao.update_co(data.get('content'), co):
-            return jsonify({
-                "status": 200,
-                "msg": "Cập nhật thành công"
+                "err_msg": "Lỗi cập nhật"
             })
-        else:
+        affected = dao.update_co(co_id, content)
+        if affected is None:
             return jsonify({
                 "status": 400,
-                "err_msg": "Lỗi cập nhật"
+                "err_msg": "Không tìm thấy mục tiêu môn học"
             })
+        return jsonify(_patch_result(affected))
     except Exception as e:
         return jsonify({
             "status": 500,
@@ -389,23 +418,19 @@ def update_course_objective(co_id):
 @app.route('/course-learning-outcome/<int:clo_id>', methods=['PATCH'])
 def update_course_learning_outcome(clo_id):
     try:
-        clo = dao.get_clo_by_id(clo_id)
-        if not clo:
+        content = request.json.get('content')
+        if not content:
             return jsonify({
                 "status": 400,
-                "err_msg": "Không tìm thấy mô tả chuẩn đầu ra"
-            })
-        data = request.json
-        if dao.update_clo(data.get('content'), clo):
-            return jsonify({
-                "status": 200,
-                "msg": "Cập nhật thành công"
+                "err_msg": "Lỗi cập nhật"
             })
-        else:
+        affected = dao.update_clo(clo_id, content)
+        if affected is None:
             return jsonify({
                 "status": 400,
-                "err_msg": "Lỗi cập nhật"
+                "err_msg": "Không tìm thấy mô tả chuẩn đầu ra"
             })
+        return jsonify(_patch_result(affected))
     except Exception as e:
         return jsonify({
             "status": 500,
@@ -426,6 +451,7 @@ def add_learning_material(syllabus_id):
 
         name = data.get('name')
         type_id = data.get('type_id')
+        dao.mark_syllabus_changed(syllabus_id=syllabus_id)
         if dao.add_learning_material(name=name, type_id=type_id, syllabus=syllabus):
             return jsonify({
                 "status": 200,
@@ -454,6 +480,7 @@ def del_learning_material(syllabus_id, material_id):
                 "status": 400,
                 "err_msg": "Không đủ dữ liệu"
             })
+        dao.mark_syllabus_changed(syllabus_id=syllabus_id)
         if dao.remove_learning_material(material=material, syllabus=syllabus):
             return jsonify({
                 "status": 200,
@@ -475,24 +502,19 @@ def del_learning_material(syllabus_id, material_id):
 @app.route('/learning-material/<int:material_id>', methods=['PATCH'])
 def update_learning_material(material_id):
     try:
-        m = dao.get_learning_material(id=material_id)
-        if not m:
+        name = request.json.get('name')
+        if not name:
             return jsonify({
                 "status": 400,
-                "err_msg": "Không tìm thấy tài liệu tham khảo"
-            })
-
-        data = request.json
-        if dao.update_learning_material(data.get('name'), m):
-            return jsonify({
-                "status": 200,
-                "msg": "Cập nhật thành công"
+                "err_msg": "Lỗi cập nhật"
             })
-        else:
+        affected = dao.update_learning_material(material_id, name)
+        if affected is None:
             return jsonify({
                 "status": 400,
-                "err_msg": "Lỗi cập nhật"
+                "err_msg": "Không tìm thấy tài liệu tham khảo"
             })
+        return jsonify(_patch_result(affected))
 
     except  Exception as e:
         return jsonify({
@@ -501,7 +523,17 @@ def update_learning_material(material_id):
         })
 
 
+def _attribute_group_state(group_id):
+    # Giá trị của nhóm thuộc danh mục dùng chung; giá trị đã chọn của tiểu mục theo version đề cương chứa nó
+    subsection_id = request.args.get('subsection_id', type=int)
+    version = dao.get_sub_section_syllabus_version(subsection_id) if subsection_id else 0
+    if version is None:
+        return None
+    return f"{group_id}-{subsection_id}-{version}-{shared_generation()}"
+
+
 @app.route('/attribute-group/<int:group_id>', methods=['GET'])
+@conditional_json(_attribute_group_state)
 def get_attribute_group(group_id):
     try:
         subsection_id = request.args.get('subsection_id', type=int)
@@ -579,6 +611,7 @@ def add_subsection_attribute():
                 "err_msg": "Lỗi id"
             })
 
+        dao.mark_syllabus_changed(sub_section_id=subsection_id)
         if dao.add_attribute(subsection_id, attribute_id):
             return jsonify({
                 "status": 200,
@@ -608,6 +641,7 @@ def delete_subsection_attribute():
                 "err_msg": "Lỗi id"
             })
 
+        dao.mark_syllabus_changed(sub_section_id=subsection_id)
         if dao.del_attribute(subsection_id, attribute_id):
             return jsonify({
                 "status": 200,
@@ -644,17 +678,13 @@ def update_credits():
                 "err_msg": "Lỗi dữ liệu"
             })
 
-        if dao.update_credit(credit_id, theory, practice, self_study):
-            return jsonify({
-                "status": 200,
-                "msg": "Cập nhật thành công",
-                "total": theory + practice
-            })
-        else:
+        affected = dao.update_credit(credit_id, theory, practice, self_study)
+        if affected is None:
             return jsonify({
                 "status": 400,
                 "err_msg": "Cập nhật thất bại"
             })
+        return jsonify({**_patch_result(affected), "total": theory + practice})
     except Exception as e:
         return jsonify({
             "status": 500,
@@ -680,6 +710,7 @@ def add_requirement_subject(syllabus_id):
                 "err_msg": "Thiếu thông tin môn học hoặc loại điều kiện"
             })
 
+        dao.mark_syllabus_changed(subject_id=s.subject_id)
         if dao.add_requirement_subject(syllabus=s, subject_id=subject_id, type_id=type_id):
             subject = dao.get_subject_by_id(subject_id)
             type = dao.get_type_subject(type_id)
@@ -711,6 +742,7 @@ def delete_requirement_subject(syllabus_id, req_subject_id):
                 "err_msg": "Không tìm thấy đề cương"
             })
 
+        dao.mark_syllabus_changed(subject_id=s.subject_id)
         if dao.delete_requirement_subject(syllabus=s, subject_id=req_subject_id):
             return jsonify({
                 "status": 200,
@@ -739,6 +771,7 @@ def add_plo_objective(co_id):
                 "status": 400,
                 "msg": "Lỗi dữ liệu"
             })
+        dao.mark_syllabus_changed(co_id=co_id)
         if dao.add_plo_for_co(co=co, plo=plo):
             return jsonify({
                 "status": 200,
@@ -766,6 +799,7 @@ def del_plo_objective(co_id, plo_id):
                 "status": 400,
                 "msg": "Lỗi dữ liệu"
             })
+        dao.mark_syllabus_changed(co_id=co_id)
         if dao.delete_plo_for_co(co=co, plo=plo):
             return jsonify({
                 "status": 200,
@@ -798,6 +832,7 @@ def add_course_objective(subject_id):
         plos = dao.get_plos(plo_ids=plo_ids)
         co = CourseObjective(subject=subject, content=co_content, programme_learning_outcomes=plos)
         db.session.add(co)
+        dao.mark_syllabus_changed(subject_id=subject.id)
         db.session.commit()
         return jsonify({
             "status": 200,
@@ -828,6 +863,7 @@ def del_course_objective(subject_id, co_id):
             })
 
         subject.course_objectives.remove(co)
+        dao.mark_syllabus_changed(subject_id=subject.id)
         db.session.commit()
         return jsonify({
             "status": 200,
@@ -852,6 +888,7 @@ def add_course_clo(co_id):
         data = request.json
         clo_content = data.get('content')
         clo = CourseLearningOutcome(content=clo_content)
+        dao.mark_syllabus_changed(co_id=co_id)
         if dao.add_clo_for_co(co=co, clo=clo):
             return jsonify({
                 "status": 200,
@@ -880,6 +917,7 @@ def del_course_clo(co_id, clo_id):
                 "err_msg": "Lỗi data"
             })
 
+        dao.mark_syllabus_changed(co_id=co_id)
         if dao.delete_clo_for_co(co=co, clo=clo):
             return jsonify({
                 "status": 200,
@@ -897,26 +935,88 @@ def del_course_clo(co_id, clo_id):
         })
 
 
-@app.route('/clo/<int:clo_id>/plo/<int:plo_id>', methods=['PUT'])
-def update_rating(clo_id, plo_id):
+def _clo_plo_matrix_state(subject_id):
+    revision = dao.get_subject_revision(subject_id)
+    return f"{subject_id}-" + "-".join(str(value) for value in revision) if revision else None
+
+
+@app.route('/subject/<subject_id>/clo-plo-matrix', methods=['GET'])
+@login_required
+@read_primary
+@conditional_json(_clo_plo_matrix_state)
+def get_clo_plo_matrix(subject_id):
     try:
-        data = request.json
-        rating = data.get('rating')
-        if not rating:
+        rows = dao.get_clo_plo_matrix(subject_id)
+        if not rows and not dao.get_subject_by_id(subject_id):
+            return jsonify({
+                "status": 400,
+                "err_msg": "Không tìm thấy môn học"
+            })
+        return jsonify({
+            "status": 200,
+            "subject_id": subject_id,
+            "clos": [{"id": clo_id, "co_id": co_id} for co_id, clo_id in dict.fromkeys((r[0], r[1]) for r in rows)],
+            "plos": sorted({r[2] for r in rows if r[2] is not None}),
+            "cells": [{"clo_id": clo_id, "plo_id": plo_id, "rating": rating}
+                      for _, clo_id, plo_id, rating in rows if plo_id is not None]
+        })
+    except Exception as e:
+        return jsonify({
+            "status": 500,
+            "err_msg": str(e)
+        })
+
+
+@app.route('/subject/<subject_id>/clo-plo-matrix', methods=['PUT'])
+@login_required
+def update_clo_plo_matrix(subject_id):
+    try:
+        cells = (request.json or {}).get('cells')
+        if not isinstance(cells, list) or not cells:
             return jsonify({
                 "status": 400,
-                "err_msg": "Không lấy được rating"
+                "err_msg": "Thiếu danh sách ô cần cập nhật"
             })
-        if dao.update_rating(clo_id=clo_id, plo_id=plo_id, rating=rating):
+        if len(cells) > app.config.get('BATCH_MAX_OPERATIONS', 500):
             return jsonify({
-                "status": 200,
-                "msg": "Cập nhật thành công"
+                "status": 400,
+                "err_msg": "Quá nhiều ô trong một lần lưu"
             })
-        else:
+        results, affected = services.apply_clo_plo_matrix(subject_id, cells)
+        failed = sum(1 for r in results if r['status'] != 200)
+        return jsonify({
+            "status": 200,
+            "msg": f"Đã lưu {len(results) - failed}/{len(results)} ô",
+            "failed": failed,
+            "affected": affected,
+            "results": results
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "status": 500,
+            "err_msg": str(e)
+        })
+
+
+@app.route('/clo/<int:clo_id>/plo/<int:plo_id>', methods=['PUT'])
+def update_rating(clo_id, plo_id):
+    try:
+        data = request.json or {}
+        try:
+            rating = services._batch_rating(data.get('rating'))
+        except services.BatchError as e:
+            return jsonify({
+                "status": 400,
+                "err_msg": str(e)
+            })
+        affected = dao.update_rating(clo_id=clo_id, plo_id=plo_id, rating=rating)
+        if affected is None:
             return jsonify({
                 "status": 400,
                 "err_msg": "Cập nhật thất bại"
             })
+        return jsonify(_patch_result(affected))
     except Exception as e:
         return jsonify({
             "status": 500,
@@ -968,6 +1068,7 @@ def add_syllabus_assessment(syllabus_id):
             if clo_id not in existing_clo_ids:
                 method.course_learning_outcomes.append(MethodCourseLearningOutcome(clo_id=int(clo_id)))
 
+        dao.mark_syllabus_changed(syllabus_id=s.id)
         db.session.commit()
 
         return jsonify({
@@ -992,6 +1093,7 @@ def delete_assessment(assessment_id):
                 "err_msg": "Không tìm thấy bài đánh giá cần xóa"
             })
 
+        dao.mark_syllabus_changed(syllabus_id=assessment.syllabus_id)
         db.session.delete(assessment)
         db.session.commit()
         return jsonify({
@@ -1012,6 +1114,7 @@ def delete_method(method_id):
         if not method:
             return jsonify({"status": 404, "err_msg": "Không tìm thấy phương pháp"})
 
+        dao.mark_syllabus_changed(syllabus_id=method.assessment.syllabus_id)
         db.session.delete(method)
         db.session.commit()
         return jsonify({
@@ -0,0 +1,102 @@
+from sqlalchemy import and_, delete, distinct, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from manage_syllabus_app.models import Syllabus, CourseObjective, CourseLearningOutcome, CloPloAssociation, \
+    CourseObjectiveProgrammeLearningOutcome, TrainingProgram, TrainingProgramSyllabus, PloCoverage
+
+# =============================================================================
+# ĐỘ PHỦ PLO THEO CHƯƠNG TRÌNH ĐÀO TẠO (bảng PloCoverage)
+# Khi một transaction ghi vào các model dưới đây, các dòng độ phủ của những môn học có đề cương bị đánh dấu
+# thay đổi (dao.mark_syllabus_changed) và của các chương trình bị sửa được tính lại ngay trước khi commit.
+# Dữ liệu nạp thẳng bằng lệnh (seed, import) cần chạy `flask rebuild-plo-coverage`.
+# =============================================================================
+_TRACKED_OBJECTS = (CloPloAssociation, CourseLearningOutcome, CourseObjective, TrainingProgram,
+                    TrainingProgramSyllabus)
+# Câu ghi hàng loạt (UPDATE/INSERT không qua đối tượng) chỉ đổi độ phủ khi nhắm vào các bảng này
+_TRACKED_STATEMENTS = (CloPloAssociation, TrainingProgramSyllabus)
+
+
+def _coverage_rows(member_filter=None):
+    """SELECT (chương trình, PLO, môn, max, avg, số CLO) từ các ô CLO-PLO hợp lệ có rating > 0."""
+    members = select(TrainingProgramSyllabus.training_program_id, Syllabus.subject_id) \
+        .join(Syllabus, Syllabus.id == TrainingProgramSyllabus.syllabus_id).distinct()
+    if member_filter is not None:
+        members = members.where(member_filter)
+    members = members.subquery()
+    link = CourseObjectiveProgrammeLearningOutcome
+    return select(members.c.training_program_id, CloPloAssociation.plo_id, members.c.subject_id,
+                  func.max(CloPloAssociation.rating), func.avg(CloPloAssociation.rating),
+                  func.count(distinct(CourseLearningOutcome.id))) \
+        .select_from(members) \
+        .join(CourseObjective, CourseObjective.subject_id == members.c.subject_id) \
+        .join(CourseLearningOutcome, CourseLearningOutcome.course_objective_id == CourseObjective.id) \
+        .join(link, link.course_objective_id == CourseObjective.id) \
+        .join(CloPloAssociation, and_(CloPloAssociation.clo_id == CourseLearningOutcome.id,
+                                      CloPloAssociation.plo_id == link.programme_learning_outcome_id)) \
+        .where(CloPloAssociation.rating > 0) \
+        .group_by(members.c.training_program_id, CloPloAssociation.plo_id, members.c.subject_id)
+
+
+def _replace(session, stale_filter, member_filter):
+    session.execute(delete(PloCoverage).where(stale_filter) if stale_filter is not None else delete(PloCoverage))
+    result = session.execute(insert(PloCoverage).from_select(
+        ['training_program_id', 'plo_id', 'subject_id', 'max_rating', 'avg_rating', 'rated_clos'],
+        _coverage_rows(member_filter)))
+    return result.rowcount
+
+
+def refresh_plo_coverage(session, subject_ids=(), program_ids=()):
+    """Tính lại độ phủ của các môn học và chương trình đã cho bằng một câu DELETE và một câu INSERT ... SELECT."""
+    subject_ids, program_ids = list(subject_ids), list(program_ids)
+    if not subject_ids and not program_ids:
+        return 0
+    stale, members = [], []
+    if subject_ids:
+        stale.append(PloCoverage.subject_id.in_(subject_ids))
+        members.append(Syllabus.subject_id.in_(subject_ids))
+    if program_ids:
+        stale.append(PloCoverage.training_program_id.in_(program_ids))
+        members.append(TrainingProgramSyllabus.training_program_id.in_(program_ids))
+    return _replace(session, or_(*stale), or_(*members))
+
+
+def rebuild_plo_coverage(session):
+    """Dựng lại toàn bộ bảng độ phủ; trả về số dòng."""
+    return _replace(session, None, None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_objects(session, flush_context):
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, _TRACKED_OBJECTS) for obj in changed):
+        session.info['plo_coverage_dirty'] = True
+        # Danh sách đề cương của chương trình đổi: tính lại cả chương trình
+        session.info.setdefault('plo_coverage_programs', set()).update(
+            obj.id for obj in changed if isinstance(obj, TrainingProgram))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_statements(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, _TRACKED_STATEMENTS):
+            orm_execute_state.session.info['plo_coverage_dirty'] = True
+
+
+# insert=True: chạy trước dao._bump_syllabus_versions, lúc phạm vi đề cương thay đổi còn trong session.info
+@event.listens_for(Session, 'before_commit', insert=True)
+def _refresh_before_commit(session):
+    session.flush()
+    programs = session.info.pop('plo_coverage_programs', set())
+    if not session.info.pop('plo_coverage_dirty', False):
+        return
+    scopes = session.info.get('syllabus_version_scopes')
+    subject_ids = session.execute(select(Syllabus.subject_id).where(or_(*scopes)).distinct()).scalars().all() \
+        if scopes else []
+    refresh_plo_coverage(session, subject_ids=subject_ids, program_ids=programs)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_coverage_changes(session, previous_transaction):
+    session.info.pop('plo_coverage_dirty', None)
+    session.info.pop('plo_coverage_programs', None)
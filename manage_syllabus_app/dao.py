@@ -1,14 +1,25 @@
-from sqlalchemy import cast, Integer
+import re
+from datetime import datetime
+from sqlalchemy import cast, Integer, event, and_, or_, select, update, insert, exists, literal, table, column, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload, selectinload, with_polymorphic
 import hashlib
-from manage_syllabus_app import db, app
+from manage_syllabus_app import db, app, routing
+from manage_syllabus_app.cache import cached_reference, cached_count
+from manage_syllabus_app.utils import normalize_search_text
 from manage_syllabus_app.models import User, Syllabus, Faculty, Lecturer, Subject, TypeRequirement, \
     LearningMaterial, TypeLearningMaterial, CourseObjective, CourseLearningOutcome, CloPloAssociation, \
     RequirementSubject, Credit, SubSection, ProgrammeLearningOutcome, TrainingProgram, TemplateSyllabus, TextSubSection, \
     AttributeGroup, AttributeValue, SubSectionAttributeValue, SelectionSubSection, \
     CourseObjectiveProgrammeLearningOutcome, UserRole, Major, Assessment, TypeAssessment, Method, ScheduleGroup, \
-    TeachingSession
+    TeachingSession, MainSection, ReferenceSubSection, TableSubSection, SyllabusLearningMaterial, TemplateUpgradeJob, \
+    PloCoverage
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# Tiểu mục nạp đa hình cùng lúc cả 4 bảng con, dùng cho các loader đi qua MainSection.sub_sections
+poly_sub_section = with_polymorphic(SubSection, [TextSubSection, SelectionSubSection, ReferenceSubSection,
+                                                 TableSubSection])
+
 
 # =========== CÁC HÀM LIÊN QUAN ĐẾN USER ===========
 def get_user_by_id(user_id):
@@ -66,23 +77,89 @@ def change_user_role(user, role_name):
 
 
 # =========== CÁC HÀM LIÊN QUAN ĐẾN SYLLABUS ===========
-def get_all_syllabuses(page=None, page_size=None, key=None, year=None, program=None, template=None):
-    """Lấy danh sách đề cương (có phân trang thủ công)."""
-    query = Syllabus.query
+# Bảng ảo FTS5 (chỉ có trên SQLite), xem SYLLABUS_FTS_DDL trong models.py
+syllabus_fts = table('syllabus_fts', column('rowid'), column('search_text'), column('rank'))
+
+
+def _apply_search(query, key):
+    """Lọc và xếp hạng đề cương theo từ khóa trên cột search_text (không phân biệt dấu).
+
+    MySQL dùng chỉ mục FULLTEXT (MATCH ... AGAINST), SQLite dùng bảng FTS5, các CSDL khác quay về LIKE.
+    """
+    terms = re.findall(r'\w+', normalize_search_text(key))
+    if not terms:
+        return query
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        score = Syllabus.search_text.match(' '.join(f'+{t}*' for t in terms))
+        return query.filter(score > 0).order_by(score.desc(), Syllabus.id)
+    if dialect == 'sqlite':
+        return query.join(syllabus_fts, syllabus_fts.c.rowid == Syllabus.id) \
+            .filter(syllabus_fts.c.search_text.match(' '.join(f'"{t}"*' for t in terms))) \
+            .order_by(syllabus_fts.c.rank, Syllabus.id)
+    for t in terms:
+        query = query.filter(Syllabus.search_text.contains(t))
+    return query.order_by(Syllabus.id)
+
+
+def _filter_syllabuses(query, key=None, year=None, program=None, template=None):
     if key:
-        query = query.filter(Syllabus.name.contains(key.strip()))
+        query = _apply_search(query, key)
     if year:
         query = query.join(Syllabus.training_programs).filter(TrainingProgram.academic_year == year)
     if program:
         query = query.filter(Syllabus.training_programs.any(TrainingProgram.name == program))
     if template:
         query = query.filter(Syllabus.structure_file == template)
+    return query
+
+
+def get_all_syllabuses(page=None, page_size=None, key=None, year=None, program=None, template=None):
+    """Lấy danh sách đề cương (có phân trang thủ công)."""
+    query = _filter_syllabuses(Syllabus.query, key=key, year=year, program=program, template=template)
     if page and page_size:
         start = (page - 1) * page_size
         return query.offset(start).limit(page_size).all()
     return query.all()
 
 
+def search_syllabuses(key, limit=None, year=None, program=None, template=None):
+    """Tìm đề cương theo tên, mã/tên môn học, tên giảng viên; kết quả xếp theo độ liên quan."""
+    query = _filter_syllabuses(Syllabus.query, key=key, year=year, program=program, template=template)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def get_syllabuses_keyset(page_size, after=None, before=None, lecturer_id=None, **filters):
+    """Phân trang đề cương theo con trỏ (keyset) trên Syllabus.id thay cho OFFSET.
+
+    Không nhận `key`: kết quả tìm kiếm xếp theo độ liên quan nên dùng search_syllabuses.
+
+    `after`/`before` là id đề cương cuối/đầu của trang đang xem. Trả về (items, next_cursor, prev_cursor),
+    con trỏ là None khi không còn trang theo hướng đó.
+    """
+    query = _filter_syllabuses(Syllabus.query, **filters)
+    if lecturer_id:
+        query = query.filter(Syllabus.lecturer_id == lecturer_id)
+
+    if before:
+        rows = query.filter(Syllabus.id < before).order_by(Syllabus.id.desc()).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        items = list(reversed(rows[:page_size]))
+        next_cursor = items[-1].id if items else None
+        prev_cursor = items[0].id if items and has_more else None
+    else:
+        if after:
+            query = query.filter(Syllabus.id > after)
+        rows = query.order_by(Syllabus.id).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        items = rows[:page_size]
+        next_cursor = items[-1].id if items and has_more else None
+        prev_cursor = items[0].id if items and after else None
+    return items, next_cursor, prev_cursor
+
+
 def get_syllabuses_by_lecturer_id(lecturer_id, page=None, page_size=None):
     """Lấy danh sách đề cương của giảng viên (có phân trang thủ công)."""
     query = Syllabus.query.filter_by(lecturer_id=lecturer_id)
@@ -97,11 +174,166 @@ def get_syllabus_by_id(syllabus_id):
     return Syllabus.query.get_or_404(syllabus_id)
 
 
+def load_syllabus_for_detail(syllabus_id):
+    """Lấy đề cương kèm toàn bộ cây dữ liệu cần cho trang chi tiết.
+
+    Quan hệ N-1 được joinedload vào câu truy vấn chính, các collection dùng selectinload
+    (mỗi cấp một câu SELECT ... IN) nên số truy vấn cố định, không phụ thuộc số tiểu mục,
+    CLO hay tài liệu của đề cương.
+    """
+    subject = joinedload(Syllabus.subject)
+    course_objectives = subject.selectinload(Subject.course_objectives)
+    required_subjects = subject.selectinload(Subject.required_by_relation)
+    sub_sections = selectinload(Syllabus.main_sections) \
+        .selectinload(MainSection.sub_sections.of_type(poly_sub_section))
+    assessment_methods = selectinload(Syllabus.assessments).selectinload(Assessment.assessment_methods)
+
+    return Syllabus.query.options(
+        subject.joinedload(Subject.credit),
+        joinedload(Syllabus.faculty),
+        joinedload(Syllabus.lecturer),
+        sub_sections.selectinload(poly_sub_section.SelectionSubSection.selected_values),
+        sub_sections.joinedload(poly_sub_section.SelectionSubSection.attribute_group),
+        course_objectives.selectinload(CourseObjective.programme_learning_outcomes),
+        course_objectives.selectinload(CourseObjective.course_learning_outcomes)
+        .selectinload(CourseLearningOutcome.plo_association),
+        required_subjects.joinedload(RequirementSubject.require_subject),
+        required_subjects.joinedload(RequirementSubject.type_requirement),
+        selectinload(Syllabus.learning_materials).joinedload(LearningMaterial.type_material),
+        assessment_methods.selectinload(Method.course_learning_outcomes),
+    ).filter(Syllabus.id == syllabus_id).first_or_404()
+
+
+def get_syllabus_structure_files(id_range=None):
+    """(id, name, structure_file) của các đề cương theo thứ tự id, không nạp đối tượng ORM.
+
+    `id_range` = (lo, hi) giới hạn lo <= id < hi.
+    """
+    query = db.session.query(Syllabus.id, Syllabus.name, Syllabus.structure_file)
+    if id_range:
+        query = query.filter(Syllabus.id >= id_range[0], Syllabus.id < id_range[1])
+    return query.order_by(Syllabus.id).all()
+
+
+def get_syllabus_id_bounds():
+    return db.session.query(func.min(Syllabus.id), func.max(Syllabus.id)).one()
+
+
+def get_main_sections_for_syllabuses(syllabus_ids):
+    """MainSection (kèm SubSection) của nhiều đề cương trong hai câu truy vấn, nhóm theo syllabus_id."""
+    sections = {}
+    query = MainSection.query.options(selectinload(MainSection.sub_sections)) \
+        .filter(MainSection.syllabus_id.in_(syllabus_ids)).order_by(MainSection.position, MainSection.id)
+    for section in query:
+        sections.setdefault(section.syllabus_id, []).append(section)
+    return sections
+
+
+def get_section_outlines(syllabus_ids):
+    """Dạng rút gọn (không qua ORM) của phần/tiểu mục các đề cương, dùng để phát hiện lệch cấu trúc.
+
+    Trả về {syllabus_id: [(main_id, code, name, position, [(sub_name, sub_position), ...]), ...]}.
+    """
+    outlines, mains = {}, {}
+    rows = db.session.execute(select(MainSection.id, MainSection.syllabus_id, MainSection.code, MainSection.name,
+                                     MainSection.position)
+                              .where(MainSection.syllabus_id.in_(syllabus_ids))
+                              .order_by(MainSection.position, MainSection.id))
+    for main_id, syllabus_id, code, name, position in rows:
+        mains[main_id] = (main_id, code, name, position, [])
+        outlines.setdefault(syllabus_id, []).append(mains[main_id])
+    sub_section = SubSection.__table__
+    rows = db.session.execute(select(sub_section.c.main_section_id, sub_section.c.name, sub_section.c.position)
+                              .join(MainSection.__table__, MainSection.id == sub_section.c.main_section_id)
+                              .where(MainSection.syllabus_id.in_(syllabus_ids))
+                              .order_by(sub_section.c.position, sub_section.c.id))
+    for main_id, name, position in rows:
+        mains[main_id][4].append((name, position))
+    return outlines
+
+
+def get_existing_syllabus_names(names):
+    """Trong các tên cho trước, trả về tập tên đã có đề cương sử dụng."""
+    if not names:
+        return set()
+    return set(db.session.execute(select(Syllabus.name).where(Syllabus.name.in_(names))).scalars())
+
+
+def get_existing_ids(model, ids):
+    """Trả về tập các id (trong `ids`) thực sự tồn tại trong bảng của model."""
+    if not ids:
+        return set()
+    return set(db.session.execute(select(model.id).where(model.id.in_(list(ids)))).scalars())
+
+
+def get_syllabus_revision(syllabus_id):
+    """Lấy (version, updated_date, created_date) của đề cương mà không nạp đối tượng ORM."""
+    return db.session.query(Syllabus.version, Syllabus.updated_date, Syllabus.created_date) \
+        .filter(Syllabus.id == syllabus_id).first()
+
+
+def get_sub_section_syllabus_version(sub_section_id):
+    """Version của đề cương chứa tiểu mục, None nếu tiểu mục không tồn tại."""
+    return db.session.scalar(select(Syllabus.version)
+                             .join(MainSection, MainSection.syllabus_id == Syllabus.id)
+                             .join(SubSection.__table__, SubSection.main_section_id == MainSection.id)
+                             .where(SubSection.id == sub_section_id))
+
+
+def get_subject_revision(subject_id):
+    """(số đề cương, version lớn nhất, tổng version) của các đề cương thuộc môn học, None nếu môn chưa có đề cương.
+
+    Mọi thao tác ghi dữ liệu của môn (CO, CLO, rating...) đều tăng version các đề cương của môn
+    (mark_syllabus_changed), nên bộ ba này đổi mỗi khi dữ liệu môn học đổi.
+    """
+    revision = db.session.execute(select(func.count(Syllabus.id), func.max(Syllabus.version), func.sum(Syllabus.version))
+                                  .where(Syllabus.subject_id == subject_id)).one()
+    return revision if revision[0] else None
+
+
+def get_syllabus_ids_by_template(template_id):
+    return db.session.execute(select(Syllabus.id).where(Syllabus.template_id == template_id)
+                              .order_by(Syllabus.id)).scalars().all()
+
+
+def get_syllabuses_for_structure(template_id=None, syllabus_ids=None):
+    """Lấy danh sách đề cương kèm dữ liệu cần cho to_structure_json() và đồng bộ cấu trúc.
+
+    SubSection được nạp đa hình (with_polymorphic) nên toàn bộ tiểu mục của các đề cương
+    chỉ tốn một câu truy vấn, cộng một câu cho các giá trị đã chọn.
+    """
+    subject = joinedload(Syllabus.subject)
+    course_objectives = subject.selectinload(Subject.course_objectives)
+    required_subjects = subject.selectinload(Subject.required_relation)
+
+    query = Syllabus.query.options(
+        subject.joinedload(Subject.credit),
+        joinedload(Syllabus.faculty),
+        joinedload(Syllabus.lecturer),
+        selectinload(Syllabus.main_sections)
+        .selectinload(MainSection.sub_sections.of_type(poly_sub_section))
+        .selectinload(poly_sub_section.SelectionSubSection.selected_values),
+        course_objectives.selectinload(CourseObjective.programme_learning_outcomes),
+        course_objectives.selectinload(CourseObjective.course_learning_outcomes)
+        .selectinload(CourseLearningOutcome.plo_association),
+        required_subjects.joinedload(RequirementSubject.require_subject),
+        required_subjects.joinedload(RequirementSubject.type_requirement),
+        selectinload(Syllabus.learning_materials).joinedload(LearningMaterial.type_material),
+    )
+    if template_id:
+        query = query.filter(Syllabus.template_id == template_id)
+    if syllabus_ids is not None:
+        query = query.filter(Syllabus.id.in_(list(syllabus_ids))).order_by(Syllabus.id)
+    return query.all()
+
+
+@cached_reference(Faculty)
 def get_all_faculties():
     """Lấy tất cả các khoa."""
     return Faculty.query.all()
 
 
+@cached_reference(Lecturer)
 def get_lecturers(lecturer_id=None):
     lecturers = Lecturer.query
     if lecturer_id:
@@ -147,13 +379,16 @@ def get_clos_by_subject_id(subject_id):
 # def get_subsection_by_id(type, id):
 #     return type.query.filter_by(id=id).first()
 
+@cached_reference(TypeRequirement)
 def get_all_type_subjects():
     return TypeRequirement.query.all()
 
 
+@cached_reference(TypeLearningMaterial)
 def get_all_learning_material_types():
     return TypeLearningMaterial.query.all()
 
+@cached_reference(TypeAssessment)
 def get_type_assessments():
     return TypeAssessment.query.all()
 
@@ -184,6 +419,7 @@ def get_available_require_subjects(current_subject_id):
     return available_subjects
 
 
+@cached_reference(ProgrammeLearningOutcome)
 def get_all_plos(plo_ids=None):
     plos = ProgrammeLearningOutcome.query
     if plo_ids:
@@ -235,8 +471,9 @@ def get_sorted_plos_for_syllabus(syllabus_id):
     return plos
 
 
+@cached_count(Syllabus)
 def count_syllabuses(lecturer_id=None):
-    """Đếm tổng số đề cương (có thể lọc theo giảng viên)."""
+    """Đếm tổng số đề cương (có thể lọc theo giảng viên), cache ngắn hạn trong từng worker (xem cached_count)."""
     query = Syllabus.query
     if lecturer_id:
         query = query.filter_by(lecturer_id=lecturer_id)
@@ -255,6 +492,7 @@ def get_latest_template():
     return TemplateSyllabus.query.order_by(TemplateSyllabus.id.desc()).first()
 
 
+@cached_reference(AttributeGroup, AttributeValue)
 def get_all_attribute_groups():
     return AttributeGroup.query.all()
 
@@ -300,6 +538,15 @@ def count_training_programs():
 def get_training_program_by_id(training_program_id):
     return TrainingProgram.query.get(training_program_id)
 
+def get_plo_coverage(training_program_id):
+    """Các dòng độ phủ PLO (kèm tên môn) của một chương trình, đọc từ bảng tính sẵn trong một truy vấn."""
+    return db.session.execute(
+        select(PloCoverage.plo_id, PloCoverage.subject_id, Subject.name, PloCoverage.max_rating,
+               PloCoverage.avg_rating, PloCoverage.rated_clos)
+        .join(Subject, Subject.id == PloCoverage.subject_id)
+        .where(PloCoverage.training_program_id == training_program_id)
+        .order_by(PloCoverage.plo_id, PloCoverage.max_rating.desc(), PloCoverage.subject_id)).all()
+
 def create_training_program(name, academic_year, major_id, old_program_id):
     try:
         old_program = TrainingProgram.query.get(old_program_id)
@@ -332,36 +579,47 @@ def delete_course_objective_by_id(co_id):
     return False
 
 
-def update_text_sub_section(content, subsection=None):
-    if content:
-        subsection.content = content
-        db.session.commit()
-        return True
-    return False
+def update_if_changed(model, keys, values):
+    """Ghi `values` vào bản ghi có khóa `keys` bằng đúng một câu UPDATE, chỉ khi ít nhất một cột thực sự đổi.
 
+    Trả về số dòng đã thay đổi; 0 nghĩa là giá trị vẫn như cũ hoặc không có bản ghi (không ghi gì cả).
+    """
+    stmt = update(model).where(*(getattr(model, k) == v for k, v in keys.items())) \
+        .where(or_(*(getattr(model, c).is_distinct_from(v) for c, v in values.items()))) \
+        .values(**values).execution_options(synchronize_session=False)
+    return db.session.execute(stmt).rowcount
 
-def update_co(content, co):
-    if content:
-        co.content = content
-        db.session.commit()
-        return True
-    return False
 
+def _patch(model, keys, values, **changed_scope):
+    """UPDATE có điều kiện + tăng version đề cương chỉ khi có dòng đổi; None nếu bản ghi không tồn tại.
 
-def update_clo(content, clo):
-    if content:
-        clo.content = content
+    Đường thường (có thay đổi) chỉ một câu UPDATE rồi COMMIT. Không dòng nào đổi thì mới kiểm tra bản ghi
+    còn tồn tại để phân biệt "không có thay đổi" với "không tìm thấy"; cả hai đều không COMMIT, giao dịch
+    rỗng được đóng khi phiên kết thúc cuối request.
+    """
+    affected = update_if_changed(model, keys, values)
+    if affected:
+        mark_syllabus_changed(**changed_scope)
         db.session.commit()
-        return True
-    return False
+    elif db.session.scalar(select(literal(1)).where(*(getattr(model, k) == v for k, v in keys.items()))) is None:
+        return None
+    return affected
 
 
-def update_learning_material(name, material):
-    if name:
-        material.name = name
-        db.session.commit()
-        return True
-    return False
+def update_text_sub_section(section_id, content):
+    return _patch(TextSubSection, {'id': section_id}, {'content': content}, sub_section_id=section_id)
+
+
+def update_co(co_id, content):
+    return _patch(CourseObjective, {'id': co_id}, {'content': content}, co_id=co_id)
+
+
+def update_clo(clo_id, content):
+    return _patch(CourseLearningOutcome, {'id': clo_id}, {'content': content}, clo_id=clo_id)
+
+
+def update_learning_material(material_id, name):
+    return _patch(LearningMaterial, {'id': material_id}, {'name': name}, material_id=material_id)
 
 
 def add_learning_material(name, type_id, syllabus):
@@ -422,18 +680,9 @@ def del_attribute(subsection_id, attribute_id):
 
 
 def update_credit(credit_id, theory, practice, self_study):
-    try:
-        credit = Credit.query.get(credit_id)
-        if not credit:
-            return False
-        credit.numberTheory = theory
-        credit.numberPractice = practice
-        credit.hourSelfStudy = self_study
-        db.session.commit()
-        return True
-    except Exception as e:
-        db.session.rollback()
-        return False
+    return _patch(Credit, {'id': credit_id},
+                  {'numberTheory': theory, 'numberPractice': practice, 'hourSelfStudy': self_study},
+                  credit_id=credit_id)
 
 
 def add_requirement_subject(syllabus, subject_id, type_id):
@@ -475,23 +724,12 @@ def delete_requirement_subject(syllabus, subject_id):
 def add_plo_for_co(co, plo):
     try:
         co.programme_learning_outcomes.append(plo)
-        clos = co.course_learning_outcomes
-        for clo in clos:
-            existing_rating = CloPloAssociation.query.filter_by(
-                clo_id=clo.id,
-                plo_id=plo.id
-            ).first()
-            if existing_rating:
-                return False
-            relation = CloPloAssociation(
-                clo_id=clo.id,
-                plo_id=plo.id,
-                rating=0
-            )
-            db.session.add(relation)
+        db.session.flush()
+        ensure_clo_plo_associations(co_ids=[co.id], plo_ids=[plo.id])
         db.session.commit()
         return True
     except Exception as e:
+        db.session.rollback()
         print(e)
         return False
 
@@ -515,23 +753,12 @@ def get_plos(plo_ids):
 def add_clo_for_co(co, clo):
     try:
         co.course_learning_outcomes.append(clo)
-        plos = co.programme_learning_outcomes
-        for plo in plos:
-            existing_rating = CloPloAssociation.query.filter_by(
-                clo_id=clo.id,
-                plo_id=plo.id
-            ).first()
-            if existing_rating:
-                continue
-            relation = CloPloAssociation(
-                clo_id=clo.id,
-                plo_id=plo.id,
-                rating=0
-            )
-            db.session.add(relation)
+        db.session.flush()
+        ensure_clo_plo_associations(clo_ids=[clo.id])
         db.session.commit()
         return True
     except Exception as e:
+        db.session.rollback()
         print(e)
         return False
 
@@ -547,22 +774,161 @@ def delete_clo_for_co(co, clo):
 
 
 def update_rating(clo_id, plo_id, rating):
-    try:
-        relation = CloPloAssociation.query.filter_by(
-            clo_id=clo_id,
-            plo_id=plo_id,
-        ).first()
-        if relation:
-            relation.rating = rating
-            db.session.commit()
-            return True
-        return False
-    except Exception as e:
-        db.session.rollback()
-        print(e)
-        return False
+    return _patch(CloPloAssociation, {'clo_id': clo_id, 'plo_id': plo_id}, {'rating': rating}, clo_id=clo_id)
+
+
+def ensure_clo_plo_associations(co_ids=None, clo_ids=None, plo_ids=None, subject_ids=None):
+    """Tạo ô rating (rating=0) cho mọi cặp CLO x PLO còn thiếu trong phạm vi, bằng một câu INSERT ... SELECT.
+
+    Cặp hợp lệ là CLO với PLO đã gắn vào mục tiêu chứa CLO đó. Gọi lại nhiều lần hay chạy song song đều an toàn:
+    câu SELECT bỏ các ô đã có và ô bị request khác chèn trước bị bỏ qua thay vì lỗi trùng khóa.
+    Trả về số ô được tạo.
+    """
+    plo_id = CourseObjectiveProgrammeLearningOutcome.programme_learning_outcome_id
+    pairs = select(CourseLearningOutcome.id, plo_id, literal(0)) \
+        .join(CourseObjectiveProgrammeLearningOutcome,
+              CourseObjectiveProgrammeLearningOutcome.course_objective_id == CourseLearningOutcome.course_objective_id) \
+        .where(~exists().where(CloPloAssociation.clo_id == CourseLearningOutcome.id,
+                               CloPloAssociation.plo_id == plo_id))
+    if co_ids is not None:
+        pairs = pairs.where(CourseLearningOutcome.course_objective_id.in_(list(co_ids)))
+    if clo_ids is not None:
+        pairs = pairs.where(CourseLearningOutcome.id.in_(list(clo_ids)))
+    if plo_ids is not None:
+        pairs = pairs.where(plo_id.in_(list(plo_ids)))
+    if subject_ids is not None:
+        pairs = pairs.where(CourseLearningOutcome.course_objective_id.in_(
+            select(CourseObjective.id).where(CourseObjective.subject_id.in_(list(subject_ids)))))
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = insert(CloPloAssociation).prefix_with('IGNORE')
+    elif dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite if dialect == 'sqlite' else postgresql).insert(CloPloAssociation).on_conflict_do_nothing()
+    else:
+        stmt = insert(CloPloAssociation)
+    return db.session.execute(stmt.from_select(['clo_id', 'plo_id', 'rating'], pairs)).rowcount
+
+
+def get_clo_plo_matrix(subject_id):
+    """Lưới CLO x PLO của môn học trong một truy vấn: mọi ô (co_id, clo_id, plo_id, rating) hợp lệ.
+
+    Ô hợp lệ là cặp CLO với PLO đã gắn vào mục tiêu chứa CLO đó; rating None nếu ô chưa có bản ghi,
+    plo_id None nếu mục tiêu chưa gắn PLO nào.
+    """
+    return db.session.execute(
+        select(CourseObjective.id, CourseLearningOutcome.id,
+               CourseObjectiveProgrammeLearningOutcome.programme_learning_outcome_id, CloPloAssociation.rating)
+        .select_from(CourseObjective)
+        .join(CourseLearningOutcome, CourseLearningOutcome.course_objective_id == CourseObjective.id)
+        .outerjoin(CourseObjectiveProgrammeLearningOutcome,
+                   CourseObjectiveProgrammeLearningOutcome.course_objective_id == CourseObjective.id)
+        .outerjoin(CloPloAssociation,
+                   and_(CloPloAssociation.clo_id == CourseLearningOutcome.id,
+                        CloPloAssociation.plo_id == CourseObjectiveProgrammeLearningOutcome.programme_learning_outcome_id))
+        .where(CourseObjective.subject_id == subject_id)
+        .order_by(CourseObjective.id, CourseLearningOutcome.id,
+                  CourseObjectiveProgrammeLearningOutcome.programme_learning_outcome_id)).all()
+
+
+def upsert(model, rows, update_columns):
+    """INSERT nhiều dòng trong một câu, dòng trùng khóa chính thì cập nhật `update_columns`.
+
+    MySQL dùng ON DUPLICATE KEY UPDATE, SQLite/PostgreSQL dùng ON CONFLICT DO UPDATE; các CSDL khác
+    quay về session.merge từng dòng.
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(model).values(rows)
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    elif dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite if dialect == 'sqlite' else postgresql).insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=[c.name for c in model.__table__.primary_key],
+                                          set_={c: stmt.excluded[c] for c in update_columns})
+    else:
+        for row in rows:
+            db.session.merge(model(**row))
+        return
+    db.session.execute(stmt)
+
+
+def upsert_clo_plo_ratings(subject_id, ratings):
+    """Ghi các ô rating {(clo_id, plo_id): rating} của một môn học bằng một câu upsert, commit một lần."""
+    upsert(CloPloAssociation, [{'clo_id': clo_id, 'plo_id': plo_id, 'rating': rating}
+                               for (clo_id, plo_id), rating in ratings.items()], ['rating'])
+    mark_syllabus_changed(subject_id=subject_id)
+    db.session.commit()
 
 
+# =================================================================
+# PHIÊN BẢN ĐỀ CƯƠNG
+# =================================================================
+def mark_syllabus_changed(syllabus_id=None, subject_id=None, sub_section_id=None, co_id=None, clo_id=None,
+                          credit_id=None, material_id=None, assessment_id=None, syllabus_ids=None):
+    """Ghi nhận các đề cương bị ảnh hưởng bởi thao tác ghi hiện tại.
+
+    Version của các đề cương này được tăng một lần, trong cùng transaction, ngay trước khi commit.
+    Với thao tác xóa, truyền syllabus_id/subject_id vì bản ghi con đã mất lúc commit.
+    """
+    scopes = db.session.info.setdefault('syllabus_version_scopes', [])
+    if syllabus_id:
+        scopes.append(Syllabus.id == syllabus_id)
+    if syllabus_ids:
+        scopes.append(Syllabus.id.in_(list(syllabus_ids)))
+    if subject_id:
+        scopes.append(Syllabus.subject_id == subject_id)
+    if sub_section_id:
+        scopes.append(Syllabus.id.in_(
+            select(MainSection.syllabus_id)
+            .join(SubSection.__table__, SubSection.main_section_id == MainSection.id)
+            .where(SubSection.id == sub_section_id)))
+    if co_id:
+        scopes.append(Syllabus.subject_id.in_(
+            select(CourseObjective.subject_id).where(CourseObjective.id == co_id)))
+    if clo_id:
+        scopes.append(Syllabus.subject_id.in_(
+            select(CourseObjective.subject_id)
+            .join(CourseLearningOutcome, CourseLearningOutcome.course_objective_id == CourseObjective.id)
+            .where(CourseLearningOutcome.id == clo_id)))
+    if credit_id:
+        scopes.append(Syllabus.subject_id.in_(select(Subject.id).where(Subject.credit_id == credit_id)))
+    if material_id:
+        scopes.append(Syllabus.id.in_(
+            select(SyllabusLearningMaterial.syllabus_id)
+            .where(SyllabusLearningMaterial.learning_material_id == material_id)))
+    if assessment_id:
+        scopes.append(Syllabus.id.in_(select(Assessment.syllabus_id).where(Assessment.id == assessment_id)))
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_syllabus_versions(session):
+    scopes = session.info.pop('syllabus_version_scopes', None)
+    if scopes:
+        # Chạy ở mức Core: không đồng bộ đối tượng trong session và không làm mất cache số đếm đề cương
+        session.connection().execute(update(Syllabus.__table__).where(or_(*scopes))
+                                     .values(version=Syllabus.version + 1, updated_date=datetime.now()))
+        if routing.replica_enabled(db):
+            # Ghi nhớ version mới để các request đọc bản sao sau đó nhận ra bản sao còn trễ
+            session.info['bumped_versions'] = session.connection().execute(
+                select(Syllabus.id, Syllabus.version).where(or_(*scopes))).all()
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_bumped_versions(session):
+    versions = session.info.pop('bumped_versions', None)
+    if versions:
+        routing.remember_versions(versions)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_syllabus_versions(session, previous_transaction):
+    session.info.pop('syllabus_version_scopes', None)
+    session.info.pop('bumped_versions', None)
+
+
+@cached_reference(ScheduleGroup)
 def get_schedule_groups():
     return ScheduleGroup.query.all()
 
@@ -572,3 +938,16 @@ def get_teaching_sessions(syllabus_id):
 #     with app.app_context():
 #         u = User.query.get(2)
 #         print(u.lecturer.email)
+
+
+def get_upgrade_job(job_id):
+    return db.session.get(TemplateUpgradeJob, job_id)
+
+
+def get_active_upgrade_job(old_template_id, new_template_id):
+    return TemplateUpgradeJob.query.filter_by(lock_key=f"{old_template_id}-{new_template_id}").first()
+
+
+def get_unfinished_upgrade_jobs():
+    return TemplateUpgradeJob.query.filter(TemplateUpgradeJob.lock_key.isnot(None)) \
+        .order_by(TemplateUpgradeJob.id).all()
@@ -1,8 +1,9 @@
 from functools import wraps
 from flask_login import current_user
-from flask import abort, request, flash, jsonify, url_for, redirect
+from flask import abort, request, flash, jsonify, url_for, redirect, make_response
 
-from . import db
+from . import app, db, dao, routing
+from .cache import shared_generation
 from .models import UserRole
 import functools
 # =============PHÂN QUYỀN ADMIN================
@@ -17,3 +18,87 @@ def admin_required(f):
             abort(403)  # Trả về lỗi Forbidden (Cấm truy cập)
         return f(*args, **kwargs)
     return decorated_function
+
+
+# =============ĐỌC TỪ CSDL CHÍNH================
+def read_primary(f):
+    """
+    Decorator cho các route GET được gọi ngay sau một lần ghi (đọc lại lưới vừa lưu, theo dõi job vừa tạo)
+    mà không có version để phát hiện bản sao trễ: luôn đọc từ CSDL chính.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        routing.use_primary(db.session)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+# =============ETAG / CONDITIONAL GET CHO ĐỀ CƯƠNG================
+def conditional_syllabus(f):
+    """
+    Decorator cho các route GET nhận `syllabus_id`: gắn ETag/Last-Modified theo version đề cương
+    và trả 304 khi trình duyệt đã có bản mới nhất, chỉ tốn một truy vấn lấy version.
+    """
+    @wraps(f)
+    def decorated_function(syllabus_id, *args, **kwargs):
+        revision = dao.get_syllabus_revision(syllabus_id)
+        if db.session.info.get('use_replica') and (not revision or routing.is_stale(syllabus_id, revision.version)):
+            # Bản sao chưa nhận đề cương mới tạo / bản sửa của chính người dùng: cả request đọc CSDL chính
+            routing.use_primary(db.session)
+            revision = dao.get_syllabus_revision(syllabus_id)
+        if not revision:
+            abort(404)
+        # Trang có thông tin người dùng và danh mục dùng chung nên đưa cả hai vào ETag; thế hệ danh mục lấy từ
+        # CSDL nên mọi worker cho cùng một ETag và sửa danh mục ở worker nào cũng làm ETag đổi
+        user_id = current_user.get_id() if current_user.is_authenticated else 'anonymous'
+        etag = f"{syllabus_id}-{revision.version}-{user_id}-{shared_generation()}"
+        last_modified = revision.updated_date or revision.created_date
+
+        probe = app.response_class()
+        probe.set_etag(etag, weak=True)
+        probe.last_modified = last_modified
+        probe.headers['Cache-Control'] = 'private, no-cache'
+        probe.make_conditional(request)
+        if probe.status_code == 304:
+            return probe
+
+        response = make_response(f(syllabus_id, *args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+
+def conditional_json(state):
+    """
+    Decorator cho các route GET trả JSON. `state` nhận cùng tham số với route và trả về chuỗi trạng thái rẻ
+    (version đề cương, thế hệ danh mục...) đổi mỗi khi dữ liệu của phản hồi đổi; ETag dựng từ chuỗi này nên
+    304 được trả trước khi chạy route, không tốn truy vấn nào của route. `state` trả None (không xác định được)
+    thì chạy route như thường và ETag là băm nội dung, chỉ tiết kiệm băng thông.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            tag = state(*args, **kwargs)
+            etag = f"{f.__name__}-{tag}" if tag is not None else None
+            if etag is not None:
+                probe = app.response_class()
+                probe.set_etag(etag, weak=True)
+                probe.headers['Cache-Control'] = 'private, no-cache'
+                probe.make_conditional(request)
+                if probe.status_code == 304:
+                    return probe
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.is_json and response.get_json().get('status', 200) == 200:
+                if etag is not None:
+                    response.set_etag(etag, weak=True)
+                else:
+                    response.add_etag()
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.make_conditional(request)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from manage_syllabus_app import app, db, dao, services
+from manage_syllabus_app.models import TemplateUpgradeJob, JobStatus
+
+# Các job chạy trên luồng nền của chính tiến trình web, mỗi job dùng app context và session riêng
+executor = ThreadPoolExecutor(max_workers=app.config.get('JOB_WORKERS', 2), thread_name_prefix='syllabus-job')
+
+
+class _JobLost(Exception):
+    """Job đã bị tiến trình khác giành quyền chạy (heartbeat không còn khớp)."""
+
+
+def _now():
+    # Cột DATETIME của MySQL bỏ phần micro giây: làm tròn để phép so sánh compare-and-set khớp trên mọi CSDL
+    return datetime.now().replace(microsecond=0)
+
+
+def _is_stale(job):
+    stale_after = timedelta(seconds=app.config.get('JOB_STALE_SECONDS', 300))
+    return job.updated_date is None or job.updated_date < datetime.now() - stale_after
+
+
+def _claim(job):
+    """Giành quyền chạy lại một job đã chết (compare-and-set trên updated_date); trả về token hoặc None."""
+    token = _now()
+    claimed = db.session.execute(update(TemplateUpgradeJob)
+                                 .where(TemplateUpgradeJob.id == job.id,
+                                        TemplateUpgradeJob.updated_date == job.updated_date)
+                                 .values(status=JobStatus.PENDING, updated_date=token)).rowcount
+    db.session.commit()
+    return token if claimed == 1 else None
+
+
+def _heartbeat(job_id, token, **values):
+    """Ghi tiến độ kèm heartbeat và commit (cùng với dữ liệu đang chờ trong transaction); trả về token mới.
+
+    Chỉ ghi khi updated_date vẫn là token của lần ghi trước: nếu tiến trình khác đã coi job là chết và giành
+    lại thì transaction bị hủy và ném _JobLost, nên hai lần chạy không bao giờ cùng chèn đề cương.
+    """
+    now = _now()
+    owned = db.session.execute(update(TemplateUpgradeJob)
+                               .where(TemplateUpgradeJob.id == job_id, TemplateUpgradeJob.updated_date == token)
+                               .values(updated_date=now, **values)).rowcount
+    if owned != 1:
+        db.session.rollback()
+        raise _JobLost()
+    db.session.commit()
+    return now
+
+
+def start_template_upgrade(old_template_id, new_template_id, user_id):
+    """Tạo job nâng cấp và đưa vào hàng đợi nền.
+
+    Trả về (job, started). Nếu cặp mẫu đang có job chạy thì không tạo job mới mà trả về job đó
+    với started=False; job đã chết (quá JOB_STALE_SECONDS không cập nhật) được tiếp tục từ chỗ dừng.
+    """
+    job = dao.get_active_upgrade_job(old_template_id, new_template_id)
+    if job is not None:
+        token = _claim(job) if _is_stale(job) else None
+        if token is None:
+            return job, False
+    else:
+        token = _now()
+        job = TemplateUpgradeJob(old_template_id=old_template_id, new_template_id=new_template_id, user_id=user_id,
+                                 lock_key=f"{old_template_id}-{new_template_id}", updated_date=token)
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Một tiến trình khác vừa tạo job cho cùng cặp mẫu
+            db.session.rollback()
+            return dao.get_active_upgrade_job(old_template_id, new_template_id), False
+
+    executor.submit(_run_in_context, job.id, token)
+    return job, True
+
+
+def _run_in_context(job_id, token):
+    with app.app_context():
+        run_template_upgrade(job_id, token)
+
+
+def run_template_upgrade(job_id, token):
+    """Thực thi job theo từng lô SYNC_BATCH_SIZE đề cương: nạp -> merge -> chèn -> commit kèm heartbeat.
+
+    `token` là updated_date lúc job được tạo/giành quyền; job đã bị tiến trình khác giành lại (vd. khi chờ
+    quá lâu trong hàng đợi) thì dừng ngay. Đề cương đã được tạo ở lần chạy trước bị bỏ qua (theo tên),
+    nên chạy lại job sau khi tiến trình chết chỉ xử lý phần còn lại.
+    """
+    job = dao.get_upgrade_job(job_id)
+    if job is None:
+        app.logger.warning("Không tìm thấy job nâng cấp đề cương %s", job_id)
+        return None
+    try:
+        token = _heartbeat(job_id, token, status=JobStatus.RUNNING, error=None)
+        new_template = dao.get_template_by_id(job.new_template_id)
+        syllabus_ids = dao.get_syllabus_ids_by_template(job.old_template_id)
+        token = _heartbeat(job_id, token, total=len(syllabus_ids), processed=0)
+        now = datetime.now().strftime("%d/%m/%Y")
+        status = f"{job.user.name} đã tạo đề cương ngày {now}"
+
+        chunk_size = app.config['SYNC_BATCH_SIZE']
+        for start in range(0, len(syllabus_ids), chunk_size):
+            chunk_ids = syllabus_ids[start:start + chunk_size]
+            items = services.prepare_syllabus_upgrades(dao.get_syllabuses_for_structure(syllabus_ids=chunk_ids),
+                                                       new_template, status=status)
+            services.bulk_insert_syllabuses(items, chunk_size=chunk_size)
+            token = _heartbeat(job_id, token, processed=start + len(chunk_ids))
+
+        _heartbeat(job_id, token, status=JobStatus.DONE, lock_key=None)
+    except _JobLost:
+        app.logger.warning("Job nâng cấp đề cương %s đã được tiến trình khác tiếp quản", job_id)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception("Job nâng cấp đề cương %s thất bại", job_id)
+        try:
+            _heartbeat(job_id, token, status=JobStatus.FAILED, error=str(e), lock_key=None)
+        except _JobLost:
+            pass
+    return dao.get_upgrade_job(job_id)
+
+
+def resume_stale_jobs():
+    """Chạy lại (đồng bộ, trên luồng hiện tại) các job chưa kết thúc mà tiến trình xử lý đã chết."""
+    resumed = []
+    for job in dao.get_unfinished_upgrade_jobs():
+        token = _claim(job) if _is_stale(job) else None
+        if token is not None:
+            resumed.append(run_template_upgrade(job.id, token))
+    return resumed
@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from manage_syllabus_app import app
+from manage_syllabus_app.utils import percentile
+
+
+# =============================================================================
+# ĐẾM CÂU SQL THEO TỪNG REQUEST
+# =============================================================================
+class RequestSqlStats:
+    """Số câu SQL, tổng thời gian CSDL và câu chậm nhất của một request."""
+    __slots__ = ('count', 'total_ms', 'slowest_ms', 'slowest_statement')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+
+def current_sql_stats():
+    """Thống kê của request đang xử lý; None khi chạy ngoài request (CLI, job nền)."""
+    return g.get('sql_stats') if has_request_context() else None
+
+
+# Lắng nghe trên lớp Engine nên áp dụng cho mọi engine (chính, bản sao, CSDL đo thử)
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_started'].pop()) * 1000
+    stats = current_sql_stats()
+    if stats is not None:
+        stats.add(statement, elapsed_ms)
+    threshold = app.config.get('SLOW_QUERY_MS')
+    if threshold and elapsed_ms >= threshold and conn.get_execution_options().get('slow_query_log', True):
+        _log_slow_query(conn.engine, statement, parameters, executemany, elapsed_ms)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _drop_timer(exception_context):
+    # Câu lỗi không đi qua after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+# =============================================================================
+# TỔNG HỢP THEO ENDPOINT (cửa sổ trượt các request gần nhất)
+# =============================================================================
+class EndpointMetrics:
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._slowest = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, total_ms, db_ms, queries, slowest_ms=0.0, slowest_statement=None):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append((total_ms, db_ms, queries))
+            self._totals[endpoint] = self._totals.get(endpoint, 0) + 1
+            if slowest_statement and slowest_ms > self._slowest.get(endpoint, (0.0, None))[0]:
+                self._slowest[endpoint] = (slowest_ms, slowest_statement)
+
+    def snapshot(self):
+        """Danh sách thống kê từng endpoint, endpoint có p95 lớn nhất lên đầu."""
+        with self._lock:
+            data = {endpoint: list(samples) for endpoint, samples in self._samples.items()}
+            totals = dict(self._totals)
+            slowest = dict(self._slowest)
+        rows = []
+        for endpoint, samples in data.items():
+            durations = [s[0] for s in samples]
+            db_times = [s[1] for s in samples]
+            queries = [s[2] for s in samples]
+            rows.append({
+                'endpoint': endpoint,
+                'requests': totals[endpoint],
+                'window': len(samples),
+                'p50_ms': round(percentile(durations, 50), 2),
+                'p95_ms': round(percentile(durations, 95), 2),
+                'p99_ms': round(percentile(durations, 99), 2),
+                'db_p95_ms': round(percentile(db_times, 95), 2),
+                'avg_queries': round(sum(queries) / len(queries), 1),
+                'max_queries': max(queries),
+                'slowest_ms': round(slowest.get(endpoint, (0.0, None))[0], 2),
+                'slowest_statement': slowest.get(endpoint, (0.0, None))[1],
+            })
+        return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._slowest.clear()
+
+
+endpoint_metrics = EndpointMetrics(window=app.config.get('METRICS_WINDOW', 500))
+
+
+@app.before_request
+def _begin_request_metrics():
+    g.sql_stats = RequestSqlStats()
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _finish_request_metrics(response):
+    stats = g.get('sql_stats')
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - g.request_started) * 1000
+    response.headers.add('Server-Timing', f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+    response.headers.add('Server-Timing', f'db-slowest;dur={stats.slowest_ms:.2f}')
+    response.headers.add('Server-Timing', f'app;dur={total_ms:.2f}')
+    if request.endpoint and request.endpoint != 'static':
+        endpoint_metrics.record(request.endpoint, total_ms, stats.total_ms, stats.count,
+                                stats.slowest_ms, stats.slowest_statement)
+    return response
+
+
+# =============================================================================
+# NHẬT KÝ CÂU SQL CHẬM (kèm EXPLAIN, xem tại /admin/metrics/slow-queries)
+# =============================================================================
+# Một luồng duy nhất chạy EXPLAIN trên kết nối riêng để không làm chậm thêm request đang xử lý
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-explain')
+_slow_logger = None
+_slow_logger_lock = threading.Lock()
+
+
+def slow_query_log_path():
+    return app.config.get('SLOW_QUERY_LOG') or os.path.join(app.instance_path, 'slow_queries.log')
+
+
+def _get_slow_logger():
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            path = slow_query_log_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=app.config.get('SLOW_QUERY_LOG_BYTES', 5 * 1024 * 1024),
+                                          backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 3),
+                                          encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('manage_syllabus_app.slow_query')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _slow_logger = logger
+        return _slow_logger
+
+
+def _caller_function():
+    """Hàm trong ứng dụng đã phát ra câu SQL, ưu tiên hàm DAO (vd. 'dao.get_sorted_plos_for_syllabus')."""
+    package_dir = os.path.dirname(__file__)
+    fallback = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(package_dir) and filename != __file__:
+            name = f"{os.path.splitext(os.path.basename(filename))[0]}.{frame.f_code.co_name}"
+            if os.path.basename(filename) == 'dao.py':
+                return name
+            fallback = fallback or name
+        frame = frame.f_back
+    return fallback
+
+
+def _log_slow_query(engine, statement, parameters, executemany, elapsed_ms):
+    entry = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'duration_ms': round(elapsed_ms, 2),
+        'route': request.endpoint if has_request_context() else None,
+        'path': request.path if has_request_context() else None,
+        'function': _caller_function(),
+        'statement': statement,
+        'parameters': repr(parameters)[:1000],
+    }
+    # Chỉ EXPLAIN câu SELECT đơn lẻ: an toàn trên cả MySQL lẫn SQLite và không chạy lại câu ghi
+    explainable = not executemany and statement.lstrip().upper().startswith('SELECT')
+    _explain_executor.submit(_explain_and_write, engine, entry, parameters if explainable else None, explainable)
+
+
+def _explain_and_write(engine, entry, parameters, explainable):
+    if explainable:
+        prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            with engine.connect() as conn:
+                conn = conn.execution_options(slow_query_log=False)
+                result = conn.exec_driver_sql(prefix + entry['statement'], parameters)
+                entry['explain'] = [dict(row._mapping) for row in result]
+        except Exception as e:
+            entry['explain_error'] = str(e)
+    _get_slow_logger().info(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def read_slow_queries(limit=200, route=None, function=None):
+    """Đọc các mục mới nhất từ tệp nhật ký hiện tại và các tệp đã xoay vòng (.1, .2, ...)."""
+    path = slow_query_log_path()
+    entries = []
+    for index in range(app.config.get('SLOW_QUERY_LOG_BACKUPS', 3) + 1):
+        file_path = path if index == 0 else f"{path}.{index}"
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if (route and entry.get('route') != route) or (function and entry.get('function') != function):
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                return entries
+    return entries
@@ -2,10 +2,11 @@ import hashlib
 from datetime import datetime
 from flask_login import UserMixin
 from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, Boolean, DateTime, Table, UniqueConstraint, \
-    Enum, Float
-from sqlalchemy.orm import relationship, backref
+    Enum, Float, Index, DDL, event, inspect
+from sqlalchemy.orm import relationship, backref, Session
 import enum
 from manage_syllabus_app import db, app
+from manage_syllabus_app.utils import normalize_search_text
 
 
 # =============================================================================
@@ -80,6 +81,11 @@ class Syllabus(BaseModel):
     status = Column(String(100), nullable=True)
     created_date = Column(DateTime, default=datetime.now)
     structure_file = Column(String(100), default="syllabus_2025.json")
+    # Tăng sau mỗi lần ghi làm thay đổi nội dung hiển thị của đề cương
+    version = Column(Integer, default=1, nullable=False)
+    updated_date = Column(DateTime, default=datetime.now)
+    # Tên đề cương + mã/tên môn + tên giảng viên, viết thường và bỏ dấu (xem normalize_search_text)
+    search_text = Column(Text, nullable=True)
     # Khóa ngoại
     subject_id = Column(String(10), ForeignKey('subject.id', onupdate='CASCADE'), nullable=False)
     faculty_id = Column(Integer, ForeignKey('faculty.id'), nullable=False)
@@ -96,6 +102,7 @@ class Syllabus(BaseModel):
                                      cascade="all, delete-orphan", order_by="TeachingSession.session_no")
     start_date_edition = Column(DateTime, default=datetime.now)
     end_date_edition = Column(DateTime, default=datetime.now)
+    __table_args__ = (Index('ix_syllabus_search_text', 'search_text', mysql_prefix='FULLTEXT'),)
 
     def to_structure_json(self):
         return {
@@ -109,6 +116,21 @@ class Syllabus(BaseModel):
             'learning_materials': [lm.to_dict() for lm in self.learning_materials]
         }
 
+# Chỉ mục FTS5 cho SQLite (MySQL dùng FULLTEXT ở trên), đồng bộ với bảng syllabus bằng trigger
+SYLLABUS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS syllabus_fts "
+    "USING fts5(search_text, content='syllabus', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS syllabus_fts_ai AFTER INSERT ON syllabus BEGIN "
+    "INSERT INTO syllabus_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS syllabus_fts_ad AFTER DELETE ON syllabus BEGIN "
+    "INSERT INTO syllabus_fts(syllabus_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS syllabus_fts_au AFTER UPDATE OF search_text ON syllabus BEGIN "
+    "INSERT INTO syllabus_fts(syllabus_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO syllabus_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+]
+for statement in SYLLABUS_FTS_DDL:
+    event.listen(Syllabus.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
 # =============================================================================
 # CÁC MODEL BÀI ĐÁNH GIÁ...
 # =============================================================================
@@ -476,6 +498,19 @@ class CloPloAssociation(db.Model):
     rating = Column(Integer, nullable=False)
 
 
+# Độ phủ PLO của chương trình đào tạo (chương trình x PLO x môn học), tính sẵn từ các ô CLO-PLO có rating > 0
+# của những môn có đề cương thuộc chương trình; được cập nhật dần khi ghi (xem coverage.py)
+class PloCoverage(db.Model):
+    training_program_id = Column(Integer, ForeignKey('training_program.id', ondelete='CASCADE'), primary_key=True)
+    plo_id = Column(Integer, ForeignKey('programme_learning_outcome.id', ondelete='CASCADE'), primary_key=True)
+    subject_id = Column(String(10), ForeignKey('subject.id', ondelete='CASCADE', onupdate='CASCADE'),
+                        primary_key=True, index=True)
+    max_rating = Column(Integer, nullable=False)
+    avg_rating = Column(Float, nullable=False)
+    # Số CLO của môn có đánh giá cho PLO này
+    rated_clos = Column(Integer, nullable=False)
+
+
 # =============================================================================
 # CÁC MODEL KẾ HOẠCH GIẢNG DẠY...
 # =============================================================================
@@ -529,6 +564,104 @@ class User(BaseModel, UserMixin):
         return self.username
 
 
+# =============================================================================
+# JOB NỀN
+# =============================================================================
+
+class JobStatus(enum.Enum):
+    PENDING = 1
+    RUNNING = 2
+    DONE = 3
+    FAILED = 4
+
+
+class TemplateUpgradeJob(db.Model):
+    """Job nâng cấp toàn bộ đề cương của một mẫu sang mẫu mới, chạy nền và commit theo từng lô."""
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    old_template_id = Column(Integer, ForeignKey('template_syllabus.id'), nullable=False)
+    new_template_id = Column(Integer, ForeignKey('template_syllabus.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    processed = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    # "<mẫu cũ>-<mẫu mới>" khi job chưa kết thúc, NULL khi xong/lỗi: ràng buộc unique chặn hai job
+    # cùng cặp mẫu chạy đồng thời, kể cả khi được tạo từ các tiến trình khác nhau
+    lock_key = Column(String(50), unique=True, nullable=True)
+    created_date = Column(DateTime, default=datetime.now)
+    # Cập nhật sau mỗi lô (heartbeat); job RUNNING quá lâu không cập nhật được coi là đã chết
+    updated_date = Column(DateTime, default=datetime.now)
+    user = relationship('User', lazy=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'old_template_id': self.old_template_id,
+            'new_template_id': self.new_template_id,
+            'status': self.status.name,
+            'total': self.total,
+            'processed': self.processed,
+            'error': self.error,
+            'created_date': self.created_date.isoformat() if self.created_date else None,
+            'updated_date': self.updated_date.isoformat() if self.updated_date else None,
+        }
+
+
+# =============================================================================
+# CẬP NHẬT CỘT TÌM KIẾM
+# =============================================================================
+SYLLABUS_SEARCH_FIELDS = ('name', 'subject', 'subject_id', 'lecturer', 'lecturer_id')
+
+
+def _current_related(session, obj, relation, fk, model):
+    # Ưu tiên khóa ngoại nếu nó vừa bị gán trực tiếp (vd: s.lecturer_id = ...), ngược lại dùng quan hệ
+    related = getattr(obj, relation)
+    if related is None or inspect(obj).attrs[fk].history.has_changes():
+        fk_value = getattr(obj, fk)
+        return session.get(model, fk_value) if fk_value is not None else related
+    return related
+
+
+def build_syllabus_search_text(session, syllabus):
+    subject = _current_related(session, syllabus, 'subject', 'subject_id', Subject)
+    lecturer = _current_related(session, syllabus, 'lecturer', 'lecturer_id', Lecturer)
+    return normalize_search_text(syllabus.name,
+                                 subject.id if subject else None, subject.name if subject else None,
+                                 lecturer.name if lecturer else None)
+
+
+@event.listens_for(Session, 'before_flush')
+def _refresh_syllabus_search_text(session, flush_context, instances):
+    syllabuses = set()
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Syllabus):
+            state = inspect(obj)
+            if obj in session.new or any(state.attrs[key].history.has_changes() for key in SYLLABUS_SEARCH_FIELDS):
+                syllabuses.add(obj)
+        elif isinstance(obj, (Subject, Lecturer)) and inspect(obj).attrs.name.history.has_changes():
+            syllabuses.update(obj.syllabuses)
+    for syllabus in syllabuses:
+        if syllabus in session.deleted:
+            continue
+        search_text = build_syllabus_search_text(session, syllabus)
+        if syllabus.search_text != search_text:
+            syllabus.search_text = search_text
+
+
+# =============================================================================
+# THẾ HỆ CACHE DÙNG CHUNG GIỮA CÁC TIẾN TRÌNH
+# Mỗi commit sửa bảng danh mục tăng `value` của dòng tương ứng; các worker so sánh với giá trị đã thấy để
+# bỏ cache cục bộ, và dùng nó trong khóa cache HTML / ETag (xem cache.py).
+# =============================================================================
+class CacheGeneration(db.Model):
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+
+
+event.listen(CacheGeneration.__table__, 'after_create',
+             DDL("INSERT INTO cache_generation (name, value) VALUES ('reference', 0)"))
+
+
 if __name__ == "__main__":
     with app.app_context():
         t = TemplateSyllabus.query.first()
@@ -0,0 +1,104 @@
+import copy
+from dataclasses import dataclass, field
+
+
+# =============================================================================
+# MÔ HÌNH XEM TRƯỚC MẪU ĐỀ CƯƠNG
+# Các lớp dưới đây có cùng tên thuộc tính với model ORM mà template Jinja đọc tới, nhưng không qua mapper
+# nên dựng nhanh, nhẹ và có thể cache dùng chung giữa các request (bất biến).
+# =============================================================================
+@dataclass(frozen=True, slots=True)
+class PreviewCredit:
+    id: int = None
+    numberTheory: int = 1
+    numberPractice: int = 1
+    hourSelfStudy: int = 1
+
+    def getTotalCredit(self):
+        return self.numberTheory + self.numberPractice
+
+
+@dataclass(frozen=True, slots=True)
+class PreviewSubject:
+    id: str = None
+    name: str = "(Môn học mẫu)"
+    credit: PreviewCredit = field(default_factory=PreviewCredit)
+    course_objectives: tuple = ()
+    required_by_relation: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class PreviewLecturer:
+    name: str = "(Tên giảng viên)"
+    email: str = None
+    room: str = None
+
+
+@dataclass(frozen=True, slots=True)
+class PreviewSubSection:
+    id: int
+    name: str
+    code: str
+    position: int
+    type: str
+    content: str = ""
+    place_holder: str = None
+    display_mode: str = None
+    attribute_group_id: int = None
+    reference_code: str = None
+    data: dict = None
+    selected_values: tuple = ()
+
+    @property
+    def template_name(self):
+        # Giống TextSubSection.template_name / SubSection.template_name
+        if self.type == 'text':
+            return self.display_mode if self.display_mode else "input"
+        return self.type
+
+
+@dataclass(frozen=True, slots=True)
+class PreviewMainSection:
+    name: str
+    code: str
+    position: int
+    sub_sections: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class PreviewSyllabus:
+    id: int
+    name: str
+    subject: PreviewSubject = field(default_factory=PreviewSubject)
+    lecturer: PreviewLecturer = field(default_factory=PreviewLecturer)
+    faculty: object = None
+    main_sections: tuple = ()
+    learning_materials: tuple = ()
+
+
+def build_template_preview(template):
+    """Dựng đề cương xem trước từ TemplateSyllabus; tiểu mục mang id âm giả (-1, -2, ...) theo thứ tự."""
+    fake_id = 0
+    main_sections = []
+    for part_def in template.structure or []:
+        sub_sections = []
+        for sub_def in part_def.get('sub_sections', []):
+            sub_type = sub_def['type']
+            if sub_type not in ('text', 'selection', 'reference', 'table'):
+                continue
+            fake_id -= 1
+            sub_sections.append(PreviewSubSection(
+                id=fake_id,
+                name=sub_def['name'],
+                code=sub_def['code'],
+                position=sub_def['position'],
+                type=sub_type,
+                place_holder=sub_def.get('placeholder', 'place_holder') if sub_type == 'text' else None,
+                display_mode=sub_def['display_mode'] if sub_type == 'text' else None,
+                attribute_group_id=sub_def['attribute_group_id'] if sub_type == 'selection' else None,
+                reference_code=sub_def['reference_code'] if sub_type == 'reference' else None,
+                data=copy.deepcopy(sub_def['data']) if sub_type == 'table' else None,
+            ))
+        main_sections.append(PreviewMainSection(name=part_def['name'], code=part_def['code'],
+                                                position=part_def['position'], sub_sections=tuple(sub_sections)))
+    return PreviewSyllabus(id=template.id, name=template.name, main_sections=tuple(main_sections))
@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+
+from flask import has_request_context, request, session as http_session
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# =============================================================================
+# ĐỊNH TUYẾN ĐỌC SANG BẢN SAO (READ REPLICA)
+# Bật khi cấu hình SQLALCHEMY_BINDS có khóa REPLICA_BIND. Chỉ câu SELECT ngoài lúc flush của session
+# đang ở chế độ đọc bản sao mới đi sang bản sao; mọi câu ghi và mọi câu đọc sau lần ghi đầu tiên trong
+# cùng session (cùng request) đều dùng CSDL chính.
+# =============================================================================
+REPLICA_BIND = 'replica'
+# Số đề cương gần nhất lưu version tối thiểu trong cookie phiên của người dùng
+MAX_TRACKED_VERSIONS = 20
+
+
+class RoutingSession(FlaskSession):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get('use_replica') and not self.info.get('wrote')
+                and not self._flushing and clause is not None and getattr(clause, 'is_select', False)):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_app(app, db):
+    """Request GET/HEAD đọc từ bản sao (nếu có cấu hình); các method khác luôn dùng CSDL chính."""
+    @app.before_request
+    def _route_reads_to_replica():
+        if request.method in ('GET', 'HEAD') and replica_enabled(db):
+            use_replica(db.session)
+
+
+def replica_enabled(db):
+    return REPLICA_BIND in db.engines
+
+
+def use_replica(session):
+    session.info['use_replica'] = True
+
+
+def use_primary(session):
+    session.info['use_replica'] = False
+
+
+@contextmanager
+def primary_reads(session):
+    """Tạm thời đọc từ CSDL chính (vd. khi nạp dữ liệu vào cache dùng chung)."""
+    previous = session.info.get('use_replica')
+    session.info['use_replica'] = False
+    try:
+        yield
+    finally:
+        session.info['use_replica'] = previous
+
+
+# Một khi session đã ghi, các câu đọc tiếp theo phải thấy dữ liệu vừa ghi nên bám CSDL chính
+@event.listens_for(Session, 'after_flush')
+def _stick_after_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _stick_after_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+# =============================================================================
+# CHỊU ĐỘ TRỄ SAO CHÉP THEO VERSION ĐỀ CƯƠNG
+# Sau khi người dùng ghi, version mới của các đề cương bị ảnh hưởng được lưu vào phiên đăng nhập; trang
+# đề cương đọc từ bản sao mà thấy version thấp hơn thì chuyển cả request sang CSDL chính.
+# =============================================================================
+def remember_versions(versions):
+    if not has_request_context():
+        return
+    seen = dict(http_session.get('syllabus_min_versions', {}))
+    for syllabus_id, version in versions:
+        seen.pop(str(syllabus_id), None)
+        seen[str(syllabus_id)] = version
+    http_session['syllabus_min_versions'] = dict(list(seen.items())[-MAX_TRACKED_VERSIONS:])
+
+
+def is_stale(syllabus_id, version):
+    """True nếu bản sao trả về version cũ hơn version người dùng này đã ghi."""
+    if not has_request_context():
+        return False
+    return version < http_session.get('syllabus_min_versions', {}).get(str(syllabus_id), 0)
@@ -1,13 +1,21 @@
 # seed_database.py
 
 import json
+import random
+import time
 from pathlib import Path
 
-from manage_syllabus_app import app, db
+from sqlalchemy import func, insert, select
+
+from manage_syllabus_app import app, db, dao, services
 from manage_syllabus_app.models import AttributeGroup, AttributeValue, Syllabus, Faculty, Lecturer, Subject, Credit, \
     TypeRequirement, RequirementSubject, TypeLearningMaterial, LearningMaterial, MainSection, SubSection, \
     TextSubSection, SelectionSubSection, ReferenceSubSection, ProgrammeLearningOutcome, CourseLearningOutcome, \
-    CourseObjective, CloPloAssociation, TrainingProgram, Major, TemplateSyllabus
+    CourseObjective, CloPloAssociation, TrainingProgram, Major, TemplateSyllabus, \
+    CourseObjectiveProgrammeLearningOutcome, SyllabusLearningMaterial, TypeAssessment, Assessment, Method, \
+    MethodCourseLearningOutcome, ScheduleGroup, TeachingSession, TeachingSessionCourseLearningOutcome, \
+    TeachingSessionAssessment, TeachingSessionLearningMaterial
+from manage_syllabus_app.utils import normalize_search_text
 
 
 def seed_data():
@@ -260,6 +268,459 @@ def seed_data_3():
         print(f"❌ Đã xảy ra lỗi khi commit: {e}")
 
 
+# =============================================================================
+# GIEO DỮ LIỆU HÀNG LOẠT (cùng định dạng data.json với seed_data_3)
+# =============================================================================
+def _insert_with_ids(model, rows):
+    """Chèn executemany rồi trả về id theo đúng thứ tự các dòng.
+
+    Dựa vào id tự tăng liên tiếp của một lần chèn, nên chỉ dùng khi không có tiến trình khác ghi cùng bảng
+    (đúng với lệnh gieo dữ liệu).
+    """
+    if not rows:
+        return []
+    before = db.session.scalar(select(func.max(model.id))) or 0
+    db.session.execute(insert(model.__table__), rows)
+    ids = db.session.scalars(select(model.id).where(model.id > before).order_by(model.id)).all()
+    if len(ids) != len(rows):
+        raise RuntimeError(f"Bảng {model.__tablename__} bị ghi đồng thời trong lúc gieo dữ liệu")
+    return ids
+
+
+def _ids_by_name(model, names):
+    return dict(db.session.execute(select(model.name, model.id).where(model.name.in_(list(names)))).all())
+
+
+def _get_or_insert_by_name(model, rows_by_name, counts):
+    """Trả về {name: id}; các tên chưa có được chèn trong một câu executemany."""
+    ids = _ids_by_name(model, rows_by_name)
+    missing = [row for name, row in rows_by_name.items() if name not in ids]
+    if missing:
+        db.session.execute(insert(model.__table__), missing)
+        ids.update(_ids_by_name(model, [row['name'] for row in missing]))
+        counts[model.__tablename__] = counts.get(model.__tablename__, 0) + len(missing)
+    return ids
+
+
+def seed_data_3_bulk(json_path=None, chunk_size=200):
+    """Gieo dữ liệu đề cương từ tệp cùng định dạng data/data.json theo lô.
+
+    Các bảng danh mục (khoa, giảng viên, môn học, loại điều kiện, PLO, học liệu...) được nạp sẵn vào dict;
+    các dòng mới được dựng thành dict thuần và chèn bằng executemany theo thứ tự phụ thuộc khóa ngoại.
+    Đề cương đã có (trùng tên) được bỏ qua, nên chạy lại nhiều lần là an toàn.
+    """
+    json_path = json_path or Path(__file__).parent / 'data' / 'data.json'
+    with open(json_path, 'r', encoding='utf-8') as f:
+        items = json.load(f)['syllabuses']
+    with open(Path(__file__).parent / 'data/structures' / 'syllabus_2025.json', 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+
+    started = time.perf_counter()
+    counts = {}
+    existing_syllabuses = set(db.session.scalars(select(Syllabus.name).where(
+        Syllabus.name.in_([item['name'] for item in items]))))
+    items = [item for item in items if item['name'] not in existing_syllabuses]
+
+    # --- Mẫu đề cương, khoa, giảng viên ---
+    template_ids = _get_or_insert_by_name(TemplateSyllabus, {"Đề cương mẫu 2025": {
+        'name': "Đề cương mẫu 2025", 'structure': structure}}, counts)
+    template_id = template_ids["Đề cương mẫu 2025"]
+    faculty_ids = _get_or_insert_by_name(Faculty, {item['faculty']['name']: {'name': item['faculty']['name']}
+                                                   for item in items}, counts)
+    lecturer_ids = _get_or_insert_by_name(Lecturer, {
+        item['lecturer']['name']: {'name': item['lecturer']['name'],
+                                   'faculty_id': faculty_ids[item['faculty']['name']]} for item in items}, counts)
+
+    # --- Môn học (kèm tín chỉ) và môn điều kiện ---
+    subjects = {}
+    for item in items:
+        credit = item['subject']['credit']
+        subjects.setdefault(item['subject']['id'], (item['subject']['name'], {
+            'numberTheory': credit['number_theory'], 'numberPractice': credit['number_practice'],
+            'hourSelfStudy': credit['hour_self_study']}))
+        for req in item['subject'].get('required_subjects', []):
+            subjects.setdefault(req['require_subject_id'], (req['require_subject_name'], {
+                'numberTheory': 0, 'numberPractice': 0, 'hourSelfStudy': 0}))
+    existing_subjects = set(db.session.scalars(select(Subject.id).where(Subject.id.in_(list(subjects)))))
+    new_subjects = [(subject_id, name, credit) for subject_id, (name, credit) in subjects.items()
+                    if subject_id not in existing_subjects]
+    credit_ids = _insert_with_ids(Credit, [credit for _, _, credit in new_subjects])
+    if new_subjects:
+        db.session.execute(insert(Subject.__table__), [
+            {'id': subject_id, 'name': name, 'credit_id': credit_id}
+            for (subject_id, name, _), credit_id in zip(new_subjects, credit_ids)])
+    counts['credit'] = len(credit_ids)
+    counts['subject'] = len(new_subjects)
+
+    type_requirement_ids = _get_or_insert_by_name(TypeRequirement, {
+        req['type_requirement']: {'name': req['type_requirement']}
+        for item in items for req in item['subject'].get('required_subjects', [])}, counts)
+    existing_requirements = set(db.session.execute(
+        select(RequirementSubject.subject_id, RequirementSubject.require_subject_id)
+        .where(RequirementSubject.subject_id.in_(list(subjects)))).all())
+    requirement_rows = {}
+    for item in items:
+        for req in item['subject'].get('required_subjects', []):
+            key = (item['subject']['id'], req['require_subject_id'])
+            if key not in existing_requirements:
+                requirement_rows.setdefault(key, {'subject_id': key[0], 'require_subject_id': key[1],
+                                                  'type_requirement_id': type_requirement_ids[req['type_requirement']]})
+    if requirement_rows:
+        db.session.execute(insert(RequirementSubject.__table__), list(requirement_rows.values()))
+    counts['requirement_subject'] = len(requirement_rows)
+
+    # --- Đề cương + phần/tiểu mục (services.bulk_insert_syllabuses) ---
+    syllabus_items = []
+    for item in items:
+        for main in item['main_sections']:
+            for sub in main['sub_sections']:
+                sub.setdefault('placeholder', sub.get('place_holder'))
+        syllabus_items.append({
+            'syllabus': {
+                'name': item['name'],
+                'subject_id': item['subject']['id'],
+                'faculty_id': faculty_ids[item['faculty']['name']],
+                'lecturer_id': lecturer_ids[item['lecturer']['name']],
+                'template_id': template_id,
+                'search_text': normalize_search_text(item['name'], item['subject']['id'], item['subject']['name'],
+                                                     item['lecturer']['name']),
+            },
+            'structure': item['main_sections'],
+        })
+    services.bulk_insert_syllabuses(syllabus_items, chunk_size=chunk_size)
+    syllabus_ids = dict(db.session.execute(select(Syllabus.name, Syllabus.id).where(
+        Syllabus.name.in_([item['name'] for item in items]))).all())
+    counts['syllabus'] = len(syllabus_items)
+    counts['main_section'] = sum(len(item['structure']) for item in syllabus_items)
+    counts['sub_section'] = sum(len(main['sub_sections']) for item in syllabus_items for main in item['structure'])
+
+    # --- Mục tiêu (CO), chuẩn đầu ra (CLO) và liên kết PLO ---
+    plo_ids = set(db.session.scalars(select(ProgrammeLearningOutcome.id)))
+    co_defs = [(item['subject']['id'], co) for item in items for co in item.get('course_objectives', [])]
+    co_ids = _insert_with_ids(CourseObjective, [{'content': co['description'], 'subject_id': subject_id}
+                                                for subject_id, co in co_defs])
+    co_plo_rows, clo_defs = {}, []
+    for co_id, (_, co) in zip(co_ids, co_defs):
+        for plo_id in co['plos']:
+            if plo_id in plo_ids:
+                co_plo_rows[(co_id, plo_id)] = {'course_objective_id': co_id, 'programme_learning_outcome_id': plo_id}
+        clo_defs.extend((co_id, clo) for clo in co['clos'])
+    clo_ids = _insert_with_ids(CourseLearningOutcome, [{'content': clo['description'], 'course_objective_id': co_id}
+                                                       for co_id, clo in clo_defs])
+    rating_rows = {}
+    for clo_id, (_, clo) in zip(clo_ids, clo_defs):
+        for rating in clo.get('ratings', []):
+            if rating['plo_id'] in plo_ids:
+                rating_rows[(clo_id, rating['plo_id'])] = {'clo_id': clo_id, 'plo_id': rating['plo_id'],
+                                                           'rating': rating['level']}
+    if co_plo_rows:
+        db.session.execute(insert(CourseObjectiveProgrammeLearningOutcome.__table__), list(co_plo_rows.values()))
+    if rating_rows:
+        db.session.execute(insert(CloPloAssociation.__table__), list(rating_rows.values()))
+    # Ô CLO x PLO chưa có trong tệp được tạo với rating 0, giống khi thêm qua giao diện
+    missing = sum(dao.ensure_clo_plo_associations(co_ids=chunk) for chunk in _chunked(co_ids, chunk_size))
+    counts.update({'course_objective': len(co_ids), 'course_learning_outcome': len(clo_ids),
+                   'course_objective_programme_learning_outcome': len(co_plo_rows),
+                   'clo_plo_association': len(rating_rows) + missing})
+
+    # --- Học liệu ---
+    materials = [(item['name'], lm) for item in items for lm in item.get('learning_materials', [])]
+    type_ids = _get_or_insert_by_name(TypeLearningMaterial, {
+        lm['type_material']['name']: {'name': lm['type_material']['name']} for _, lm in materials}, counts)
+    material_ids = _get_or_insert_by_name(LearningMaterial, {
+        lm['name']: {'name': lm['name'], 'type_material_id': type_ids[lm['type_material']['name']]}
+        for _, lm in materials}, counts)
+    links = {(syllabus_ids[name], material_ids[lm['name']]) for name, lm in materials}
+    if links:
+        db.session.execute(insert(SyllabusLearningMaterial.__table__), [
+            {'syllabus_id': syllabus_id, 'learning_material_id': material_id}
+            for syllabus_id, material_id in sorted(links)])
+    counts['syllabus_learning_material'] = len(links)
+
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table_name, count in counts.items():
+        if count:
+            print(f"  -> {table_name}: {count} dòng")
+    print(f"✅ Gieo {total} dòng trong {elapsed:.2f}s ({total / elapsed:.0f} dòng/s)"
+          + (f", bỏ qua {len(existing_syllabuses)} đề cương đã có." if existing_syllabuses else "."))
+    return counts
+
+
+# =============================================================================
+# SINH DỮ LIỆU GIẢ LẬP CHO KIỂM THỬ TẢI (flask gen-synthetic)
+# =============================================================================
+def _chunked(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert_many_with_ids(model, rows, chunk_size):
+    ids = []
+    for chunk in _chunked(rows, chunk_size):
+        ids.extend(_insert_with_ids(model, chunk))
+    return ids
+
+
+def _insert_many(model, rows, chunk_size):
+    for chunk in _chunked(rows, chunk_size):
+        db.session.execute(insert(model.__table__), chunk)
+    return len(rows)
+
+
+SYNTHETIC_MAX_SEED = 999
+SYNTHETIC_MAX_SUBJECTS = 999999
+
+
+def generate_synthetic_data(seed=1, faculties=5, lecturers_per_faculty=10, subjects=200, templates=1,
+                            syllabuses_per_template=500, objectives_per_subject=3, clos_per_objective=3, plos=12,
+                            materials=500, assessments_per_syllabus=3, methods_per_assessment=2,
+                            sessions_per_syllabus=15, chunk_size=500, log=print):
+    """Sinh một bộ dữ liệu đầy đủ quan hệ, tất định theo `seed`, để đo khả năng mở rộng.
+
+    Gồm khoa, giảng viên, môn học có chuỗi tiên quyết, CO/CLO và ma trận CO-PLO, CLO-PLO, học liệu,
+    `templates` mẫu (theo syllabus_2025.json) mỗi mẫu `syllabuses_per_template` đề cương, kèm đánh giá,
+    phương pháp, buổi giảng dạy và các bảng liên kết. Mọi tên đều gắn nhãn [SYN<seed>] nên nhiều seed
+    (0 <= seed <= 999) có thể cùng tồn tại; chạy lại cùng seed sẽ bị từ chối. Chỉ dùng SQL chung nên chạy được trên SQLite
+    lẫn MySQL. Cần có nhóm thuộc tính (seed_data) để sinh tiểu mục lựa chọn.
+    """
+    # Mã môn học Y<seed 3 số><stt 6 số> vừa đúng String(10): seed ngoài khoảng sẽ trùng mã với seed khác
+    if not 0 <= seed <= SYNTHETIC_MAX_SEED or subjects > SYNTHETIC_MAX_SUBJECTS:
+        log(f"❌ Cần 0 <= seed <= {SYNTHETIC_MAX_SEED} và subjects <= {SYNTHETIC_MAX_SUBJECTS}.")
+        return None
+    rng = random.Random(seed)
+    tag = f"[SYN{seed}]"
+    if db.session.scalar(select(Faculty.id).where(Faculty.name == f"Khoa {tag} 1")):
+        log(f"❌ Dữ liệu giả lập với seed={seed} đã tồn tại, hãy chọn seed khác.")
+        return None
+
+    started = time.perf_counter()
+    counts = {}
+    with open(Path(__file__).parent / 'data/structures' / 'syllabus_2025.json', 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+
+    # --- PLO (chỉ sinh khi bảng còn trống) và các bảng danh mục dùng chung ---
+    plo_ids = list(db.session.scalars(select(ProgrammeLearningOutcome.id).order_by(ProgrammeLearningOutcome.id)))
+    if not plo_ids:
+        plo_ids = _insert_many_with_ids(ProgrammeLearningOutcome, [
+            {'description': f"PLO{i} {tag}: chuẩn đầu ra chương trình số {i}"} for i in range(1, plos + 1)], chunk_size)
+        counts['programme_learning_outcome'] = len(plo_ids)
+    type_requirement_ids = list(_get_or_insert_by_name(TypeRequirement, {
+        name: {'name': name} for name in ("Tiên quyết", "Học trước", "Song hành")}, counts).values())
+    type_material_ids = list(_get_or_insert_by_name(TypeLearningMaterial, {
+        name: {'name': name} for name in ("Giáo trình chính", "Tài liệu tham khảo")}, counts).values())
+    type_assessment_ids = list(_get_or_insert_by_name(TypeAssessment, {
+        name: {'name': name} for name in ("Đánh giá quá trình", "Đánh giá giữa kỳ", "Đánh giá cuối kỳ")},
+        counts).values())
+    schedule_group_ids = list(_get_or_insert_by_name(ScheduleGroup, {
+        name: {'name': name} for name in ("Lý thuyết", "Thực hành")}, counts).values())
+    values_by_group = {}
+    for group_id, value_id in db.session.execute(
+            select(AttributeValue.attribute_group_id, AttributeValue.id).order_by(AttributeValue.id)):
+        values_by_group.setdefault(group_id, []).append(value_id)
+
+    # --- Khoa, giảng viên ---
+    faculty_ids = _insert_many_with_ids(Faculty, [{'name': f"Khoa {tag} {i}"} for i in range(1, faculties + 1)],
+                                        chunk_size)
+    lecturer_rows = [{'name': f"Giảng viên {tag} {f_idx + 1}.{i}", 'faculty_id': faculty_id,
+                      'email': f"gv{seed}.{f_idx + 1}.{i}@example.edu.vn"}
+                     for f_idx, faculty_id in enumerate(faculty_ids) for i in range(1, lecturers_per_faculty + 1)]
+    lecturer_ids = _insert_many_with_ids(Lecturer, lecturer_rows, chunk_size)
+    lecturers_by_faculty = {}
+    for row, lecturer_id in zip(lecturer_rows, lecturer_ids):
+        lecturers_by_faculty.setdefault(row['faculty_id'], []).append((lecturer_id, row['name']))
+    counts.update({'faculty': len(faculty_ids), 'lecturer': len(lecturer_ids)})
+
+    # --- Môn học: mỗi khoa một chuỗi, môn sau yêu cầu môn trước (đôi khi thêm môn cách hai bậc) ---
+    credit_rows = []
+    for _ in range(subjects):
+        theory = rng.randint(1, 3)
+        credit_rows.append({'numberTheory': theory, 'numberPractice': rng.randint(0, 2),
+                            'hourSelfStudy': theory * 30})
+    credit_ids = _insert_many_with_ids(Credit, credit_rows, chunk_size)
+    subject_rows = [{'id': f"Y{seed:03d}{i:06d}", 'name': f"Môn học {tag} {i}", 'credit_id': credit_id,
+                     'faculty_id': faculty_ids[i % len(faculty_ids)]}
+                    for i, credit_id in enumerate(credit_ids)]
+    _insert_many(Subject, [{k: row[k] for k in ('id', 'name', 'credit_id')} for row in subject_rows], chunk_size)
+    requirement_rows, chain_tail = [], {}
+    for row in subject_rows:
+        previous = chain_tail.get(row['faculty_id'], [])
+        if previous:
+            requirement_rows.append({'subject_id': row['id'], 'require_subject_id': previous[-1],
+                                     'type_requirement_id': type_requirement_ids[0]})
+            if len(previous) > 1 and rng.random() < 0.3:
+                requirement_rows.append({'subject_id': row['id'], 'require_subject_id': previous[-2],
+                                         'type_requirement_id': rng.choice(type_requirement_ids[1:])})
+        chain_tail[row['faculty_id']] = (previous + [row['id']])[-2:]
+    _insert_many(RequirementSubject, requirement_rows, chunk_size)
+    counts.update({'credit': len(credit_ids), 'subject': len(subject_rows),
+                   'requirement_subject': len(requirement_rows)})
+
+    # --- CO/CLO và ma trận CO-PLO, CLO-PLO ---
+    co_rows = [{'content': f"Mục tiêu {j} của {row['name']}", 'subject_id': row['id']}
+               for row in subject_rows for j in range(1, objectives_per_subject + 1)]
+    co_ids = _insert_many_with_ids(CourseObjective, co_rows, chunk_size)
+    co_plo_rows, clo_rows = [], []
+    for co_id in co_ids:
+        co_plo_rows.extend({'course_objective_id': co_id, 'programme_learning_outcome_id': plo_id}
+                           for plo_id in sorted(rng.sample(plo_ids, min(len(plo_ids), rng.randint(1, 3)))))
+        clo_rows.extend({'content': f"CLO {j} thuộc mục tiêu #{co_id}", 'course_objective_id': co_id}
+                        for j in range(1, clos_per_objective + 1))
+    clo_ids = _insert_many_with_ids(CourseLearningOutcome, clo_rows, chunk_size)
+    rating_rows = [{'clo_id': clo_id, 'plo_id': plo_id, 'rating': rng.randint(1, 5)}
+                   for clo_id in clo_ids
+                   for plo_id in sorted(rng.sample(plo_ids, min(len(plo_ids), rng.randint(1, 3))))]
+    _insert_many(CourseObjectiveProgrammeLearningOutcome, co_plo_rows, chunk_size)
+    _insert_many(CloPloAssociation, rating_rows, chunk_size)
+    clos_by_subject = {}
+    for co_row, co_id in zip(co_rows, co_ids):
+        clos_by_subject.setdefault(co_row['subject_id'], []).append(co_id)
+    co_to_clos = {}
+    for clo_row, clo_id in zip(clo_rows, clo_ids):
+        co_to_clos.setdefault(clo_row['course_objective_id'], []).append(clo_id)
+    clos_by_subject = {subject_id: [clo for co_id in co_list for clo in co_to_clos.get(co_id, [])]
+                       for subject_id, co_list in clos_by_subject.items()}
+    counts.update({'course_objective': len(co_ids), 'course_learning_outcome': len(clo_ids),
+                   'course_objective_programme_learning_outcome': len(co_plo_rows),
+                   'clo_plo_association': len(rating_rows)})
+
+    # --- Học liệu ---
+    material_ids = _insert_many_with_ids(LearningMaterial, [
+        {'name': f"Học liệu {tag} {i}", 'type_material_id': type_material_ids[i % len(type_material_ids)]}
+        for i in range(1, materials + 1)], chunk_size)
+    counts['learning_material'] = len(material_ids)
+    db.session.commit()
+
+    # --- Mẫu và đề cương (theo lô, mỗi lô commit một lần) ---
+    template_ids = _insert_many_with_ids(TemplateSyllabus, [
+        {'name': f"Đề cương mẫu 2025 {tag} {t}", 'structure': structure} for t in range(1, templates + 1)],
+        chunk_size)
+    counts['template_syllabus'] = len(template_ids)
+    plan = [(template_id, k) for template_id in template_ids for k in range(1, syllabuses_per_template + 1)]
+    for key in ('syllabus', 'main_section', 'sub_section', 'syllabus_learning_material', 'assessment', 'method',
+                'method_course_learning_outcome', 'teaching_session', 'teaching_session_course_learning_outcome',
+                'teaching_session_assessment', 'teaching_session_learning_material'):
+        counts[key] = 0
+
+    for chunk in _chunked(plan, chunk_size):
+        items, meta = [], []
+        for template_id, k in chunk:
+            subject = subject_rows[rng.randrange(len(subject_rows))]
+            lecturer_id, lecturer_name = rng.choice(lecturers_by_faculty[subject['faculty_id']])
+            name = f"Đề cương {tag} T{template_id}-{k} {subject['id']}"
+            syllabus_materials = sorted(rng.sample(material_ids, min(len(material_ids), rng.randint(2, 5))))
+            items.append({
+                'syllabus': {'name': name, 'subject_id': subject['id'], 'faculty_id': subject['faculty_id'],
+                             'lecturer_id': lecturer_id, 'template_id': template_id,
+                             'search_text': normalize_search_text(name, subject['id'], subject['name'],
+                                                                  lecturer_name)},
+                'structure': _synthetic_structure(structure, rng, subject, values_by_group, syllabus_materials),
+            })
+            meta.append((name, subject['id'], syllabus_materials))
+        services.bulk_insert_syllabuses(items, chunk_size=chunk_size)
+        syllabus_ids = dict(db.session.execute(select(Syllabus.name, Syllabus.id).where(
+            Syllabus.name.in_([item['syllabus']['name'] for item in items]))).all())
+        counts['syllabus'] += len(items)
+        counts['main_section'] += sum(len(item['structure']) for item in items)
+        counts['sub_section'] += sum(len(main['sub_sections']) for item in items for main in item['structure'])
+        counts['syllabus_learning_material'] += sum(len(links) for _, _, links in meta)
+
+        # Đánh giá -> phương pháp -> CLO
+        assessment_rows, assessment_meta = [], []
+        for name, subject_id, _ in meta:
+            for a in range(assessments_per_syllabus):
+                assessment_rows.append({'syllabus_id': syllabus_ids[name],
+                                        'type_assessment_id': type_assessment_ids[a % len(type_assessment_ids)]})
+                assessment_meta.append(subject_id)
+        assessment_ids = _insert_with_ids(Assessment, assessment_rows)
+        method_rows, method_meta = [], []
+        for assessment_id, subject_id in zip(assessment_ids, assessment_meta):
+            weight, remaining = 100 // methods_per_assessment, 100
+            for m in range(1, methods_per_assessment + 1):
+                method_rows.append({'name': f"Hình thức {m}", 'assessment_id': assessment_id,
+                                    'time': f"Tuần {rng.randint(1, 15)}",
+                                    'weight': remaining if m == methods_per_assessment else weight})
+                remaining -= weight
+                method_meta.append(subject_id)
+        method_ids = _insert_with_ids(Method, method_rows)
+        method_clo_rows = [{'method_id': method_id, 'clo_id': clo_id}
+                           for method_id, subject_id in zip(method_ids, method_meta)
+                           for clo_id in _sample(rng, clos_by_subject.get(subject_id, []), 1, 3)]
+        _insert_many(MethodCourseLearningOutcome, method_clo_rows, chunk_size)
+
+        # Buổi giảng dạy và các bảng liên kết
+        assessments_by_syllabus = {}
+        for row, assessment_id in zip(assessment_rows, assessment_ids):
+            assessments_by_syllabus.setdefault(row['syllabus_id'], []).append(assessment_id)
+        session_rows, session_meta = [], []
+        for name, subject_id, syllabus_materials in meta:
+            syllabus_id = syllabus_ids[name]
+            for no in range(1, sessions_per_syllabus + 1):
+                session_rows.append({
+                    'syllabus_id': syllabus_id, 'schedule_group_id': schedule_group_ids[no % len(schedule_group_ids)],
+                    'session_no': no, 'content': f"Buổi {no}: nội dung chương {(no + 1) // 2}",
+                    'offline_activity': "Giảng bài, thảo luận", 'offline_hours': float(rng.choice((2, 3, 4))),
+                    'online_activity': "Làm bài tập trực tuyến", 'online_hours': float(rng.choice((0, 1, 2))),
+                    'self_study_activity': "Đọc tài liệu", 'self_study_hours': float(rng.choice((2, 4, 6))),
+                })
+                session_meta.append((subject_id, syllabus_id, syllabus_materials))
+        session_ids = _insert_with_ids(TeachingSession, session_rows)
+        session_clo_rows, session_assessment_rows, session_material_rows = [], [], []
+        for session_id, (subject_id, syllabus_id, syllabus_materials) in zip(session_ids, session_meta):
+            session_clo_rows.extend({'teaching_session_id': session_id, 'clo_id': clo_id}
+                                    for clo_id in _sample(rng, clos_by_subject.get(subject_id, []), 1, 2))
+            session_assessment_rows.extend({'teaching_session_id': session_id, 'assessment_id': assessment_id}
+                                           for assessment_id in
+                                           _sample(rng, assessments_by_syllabus.get(syllabus_id, []), 0, 1))
+            session_material_rows.extend({'teaching_session_id': session_id, 'learning_material_id': material_id}
+                                         for material_id in _sample(rng, syllabus_materials, 1, 2))
+        _insert_many(TeachingSessionCourseLearningOutcome, session_clo_rows, chunk_size)
+        _insert_many(TeachingSessionAssessment, session_assessment_rows, chunk_size)
+        _insert_many(TeachingSessionLearningMaterial, session_material_rows, chunk_size)
+        db.session.commit()
+
+        counts['assessment'] += len(assessment_ids)
+        counts['method'] += len(method_ids)
+        counts['method_course_learning_outcome'] += len(method_clo_rows)
+        counts['teaching_session'] += len(session_ids)
+        counts['teaching_session_course_learning_outcome'] += len(session_clo_rows)
+        counts['teaching_session_assessment'] += len(session_assessment_rows)
+        counts['teaching_session_learning_material'] += len(session_material_rows)
+        log(f"  -> {counts['syllabus']}/{len(plan)} đề cương")
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table_name, count in counts.items():
+        if count:
+            log(f"  -> {table_name}: {count} dòng")
+    log(f"✅ Sinh {total} dòng giả lập (seed={seed}) trong {elapsed:.2f}s ({total / elapsed:.0f} dòng/s).")
+    return counts
+
+
+def _sample(rng, population, low, high):
+    return sorted(rng.sample(population, min(len(population), rng.randint(low, high))))
+
+
+def _synthetic_structure(structure, rng, subject, values_by_group, material_ids):
+    """Bản sao cấu trúc mẫu với nội dung tiểu mục được điền ngẫu nhiên (định dạng bulk_insert_syllabuses)."""
+    parts = []
+    for part in structure:
+        subs = []
+        for sub in part.get('sub_sections', []):
+            sub = dict(sub)
+            if sub['type'] == 'text':
+                sub['content'] = {'subject_name_vi': subject['name'], 'subject_code': subject['id']}.get(
+                    sub.get('code'), f"Nội dung {sub['name']} #{rng.randint(1, 10 ** 6)}")
+            elif sub['type'] == 'selection':
+                sub['selected_value_ids'] = _sample(rng, values_by_group.get(sub.get('attribute_group_id'), []), 1, 2)
+            elif sub['type'] == 'reference' and sub.get('reference_code') == 'learning_material':
+                sub['ref_data'] = [{'id': material_id} for material_id in material_ids]
+            subs.append(sub)
+        parts.append({**part, 'sub_sections': subs})
+    return parts
+
+
 def seed_data_4():
     # 1. Tìm Khoa CNTT (Giả sử đã có từ seed trước)
     faculty_cntt = Faculty.query.filter_by(name="Khoa Công nghệ thông tin").first()
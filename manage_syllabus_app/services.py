@@ -1,8 +1,14 @@
-import copy, json
+import copy, json, os, sys
+from types import MappingProxyType
+from sqlalchemy import insert, select, update
 from manage_syllabus_app import app, db, dao
+from manage_syllabus_app.cache import cached_reference
+from manage_syllabus_app.preview import build_template_preview
 from manage_syllabus_app.models import MainSection, TextSubSection, AttributeGroup, SelectionSubSection, \
     ReferenceSubSection, Syllabus, Subject, Lecturer, SubSection, TableSubSection, AttributeValue, LearningMaterial, \
-    Credit
+    Credit, SubSectionAttributeValue, SyllabusLearningMaterial, TemplateSyllabus, CourseObjective, \
+    CourseLearningOutcome, CloPloAssociation
+from manage_syllabus_app.utils import normalize_search_text
 
 
 def init_structure_syllabus(syllabus):
@@ -51,71 +57,96 @@ def init_structure_syllabus(syllabus):
         print(f"Lỗi khi khởi tạo cấu trúc: {e}")
 
 
+@cached_reference(TemplateSyllabus)
+def _get_template_preview(template_id):
+    template = dao.get_template_by_id(template_id)
+    if not template:
+        raise ValueError("Không tìm thấy mẫu đề cương")
+    return build_template_preview(template)
+
+
 def create_fake_syllabus_from_template(template_id):
+    """Đề cương xem trước (preview.PreviewSyllabus, bất biến) của mẫu, cache theo id mẫu và tự xóa khi mẫu đổi."""
+    return _get_template_preview(int(template_id))
+
+
+# =============================================================================
+# MẪU ĐỀ CƯƠNG ĐÃ BIÊN DỊCH (dùng chung cho mọi lần merge theo cùng một mẫu)
+# =============================================================================
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class CompiledSubSection:
+    __slots__ = ('code', 'type', 'reference_code', 'fields', 'nested')
+
+    def __init__(self, sub):
+        self.code = sub.get('code')
+        self.type = sub.get('type')
+        self.reference_code = sub.get('reference_code')
+        self.fields = _freeze(sub)
+        # Chỉ các khóa có giá trị lồng nhau (vd 'data' của bảng) mới cần sao chép khi merge
+        self.nested = tuple(k for k, v in self.fields.items() if isinstance(v, (MappingProxyType, tuple)))
+
+
+class CompiledMainSection:
+    __slots__ = ('code', 'fields', 'sub_sections', 'sub_index')
+
+    def __init__(self, main):
+        self.code = main.get('code')
+        self.fields = _freeze({k: v for k, v in main.items() if k != 'sub_sections'})
+        self.sub_sections = tuple(CompiledSubSection(sub) for sub in main.get('sub_sections', []))
+        self.sub_index = MappingProxyType({sub.code: sub for sub in self.sub_sections if sub.code})
+
+
+class CompiledTemplate:
+    """Dạng bất biến của TemplateSyllabus.structure: giá trị lồng nhau được đóng băng và có sẵn chỉ mục code.
+
+    Merge chỉ sao chép nông từng phần/tiểu mục và dùng chung mọi giá trị vô hướng của mẫu.
+    """
+    __slots__ = ('main_sections', 'main_index', 'reference_codes')
+
+    def __init__(self, structure):
+        self.main_sections = tuple(CompiledMainSection(main) for main in structure)
+        self.main_index = MappingProxyType({main.code: main for main in self.main_sections if main.code})
+        self.reference_codes = frozenset(sub.reference_code for main in self.main_sections
+                                         for sub in main.sub_sections if sub.type == 'reference')
+
+    def to_structure(self):
+        return [{**_thaw(main.fields), 'sub_sections': [_thaw(sub.fields) for sub in main.sub_sections]}
+                for main in self.main_sections]
+
+    def __reduce__(self):
+        # MappingProxyType không pickle được; gửi sang tiến trình khác dưới dạng JSON gốc rồi biên dịch lại
+        return CompiledTemplate, (self.to_structure(),)
+
+
+def compile_template(template):
+    return template if isinstance(template, CompiledTemplate) else CompiledTemplate(template)
+
+
+@cached_reference(TemplateSyllabus)
+def get_compiled_template(template_id):
+    """Mẫu đã biên dịch, cache theo id và tự xóa khi mẫu đề cương được sửa."""
     template = dao.get_template_by_id(template_id)
-    fake_syllabus = Syllabus(
-        id=template_id,
-        name=template.name,
-        subject=Subject(name="(Môn học mẫu)", credit=Credit(numberTheory=1, numberPractice=1, hourSelfStudy=1)),
-        lecturer=Lecturer(name="(Tên giảng viên)"),
-    )
-    fake_syllabus.main_sections = []
-    raw_structure = template.structure
-    fake_id_counter = [-1]
-    if raw_structure:
-        for part_def in raw_structure:
-            new_part = MainSection(
-                name=part_def['name'],
-                code=part_def['code'],
-                position=part_def['position']
-            )
-            new_part.sub_sections = []
-            for sub_part in part_def.get('sub_sections', []):
-                clone_sub_section(sub_part, new_part, fake_id_counter)
-            fake_syllabus.main_sections.append(new_part)
-
-    return fake_syllabus
-
-def clone_sub_section(sub_section, main_section, id):
-    current_fake_id = id[0]
-    id[0] -= 1
-
-    common_data = {
-        'id': current_fake_id,
-        'name': sub_section['name'],
-        'code': sub_section['code'],
-        'position': sub_section['position'],
-        'type': sub_section['type'],
-    }
-    new_sub_section = None
-
-    if sub_section['type'] == 'text':
-        new_sub_section = TextSubSection(
-            **common_data,
-            place_holder=sub_section.get('placeholder', 'place_holder'),
-            display_mode=sub_section['display_mode'],
-            content=""
-        )
-    elif sub_section['type'] == 'selection':
-        new_sub_section = SelectionSubSection(
-            **common_data,
-            attribute_group_id=sub_section['attribute_group_id']
-        )
-    elif sub_section['type'] == 'reference':
-        new_sub_section = ReferenceSubSection(
-            **common_data,
-            reference_code=sub_section['reference_code']
-        )
-    elif sub_section['type'] == 'table':
-        data = copy.deepcopy(sub_section['data'])
-        # data['rows'] = []
-        new_sub_section = TableSubSection(
-            **common_data,
-            data=data
-        )
-    main_section.sub_sections.append(new_sub_section)
+    return CompiledTemplate(template.structure) if template else None
+
 
 def merge_syllabus_data(template, syllabus):
+    """Đổ dữ liệu của một đề cương (to_structure_json) vào cấu trúc mẫu, `template` là JSON gốc hoặc CompiledTemplate."""
+    template = compile_template(template)
     subject_info = syllabus.get('subject', {}) or {}
     reference_store = {
         "credit": subject_info.get('credit'),
@@ -128,64 +159,58 @@ def merge_syllabus_data(template, syllabus):
         "subject_assessment": syllabus.get('assessments', [])
     }
     data_map = {}
-    data_syllabus = syllabus.get('main_sections', [])
-    for main in data_syllabus:
+    for main in syllabus.get('main_sections', []):
         m_code = main.get('code')
-        if not m_code: continue
-
-        sub_map = {}
-        for sub in main.get('sub_sections', []):
-            s_code = sub.get('code')
-            if s_code:
-                sub_map[s_code] = sub
-
-        data_map[m_code] = sub_map
+        if m_code and m_code in template.main_index:
+            data_map[m_code] = {sub.get('code'): sub for sub in main.get('sub_sections', []) if sub.get('code')}
 
     merger_result = []
-    for main in template:
-        new_main = copy.deepcopy(main)
-        old_subs = data_map.get(main.get('code'))
+    for main in template.main_sections:
+        new_main = {k: _thaw(v) for k, v in main.fields.items()}
+        old_subs = data_map.get(main.code)
         new_subs = []
-        for sub in main.get('sub_sections', []):
-            new_sub = copy.deepcopy(sub)
-            sub_type = sub.get('type')
-            sub_code = sub.get('code')
-            if sub_type == "reference":
-                ref_code = sub.get('reference_code')
-                if ref_code and ref_code in reference_store:
-                    ref_data = reference_store[ref_code]
+        for sub in main.sub_sections:
+            new_sub = dict(sub.fields)
+            for key in sub.nested:
+                if key != 'data' or sub.type != 'table':
+                    new_sub[key] = _thaw(new_sub[key])
+            item = old_subs.get(sub.code) if old_subs and sub.type != 'reference' else None
 
+            if sub.type == "reference":
+                if sub.reference_code in reference_store:
+                    ref_data = reference_store[sub.reference_code]
                     if ref_data:
                         new_sub['ref_data'] = ref_data
+            elif item:
+                if sub.type == 'text':
+                    new_sub['content'] = item['content']
+                    new_sub['display_mode'] = item['display_mode']
+                    new_sub['placeholder'] = item['placeholder']
+                elif sub.type == 'selection':
+                    new_sub['selected_value_ids'] = item['selected_value_ids']
 
-                # if old_subs_storage:
-                #     old_item = old_subs_storage.get(sub_code)
-                #     if old_item and 'content' in old_item:
-                #         new_sub['content'] = old_item['content']
-
-            elif old_subs:
-                item = old_subs.get(sub_code)
-                if item:
-                    if sub_type == 'text':
-                        new_sub['content'] = item['content']
-                        new_sub['display_mode'] = item['display_mode']
-                        new_sub['placeholder'] = item['placeholder']
-                    elif sub_type == 'selection':
-                        new_sub['selected_value_ids'] = item['selected_value_ids']
-                    elif sub_type == 'table':
-                        if 'data' in item:
-                            if 'data' not in new_sub:
-                                new_sub['data'] = {}
-                            new_sub['data']['rows'] = item['data']['rows']
-                            new_sub['data']['header'] = item['data']['header']
-
+            if sub.type == 'table':
+                data = sub.fields.get('data')
+                if item and 'data' in item:
+                    # Dữ liệu cũ ghi đè rows/header nên chỉ sao chép các khóa còn lại của mẫu
+                    new_data = {k: _thaw(v) for k, v in (data or {}).items() if k not in ('rows', 'header')}
+                    new_data['rows'] = item['data']['rows']
+                    new_data['header'] = item['data']['header']
+                    new_sub['data'] = new_data
+                elif data is not None:
+                    new_sub['data'] = _thaw(data)
 
             new_subs.append(new_sub)
         new_main['sub_sections'] = new_subs
         merger_result.append(new_main)
     return merger_result
 
-def build_syllabus_structure(new_syllabus, json_structure_syllabus):
+def build_syllabus_structure(new_syllabus, json_structure_syllabus, attribute_values=None, learning_materials=None):
+    """Dựng MainSection/SubSection (ORM) cho đề cương mới từ cấu trúc JSON đã merge.
+
+    `attribute_values`/`learning_materials` là map id -> đối tượng đã nạp sẵn; nếu không truyền,
+    các giá trị được truy vấn theo từng tiểu mục.
+    """
 
     for inx_main, main in enumerate(json_structure_syllabus):
         new_main = MainSection(
@@ -218,7 +243,10 @@ def build_syllabus_structure(new_syllabus, json_structure_syllabus):
 
                 selected_value_ids = sub.get('selected_value_ids')
                 if selected_value_ids:
-                    values = AttributeValue.query.filter(AttributeValue.id.in_(selected_value_ids)).all()
+                    if attribute_values is not None:
+                        values = [attribute_values[i] for i in selected_value_ids if i in attribute_values]
+                    else:
+                        values = AttributeValue.query.filter(AttributeValue.id.in_(selected_value_ids)).all()
                     new_sub.selected_values.extend(values)
 
             elif sub_type == 'table':
@@ -234,14 +262,584 @@ def build_syllabus_structure(new_syllabus, json_structure_syllabus):
                 )
                 ref_data = sub.get('ref_data')
                 if ref_code == 'learning_material':
-                    lm_ids = [item['id'] for item in ref_data if 'id' in item]
+                    lm_ids = [item['id'] for item in ref_data or [] if 'id' in item]
                     if lm_ids:
-                        materials = LearningMaterial.query.filter(LearningMaterial.id.in_(lm_ids)).all()
+                        if learning_materials is not None:
+                            materials = [learning_materials[i] for i in lm_ids if i in learning_materials]
+                        else:
+                            materials = LearningMaterial.query.filter(LearningMaterial.id.in_(lm_ids)).all()
                         new_syllabus.learning_materials.extend(materials)
 
             if new_sub:
                 new_main.sub_sections.append(new_sub)
-                print(new_sub)
 
 
-    return new_syllabus
\ No newline at end of file
+    return new_syllabus
+
+
+# =============================================================================
+# NÂNG CẤP ĐỀ CƯƠNG HÀNG LOẠT (SET-BASED)
+# =============================================================================
+def merge_syllabus_structures(template, structures):
+    """Merge nhiều đề cương (kết quả to_structure_json) vào cùng một mẫu, trả về danh sách theo đúng thứ tự vào.
+
+    Chạy tuần tự trong luồng của job: mỗi lần merge rẻ hơn chi phí gửi đề cương sang tiến trình khác và
+    nhận kết quả về (xem flask bench-merge), nên pool tiến trình chỉ làm chậm đi.
+    """
+    template = compile_template(template)
+    return [merge_syllabus_data(template, structure) for structure in structures]
+
+
+def prepare_syllabus_upgrades(syllabuses, new_template, status):
+    """Merge dữ liệu của từng đề cương vào cấu trúc mẫu mới, bỏ qua các đề cương đã được nâng cấp.
+
+    Trả về danh sách item {'syllabus': cột của đề cương mới, 'structure': cấu trúc đã merge}.
+    """
+    names = {s.id: f"{s.name} {new_template.name}" for s in syllabuses}
+    existing = dao.get_existing_syllabus_names(list(names.values()))
+    pending = [s for s in syllabuses if names[s.id] not in existing]
+    structures = merge_syllabus_structures(get_compiled_template(new_template.id),
+                                           [s.to_structure_json() for s in pending])
+    items = []
+    for syllabus, structure in zip(pending, structures):
+        name = names[syllabus.id]
+        items.append({
+            'syllabus': {
+                'name': name,
+                'status': status,
+                'subject_id': syllabus.subject_id,
+                'faculty_id': syllabus.faculty_id,
+                'lecturer_id': syllabus.lecturer_id,
+                'template_id': new_template.id,
+                'search_text': normalize_search_text(name, syllabus.subject.id, syllabus.subject.name,
+                                                     syllabus.lecturer.name),
+            },
+            'structure': structure,
+        })
+    return items
+
+
+def _ids_in_insert_order(table, parent_column, parent_ids):
+    """{parent_id: [id, ...]} sắp theo id tăng dần, cũng chính là thứ tự các dòng vừa được chèn."""
+    result = {}
+    rows = db.session.execute(select(table.c.id, table.c[parent_column])
+                              .where(table.c[parent_column].in_(parent_ids))
+                              .order_by(table.c.id))
+    for row_id, parent_id in rows:
+        result.setdefault(parent_id, []).append(row_id)
+    return {parent_id: iter(ids) for parent_id, ids in result.items()}
+
+
+def _insert_rows(table, rows):
+    if rows:
+        db.session.execute(insert(table), rows)
+
+
+def bulk_insert_syllabuses(items, chunk_size=200):
+    """Chèn các đề cương đã chuẩn bị (xem prepare_syllabus_upgrades) theo lô bằng executemany.
+
+    Mỗi lô tốn một số câu lệnh cố định (đề cương, phần, tiểu mục, 4 bảng con, 2 bảng liên kết và
+    3 câu lấy lại id), không phụ thuộc số đề cương hay tiểu mục. Không commit.
+    """
+    value_ids, material_ids = set(), set()
+    for item in items:
+        for main in item['structure']:
+            for sub in main.get('sub_sections', []):
+                value_ids.update(sub.get('selected_value_ids') or [])
+                if sub.get('type') == 'reference' and sub.get('reference_code') == 'learning_material':
+                    material_ids.update(m['id'] for m in sub.get('ref_data') or [] if 'id' in m)
+    valid_values = dao.get_existing_ids(AttributeValue, value_ids)
+    valid_materials = dao.get_existing_ids(LearningMaterial, material_ids)
+
+    for start in range(0, len(items), chunk_size):
+        _insert_syllabus_chunk(items[start:start + chunk_size], valid_values, valid_materials)
+    return len(items)
+
+
+def _insert_syllabus_chunk(items, valid_values, valid_materials):
+    # ORM bulk insert để các listener (cache số đếm đề cương) vẫn nhận biết bảng syllabus thay đổi
+    db.session.execute(insert(Syllabus), [item['syllabus'] for item in items])
+    syllabus_ids = dict(db.session.execute(select(Syllabus.name, Syllabus.id)
+                                           .where(Syllabus.name.in_([i['syllabus']['name'] for i in items]))).all())
+
+    main_rows, mains = [], []
+    for item in items:
+        syllabus_id = syllabus_ids[item['syllabus']['name']]
+        for idx, main in enumerate(item['structure']):
+            main_rows.append({'name': main.get('name'), 'code': main.get('code'),
+                              'position': main.get('position', idx + 1), 'syllabus_id': syllabus_id})
+            mains.append((syllabus_id, main))
+    _insert_rows(MainSection.__table__, main_rows)
+    main_ids = _ids_in_insert_order(MainSection.__table__, 'syllabus_id', list(syllabus_ids.values()))
+
+    sub_rows, subs = [], []
+    for syllabus_id, main in mains:
+        main_id = next(main_ids[syllabus_id])
+        for idx, sub in enumerate(main.get('sub_sections', [])):
+            if sub.get('type') not in ('text', 'selection', 'table', 'reference'):
+                continue
+            sub_rows.append({'name': sub.get('name'), 'code': sub.get('code'), 'type': sub.get('type'),
+                             'position': sub.get('position', idx + 1), 'main_section_id': main_id})
+            subs.append((syllabus_id, main_id, sub))
+    _insert_rows(SubSection.__table__, sub_rows)
+    sub_ids = _ids_in_insert_order(SubSection.__table__, 'main_section_id', [r['main_section_id'] for r in sub_rows])
+
+    text_rows, selection_rows, table_rows, reference_rows = [], [], [], []
+    value_rows, material_rows = [], set()
+    for syllabus_id, main_id, sub in subs:
+        sub_id = next(sub_ids[main_id])
+        sub_type = sub.get('type')
+        if sub_type == 'text':
+            text_rows.append({'id': sub_id, 'content': sub.get('content'), 'place_holder': sub.get('placeholder'),
+                              'display_mode': sub.get('display_mode')})
+        elif sub_type == 'selection':
+            selection_rows.append({'id': sub_id, 'attribute_group_id': sub.get('attribute_group_id')})
+            value_rows.extend({'subsection_id': sub_id, 'attribute_value_id': value_id}
+                              for value_id in dict.fromkeys(sub.get('selected_value_ids') or [])
+                              if value_id in valid_values)
+        elif sub_type == 'table':
+            table_rows.append({'id': sub_id, 'data': sub.get('data', {})})
+        elif sub_type == 'reference':
+            ref_code = sub.get('reference_code')
+            reference_rows.append({'id': sub_id, 'reference_code': ref_code})
+            if ref_code == 'learning_material':
+                material_rows.update((syllabus_id, m['id']) for m in sub.get('ref_data') or []
+                                     if m.get('id') in valid_materials)
+
+    _insert_rows(TextSubSection.__table__, text_rows)
+    _insert_rows(SelectionSubSection.__table__, selection_rows)
+    _insert_rows(TableSubSection.__table__, table_rows)
+    _insert_rows(ReferenceSubSection.__table__, reference_rows)
+    _insert_rows(SubSectionAttributeValue.__table__, value_rows)
+    _insert_rows(SyllabusLearningMaterial.__table__,
+                 [{'syllabus_id': s_id, 'learning_material_id': lm_id} for s_id, lm_id in sorted(material_rows)])
+
+
+
+# =============================================================================
+# ĐỒNG BỘ CẤU TRÚC THEO TỆP JSON (flask sync-structures)
+# =============================================================================
+DEFAULT_STRUCTURE_FILE = 'syllabus_2025.json'
+
+
+class StructureDefinition:
+    """Tệp cấu trúc đã phân tích, tra cứu phần theo code và tiểu mục theo tên trong O(1)."""
+    __slots__ = ('parts', 'sub_sections')
+
+    def __init__(self, structure):
+        self.parts = {part['code']: part for part in structure}
+        self.sub_sections = {}
+        for part in structure:
+            subs = self.sub_sections[part['code']] = {}
+            for sub in part.get('sub_sections', []):
+                subs.setdefault(sub['name'], sub)
+
+
+def load_structure_definitions(file_names, structures_dir=None, log=print):
+    """Đọc và phân tích mỗi tệp cấu trúc đúng một lần; tệp thiếu hoặc lỗi ánh xạ tới None."""
+    structures_dir = structures_dir or os.path.join(app.root_path, 'data', 'structures')
+    definitions = {}
+    for file_name in file_names:
+        json_path = os.path.join(structures_dir, file_name)
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                definitions[file_name] = StructureDefinition(json.load(f))
+        except FileNotFoundError:
+            log(f"  -> CẢNH BÁO: Không tìm thấy tệp cấu trúc: {file_name}")
+            definitions[file_name] = None
+        except Exception as e:
+            log(f"  -> LỖI: Không thể đọc/phân tích JSON '{file_name}': {e}")
+            definitions[file_name] = None
+    return definitions
+
+
+SUB_SECTION_TYPES = ('text', 'selection', 'reference', 'table')
+
+
+def _new_sub_section(sub_def):
+    common = {'name': sub_def['name'], 'code': sub_def.get('code'), 'position': sub_def['position']}
+    if sub_def['type'] == 'text':
+        return TextSubSection(**common, content='', display_mode=sub_def.get('display_mode'),
+                              place_holder=sub_def.get('placeholder'))
+    if sub_def['type'] == 'selection':
+        return SelectionSubSection(**common, attribute_group_id=sub_def['attribute_group_id'])
+    if sub_def['type'] == 'reference':
+        return ReferenceSubSection(**common, reference_code=sub_def['reference_code'])
+    if sub_def['type'] == 'table':
+        return TableSubSection(**common, data=copy.deepcopy(sub_def.get('data', {})))
+    return None
+
+
+def sync_syllabus_structure(syllabus_id, definition, main_sections, log=None):
+    """Đưa các MainSection/SubSection đã nạp của một đề cương về đúng định nghĩa; trả về số thay đổi.
+
+    Phần được khớp theo code, tiểu mục theo tên, đều qua dict nên chi phí tuyến tính theo số mục.
+    """
+    changes = 0
+    existing = {}
+    for part in main_sections:
+        if part.code in definition.parts:
+            existing.setdefault(part.code, part)
+        else:
+            if log:
+                log(f"    -> Xóa MainSection cũ '{part.name}'")
+            db.session.delete(part)
+            changes += 1
+
+    for code, part_def in definition.parts.items():
+        sub_defs = definition.sub_sections[code]
+        part = existing.get(code)
+        if part is None:
+            part = MainSection(name=part_def['name'], code=code, position=part_def['position'],
+                               syllabus_id=syllabus_id)
+            db.session.add(part)
+            changes += 1
+            if log:
+                log(f"    -> Thêm MainSection mới '{part_def['name']}'")
+            current_subs = {}
+        else:
+            if part.name != part_def['name']:
+                part.name = part_def['name']
+                changes += 1
+            if part.position != part_def['position']:
+                part.position = part_def['position']
+                changes += 1
+            current_subs = {}
+            for sub in list(part.sub_sections):
+                if sub.name in sub_defs:
+                    current_subs.setdefault(sub.name, sub)
+                else:
+                    if log:
+                        log(f"      -> Xóa SubSection cũ '{sub.name}' khỏi phần '{part.name}'")
+                    db.session.delete(sub)
+                    changes += 1
+
+        for name, sub_def in sub_defs.items():
+            sub = current_subs.get(name)
+            if sub is None:
+                sub = _new_sub_section(sub_def)
+                if sub is not None:
+                    part.sub_sections.append(sub)
+                    changes += 1
+                    if log:
+                        log(f"      -> Thêm SubSection mới '{name}' vào phần '{part.name}'")
+            elif sub.position != sub_def['position']:
+                sub.position = sub_def['position']
+                changes += 1
+    return changes
+
+
+def diff_outline(definition, outline):
+    """Các thay đổi cần áp dụng cho một đề cương, tính trên dạng rút gọn (dao.get_section_outlines).
+
+    Cùng quy tắc với sync_syllabus_structure nên số phần tử bằng số thay đổi mà hàm đó thực hiện.
+    Mỗi thay đổi là một dict thuần (dùng cho báo cáo --dry-run).
+    """
+    ops = []
+    existing = {}
+    for _, code, name, position, subs in outline:
+        if code in definition.parts:
+            existing.setdefault(code, (name, position, subs))
+        else:
+            ops.append({'op': 'delete_part', 'part': code, 'name': name})
+
+    for code, part_def in definition.parts.items():
+        sub_defs = definition.sub_sections[code]
+        current = {}
+        if code not in existing:
+            ops.append({'op': 'add_part', 'part': code, 'name': part_def['name']})
+        else:
+            name, position, subs = existing[code]
+            if name != part_def['name']:
+                ops.append({'op': 'update_part', 'part': code, 'field': 'name', 'old': name, 'new': part_def['name']})
+            if position != part_def['position']:
+                ops.append({'op': 'update_part', 'part': code, 'field': 'position', 'old': position,
+                            'new': part_def['position']})
+            for sub_name, sub_position in subs:
+                if sub_name in sub_defs:
+                    current.setdefault(sub_name, sub_position)
+                else:
+                    ops.append({'op': 'delete_sub', 'part': code, 'name': sub_name})
+
+        for sub_name, sub_def in sub_defs.items():
+            if sub_name not in current:
+                if sub_def['type'] in SUB_SECTION_TYPES:
+                    ops.append({'op': 'add_sub', 'part': code, 'name': sub_name, 'type': sub_def['type']})
+            elif current[sub_name] != sub_def['position']:
+                ops.append({'op': 'update_sub', 'part': code, 'name': sub_name, 'field': 'position',
+                            'old': current[sub_name], 'new': sub_def['position']})
+    return ops
+
+
+def shard_bounds(shard):
+    """Khoảng id [lo, hi) của phân đoạn i/N, chia đều theo khoảng id hiện có; None nếu chưa có đề cương."""
+    index, total = shard
+    min_id, max_id = dao.get_syllabus_id_bounds()
+    if min_id is None:
+        return None
+    size = (max_id - min_id) // total + 1
+    return min_id + index * size, min_id + (index + 1) * size
+
+
+def sync_syllabus_structures(chunk_size=500, verbose=False, log=print, dry_run=False, shard=None, report=None):
+    """Đồng bộ cấu trúc mọi đề cương theo tệp 'structure_file' của chúng, commit theo từng lô.
+
+    Mỗi tệp cấu trúc chỉ đọc một lần. Mỗi lô tốn hai truy vấn dạng rút gọn để tìm đề cương lệch, rồi hai
+    truy vấn nạp ORM phần/tiểu mục của riêng các đề cương đó, cộng các câu ghi.
+
+    - dry_run: không ghi gì, chỉ gọi `report(record)` cho từng đề cương lệch cấu trúc.
+    - shard=(i, N): chỉ xử lý phân đoạn id thứ i (0 <= i < N), xem shard_bounds.
+
+    Trả về {'syllabuses', 'changes', 'skipped'}.
+    """
+    id_range = None
+    if shard:
+        id_range = shard_bounds(shard)
+        if id_range is None:
+            return {'syllabuses': 0, 'changes': 0, 'skipped': 0}
+    rows = dao.get_syllabus_structure_files(id_range)
+    definitions = load_structure_definitions({row.structure_file or DEFAULT_STRUCTURE_FILE for row in rows},
+                                             log=log)
+    stats = {'syllabuses': len(rows), 'changes': 0, 'skipped': 0}
+    log(f"Bắt đầu đồng bộ cấu trúc cho {len(rows)} đề cương...")
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = []
+        for row in rows[start:start + chunk_size]:
+            definition = definitions[row.structure_file or DEFAULT_STRUCTURE_FILE]
+            if definition is None:
+                stats['skipped'] += 1
+            else:
+                chunk.append((row, definition))
+        # Chỉ nạp ORM cho các đề cương thực sự lệch cấu trúc
+        outlines = dao.get_section_outlines([row.id for row, _ in chunk])
+        pending = []
+        for row, definition in chunk:
+            ops = diff_outline(definition, outlines.get(row.id, []))
+            if not ops:
+                continue
+            pending.append((row, definition))
+            if dry_run:
+                stats['changes'] += len(ops)
+                if report:
+                    report({'syllabus_id': row.id, 'name': row.name,
+                            'structure_file': row.structure_file or DEFAULT_STRUCTURE_FILE, 'changes': ops})
+
+        if not dry_run:
+            sections = dao.get_main_sections_for_syllabuses([row.id for row, _ in pending]) if pending else {}
+            changed_ids = []
+            for row, definition in pending:
+                if verbose:
+                    log(f"\n  -> Đang đồng bộ '{row.name}'...")
+                changes = sync_syllabus_structure(row.id, definition, sections.get(row.id, []),
+                                                  log=log if verbose else None)
+                if changes:
+                    changed_ids.append(row.id)
+                    stats['changes'] += changes
+
+            if changed_ids:
+                dao.mark_syllabus_changed(syllabus_ids=changed_ids)
+            db.session.commit()
+        # Bỏ các đối tượng của lô vừa xong khỏi session để bộ nhớ không tăng theo số đề cương
+        db.session.expunge_all()
+        log(f"  -> {min(start + chunk_size, len(rows))}/{len(rows)} đề cương, {stats['changes']} thay đổi")
+    return stats
+
+
+def run_sync_shard(shard, chunk_size=500, dry_run=False, verbose=False):
+    """Điểm vào cho tiến trình con của `flask sync-structures --workers N`: session và kết nối riêng.
+
+    Trả về thống kê của phân đoạn, kèm danh sách bản ghi báo cáo khi dry_run.
+    """
+    with app.app_context():
+        # Không dùng lại kết nối kế thừa từ tiến trình cha (khi fork)
+        db.engine.dispose(close=False)
+        records = []
+        prefix = f"[{shard[0]}/{shard[1]}]"
+        # Ở chế độ dry-run, stdout chỉ dành cho báo cáo
+        out = sys.stderr if dry_run else sys.stdout
+        stats = sync_syllabus_structures(chunk_size=chunk_size, verbose=verbose, dry_run=dry_run, shard=shard,
+                                         report=records.append,
+                                         log=lambda message: print(prefix, message.strip(), file=out, flush=True))
+        stats['report'] = records
+        return stats
+
+
+# =============================================================================
+# SỬA ĐỀ CƯƠNG THEO LÔ (POST /syllabus/<id>/batch)
+# =============================================================================
+class BatchError(ValueError):
+    pass
+
+
+def _batch_text(value, field):
+    if not isinstance(value, str) or not value.strip():
+        raise BatchError(f"Thiếu {field}")
+    return value
+
+
+def _batch_int(value, field, minimum=0, maximum=None):
+    if isinstance(value, bool):
+        raise BatchError(f"{field} phải là số nguyên")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise BatchError(f"{field} phải là số nguyên")
+    if number < minimum:
+        raise BatchError(f"{field} phải lớn hơn hoặc bằng {minimum}")
+    if maximum is not None and number > maximum:
+        raise BatchError(f"{field} phải nhỏ hơn hoặc bằng {maximum}")
+    return number
+
+
+# Thang đánh giá CLO - PLO (chú thích dưới bảng CLO): 1 không đáp ứng ... 5 đáp ứng rất nhiều, 0 = chưa đánh giá
+RATING_MAX = 5
+
+
+def _batch_rating(value, field='rating'):
+    # Dùng chung cho thao tác lô, lưới CLO - PLO và route sửa một ô
+    return _batch_int(value, field, 0, RATING_MAX)
+
+
+# Loại thao tác -> (model, các khóa xác định bản ghi, cột được sửa: hàm kiểm tra giá trị)
+BATCH_OPERATIONS = {
+    'text_subsection': (TextSubSection, ('id',), {'content': _batch_text}),
+    'course_objective': (CourseObjective, ('id',), {'content': _batch_text}),
+    'course_learning_outcome': (CourseLearningOutcome, ('id',), {'content': _batch_text}),
+    'learning_material': (LearningMaterial, ('id',), {'name': _batch_text}),
+    'credit': (Credit, ('id',), {'numberTheory': _batch_int, 'numberPractice': _batch_int,
+                                 'hourSelfStudy': _batch_int}),
+    'clo_plo_rating': (CloPloAssociation, ('clo_id', 'plo_id'), {'rating': _batch_rating}),
+}
+
+
+def _parse_batch_operation(operation):
+    if not isinstance(operation, dict) or operation.get('type') not in BATCH_OPERATIONS:
+        raise BatchError("Loại thao tác không hợp lệ")
+    model, keys, fields = BATCH_OPERATIONS[operation['type']]
+    key = tuple(_batch_int(operation.get(k), k, 1) for k in keys)
+    values = {name: check(operation[name], name) for name, check in fields.items() if name in operation}
+    if not values:
+        raise BatchError("Không có giá trị nào để cập nhật")
+    return key, values
+
+
+def _allowed_batch_targets(syllabus, keys_by_type):
+    """Các bản ghi thuộc đề cương (hoặc môn học của đề cương) trong số khóa được gửi lên, mỗi loại một truy vấn."""
+    allowed = {}
+    for op_type, keys in keys_by_type.items():
+        ids = [key[0] for key in keys]
+        if op_type == 'text_subsection':
+            query = select(TextSubSection.id).join(MainSection, MainSection.id == TextSubSection.main_section_id) \
+                .where(MainSection.syllabus_id == syllabus.id, TextSubSection.id.in_(ids))
+        elif op_type == 'course_objective':
+            query = select(CourseObjective.id).where(CourseObjective.subject_id == syllabus.subject_id,
+                                                     CourseObjective.id.in_(ids))
+        elif op_type == 'course_learning_outcome':
+            query = select(CourseLearningOutcome.id).join(CourseObjective) \
+                .where(CourseObjective.subject_id == syllabus.subject_id, CourseLearningOutcome.id.in_(ids))
+        elif op_type == 'learning_material':
+            query = select(SyllabusLearningMaterial.learning_material_id) \
+                .where(SyllabusLearningMaterial.syllabus_id == syllabus.id,
+                       SyllabusLearningMaterial.learning_material_id.in_(ids))
+        elif op_type == 'credit':
+            query = select(Subject.credit_id).where(Subject.id == syllabus.subject_id, Subject.credit_id.in_(ids))
+        else:
+            query = select(CloPloAssociation.clo_id, CloPloAssociation.plo_id) \
+                .join(CourseLearningOutcome, CourseLearningOutcome.id == CloPloAssociation.clo_id) \
+                .join(CourseObjective, CourseObjective.id == CourseLearningOutcome.course_objective_id) \
+                .where(CourseObjective.subject_id == syllabus.subject_id, CloPloAssociation.clo_id.in_(ids))
+        allowed[op_type] = {tuple(row) for row in db.session.execute(query)}
+    return allowed
+
+
+def apply_syllabus_batch(syllabus, operations):
+    """Áp dụng danh sách thao tác sửa của trình soạn đề cương trong một transaction.
+
+    Thao tác không hợp lệ (sai kiểu, sai giá trị, bản ghi không thuộc đề cương) bị bỏ qua và báo lỗi riêng,
+    các thao tác còn lại được ghi bằng một câu UPDATE executemany cho mỗi loại; nhiều thao tác trên cùng
+    bản ghi được gộp theo thứ tự gửi (thao tác sau thắng). Version các đề cương bị ảnh hưởng tăng đúng
+    một lần khi commit. Trả về danh sách kết quả theo thứ tự thao tác.
+    """
+    results = [None] * len(operations)
+    parsed = []
+    for index, operation in enumerate(operations):
+        try:
+            key, values = _parse_batch_operation(operation)
+            parsed.append((index, operation['type'], key, values))
+        except BatchError as e:
+            results[index] = {'status': 400, 'err_msg': str(e)}
+
+    keys_by_type = {}
+    for _, op_type, key, _ in parsed:
+        keys_by_type.setdefault(op_type, set()).add(key)
+    allowed = _allowed_batch_targets(syllabus, keys_by_type)
+
+    # Tên học liệu là duy nhất: chặn trước các tên đã thuộc về học liệu khác
+    names = {values['name'] for _, op_type, _, values in parsed if op_type == 'learning_material'}
+    taken = dict(db.session.execute(select(LearningMaterial.name, LearningMaterial.id)
+                                    .where(LearningMaterial.name.in_(list(names)))).all()) if names else {}
+
+    rows_by_type = {}
+    for index, op_type, key, values in parsed:
+        if key not in allowed[op_type]:
+            results[index] = {'status': 404, 'err_msg': "Không tìm thấy bản ghi trong đề cương này"}
+            continue
+        if op_type == 'learning_material':
+            if taken.setdefault(values['name'], key[0]) != key[0]:
+                results[index] = {'status': 400, 'err_msg': "Tên tài liệu đã tồn tại"}
+                continue
+        _, key_names, _ = BATCH_OPERATIONS[op_type]
+        rows = rows_by_type.setdefault(op_type, {})
+        rows.setdefault(key, dict(zip(key_names, key))).update(values)
+        results[index] = {'status': 200, 'msg': "Cập nhật thành công"}
+
+    for op_type, rows in rows_by_type.items():
+        model = BATCH_OPERATIONS[op_type][0]
+        # Gom theo tập cột để mỗi executemany có cùng dạng câu UPDATE
+        by_shape = {}
+        for row in rows.values():
+            by_shape.setdefault(tuple(sorted(row)), []).append(row)
+        for shape_rows in by_shape.values():
+            db.session.execute(update(model), shape_rows)
+
+    if rows_by_type:
+        dao.mark_syllabus_changed(syllabus_id=syllabus.id)
+        if rows_by_type.keys() & {'course_objective', 'course_learning_outcome', 'credit', 'clo_plo_rating'}:
+            # Các bảng này thuộc môn học nên mọi đề cương của môn đều đổi
+            dao.mark_syllabus_changed(subject_id=syllabus.subject_id)
+        for key in rows_by_type.get('learning_material', {}):
+            dao.mark_syllabus_changed(material_id=key[0])
+    db.session.commit()
+    return results
+
+
+def apply_clo_plo_matrix(subject_id, cells):
+    """Ghi lưới rating CLO x PLO của môn học (toàn bộ hoặc chỉ các ô thay đổi) trong một transaction.
+
+    Mỗi ô {clo_id, plo_id, rating} (rating >= 0, 0 = chưa đánh giá) phải thuộc lưới của môn học, ô sai bị
+    bỏ qua và báo lỗi riêng; ô gửi trùng được gộp (ô sau thắng). Chỉ các ô có rating khác hiện tại mới được
+    ghi, bằng một câu upsert. Trả về danh sách kết quả theo thứ tự ô.
+    """
+    current = {(clo_id, plo_id): rating for _, clo_id, plo_id, rating in dao.get_clo_plo_matrix(subject_id)
+               if plo_id is not None}
+    results, ratings = [], {}
+    for cell in cells:
+        try:
+            if not isinstance(cell, dict):
+                raise BatchError("Ô không hợp lệ")
+            key = (_batch_int(cell.get('clo_id'), 'clo_id', 1), _batch_int(cell.get('plo_id'), 'plo_id', 1))
+            rating = _batch_rating(cell.get('rating'))
+        except BatchError as e:
+            results.append({'status': 400, 'err_msg': str(e)})
+            continue
+        if key not in current:
+            results.append({'status': 404, 'err_msg': "Ô không thuộc lưới CLO - PLO của môn học"})
+            continue
+        ratings[key] = rating
+        results.append({'status': 200, 'msg': "Cập nhật thành công"})
+
+    changed = {key: rating for key, rating in ratings.items() if current[key] != rating}
+    if changed:
+        dao.upsert_clo_plo_ratings(subject_id, changed)
+    return results, len(changed)
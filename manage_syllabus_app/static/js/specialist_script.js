@@ -77,11 +77,9 @@ function save() {
                     'new_template_id': data.new_template_id
                 }),
             }).then(res => res.json()).then(data2 => {
-                if(data2.status == 200) {
-                    showToast(data2.msg, 'success');
-                    setTimeout(() => {
-                        window.location.href = '/specialist';
-                    }, 1500);
+                if(data2.status == 200 || (data2.status == 409 && data2.job_id)) {
+                    if (data2.status == 409) showToast(data2.err_msg, 'warning');
+                    pollSyncJob(data2.job_id);
                 } else {
                     showToast('Lỗi: ' + data2.err_msg, 'danger');
                 }
@@ -97,6 +95,29 @@ function save() {
 
 }
 
+function pollSyncJob(jobId){
+    fetch(`/syllabus/sync-jobs/${jobId}`).then(res => res.json()).then(data => {
+        if(data.status != 200){
+            showToast('Lỗi: ' + data.err_msg, 'danger');
+            return;
+        }
+        const job = data.job;
+        if(job.status == 'DONE'){
+            showToast(`Đã đồng bộ và tạo mới ${job.processed}/${job.total} đề cương.`, 'success');
+            setTimeout(() => {
+                window.location.href = '/specialist';
+            }, 1500);
+        } else if(job.status == 'FAILED'){
+            showToast('Lỗi: ' + job.error, 'danger');
+        } else {
+            showToast(`Đang đồng bộ đề cương: ${job.processed}/${job.total}`, 'info');
+            setTimeout(() => pollSyncJob(jobId), 2000);
+        }
+    }).catch(err => {
+        showToast("Lỗi kết nối server" + err, "danger");
+    });
+}
+
 function clearDraft(templateId){
     fetch('/syllabus/draft/delete',{
         method: 'DELETE',
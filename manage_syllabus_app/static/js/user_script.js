@@ -1,7 +1,87 @@
+// ===================== HÀNG ĐỢI LƯU THEO LÔ =====================
+// Các chỉnh sửa onblur được gom lại (cùng bản ghi chỉ giữ giá trị mới nhất) và gửi chung
+// một request POST /syllabus/<id>/batch, thay vì mỗi ô một request và một transaction.
+const EDIT_FLUSH_DELAY = 800;
+const EDIT_RETRY_DELAY = 5000;
+const pendingEdits = new Map();
+let editFlushTimer = null;
+
+function currentSyllabusId(){
+    const el = document.querySelector('.syllabus-detail-card[data-syllabus-id]');
+    return el ? el.dataset.syllabusId : null;
+}
+
+// Trả về false khi trang không có đề cương thật (vd. trang xem trước mẫu) để gọi API cũ
+function queueEdit(key, operation){
+    if (!currentSyllabusId()) return false;
+    pendingEdits.set(key, operation);
+    clearTimeout(editFlushTimer);
+    editFlushTimer = setTimeout(flushEdits, EDIT_FLUSH_DELAY);
+    return true;
+}
+
+// Các lần gửi được xếp nối tiếp trên một promise duy nhất: lô sau chỉ đi khi lô trước đã có kết quả,
+// nên một lô gửi lại không thể ghi đè giá trị mới hơn đã được lô sau lưu
+let editFlight = Promise.resolve();
+
+function flushEdits(){
+    clearTimeout(editFlushTimer);
+    editFlight = editFlight.then(sendPendingEdits);
+    return editFlight;
+}
+
+function sendPendingEdits(){
+    if (pendingEdits.size === 0) return;
+    const entries = Array.from(pendingEdits.entries());
+    pendingEdits.clear();
+    // Đưa lại vào hàng đợi (trừ khi đã có giá trị mới hơn) và hẹn giờ gửi lại
+    const requeue = () => {
+        entries.forEach(([key, op]) => { if (!pendingEdits.has(key)) pendingEdits.set(key, op) });
+        clearTimeout(editFlushTimer);
+        editFlushTimer = setTimeout(flushEdits, EDIT_RETRY_DELAY);
+    };
+    return fetch(`/syllabus/${currentSyllabusId()}/batch`, {
+        method: 'POST',
+        headers: {
+        'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            'operations': entries.map(([key, op]) => op),
+        })
+    }).then(res => res.json()).then(data => {
+        if (data.status == 200){
+            if (data.failed == 0){
+                showToast(data.msg, 'success')
+            } else {
+                const errors = data.results.filter(r => r.status != 200).map(r => r.err_msg);
+                showToast(`${data.msg}: ${[...new Set(errors)].join(', ')}`, 'danger')
+            }
+        } else {
+            // Cả lô bị từ chối (chưa đăng nhập, lỗi máy chủ...): chưa thao tác nào được lưu
+            requeue();
+            showToast(data.err_msg, 'danger')
+        }
+    }).catch(err => {
+        console.error('Lỗi:', err);
+        requeue();
+        showToast('Mất kết nối đến máy chủ!', 'danger');
+    });
+}
+
+// Rời trang khi còn chỉnh sửa chưa gửi: sendBeacon vẫn được trình duyệt gửi sau khi trang đóng
+window.addEventListener('pagehide', () => {
+    if (pendingEdits.size === 0 || !currentSyllabusId()) return;
+    const body = JSON.stringify({'operations': Array.from(pendingEdits.values())});
+    navigator.sendBeacon(`/syllabus/${currentSyllabusId()}/batch`, new Blob([body], {type: 'application/json'}));
+    pendingEdits.clear();
+});
+
 
 
 function updateSection(subsection_id){
     let content = document.getElementById(`content-${subsection_id}`)
+    if (queueEdit(`text_subsection:${subsection_id}`,
+        {'type': 'text_subsection', 'id': subsection_id, 'content': content.value})) return;
     fetch(`/text-subsection/${subsection_id}`,{
          method: 'PATCH',
         headers: {
@@ -23,6 +103,8 @@ function updateSection(subsection_id){
 
 function updateCourseObjective(co_id){
     let content = document.getElementById(`content-co${co_id}`);
+    if (queueEdit(`course_objective:${co_id}`,
+        {'type': 'course_objective', 'id': co_id, 'content': content.value})) return;
     fetch(`/course-objective/${co_id}`,{
          method: 'PATCH',
         headers: {
@@ -44,6 +126,8 @@ function updateCourseObjective(co_id){
 
 function updateCourseLearningOutcome(clo_id){
     let content = document.getElementById(`content-clo${clo_id}`)
+    if (queueEdit(`course_learning_outcome:${clo_id}`,
+        {'type': 'course_learning_outcome', 'id': clo_id, 'content': content.value})) return;
     fetch(`/course-learning-outcome/${clo_id}`,{
          method: 'PATCH',
         headers: {
@@ -117,6 +201,8 @@ function addLearningMaterial(syllabus_id){
 
 function updateLearningMaterial(material_id){
     let content = document.getElementById(`name-learning-material${material_id}`)
+    if (queueEdit(`learning_material:${material_id}`,
+        {'type': 'learning_material', 'id': material_id, 'name': content.value})) return;
 
     fetch(`/learning-material/${material_id}`,{
         method: 'PATCH',
@@ -238,6 +324,14 @@ function saveCredits(credit_id) {
     const theory = document.getElementById(`theory-${credit_id}`).value;
     const practice = document.getElementById(`practice-${credit_id}`).value;
     const selfStudy = document.getElementById(`self-study-${credit_id}`).value;
+    const totalInput = document.getElementById(`total-credits-${credit_id}`);
+    if (queueEdit(`credit:${credit_id}`, {
+        'type': 'credit', 'id': credit_id, 'numberTheory': parseInt(theory) || 0,
+        'numberPractice': parseInt(practice) || 0, 'hourSelfStudy': parseInt(selfStudy) || 0
+    })) {
+        totalInput.value = (parseInt(theory) || 0) + (parseInt(practice) || 0);
+        return;
+    }
 
     fetch('/syllabus/update-credits', {
         method: 'PUT',
@@ -564,11 +658,13 @@ showConfirmDialog(
 
 function updateRating(clo_id, plo_id){
     const rating = document.getElementById(`rating-${clo_id}-${plo_id}`).value;
-    if(rating <= 0){
-        showToast("Điểm đánh giá phải lớn hơn 0!!", "danger")
-        rating = 0
+    // 0 = chưa đánh giá, 1..5 theo chú thích dưới bảng (máy chủ kiểm tra cùng khoảng này)
+    if(rating === '' || rating < 0 || rating > 5){
+        showToast("Điểm đánh giá phải từ 0 đến 5!!", "danger")
         return;
     }
+    if (queueEdit(`clo_plo_rating:${clo_id}:${plo_id}`,
+        {'type': 'clo_plo_rating', 'clo_id': clo_id, 'plo_id': plo_id, 'rating': rating})) return;
     fetch(`/clo/${clo_id}/plo/${plo_id}`,{
         method: 'PUT',
         headers: {
@@ -0,0 +1,22 @@
+import math
+import re
+import unicodedata
+
+
+def strip_accents(s):
+    return ''.join(c for c in unicodedata.normalize('NFD', s)
+                   if unicodedata.category(c) != 'Mn')
+
+
+def normalize_search_text(*parts):
+    """Ghép các chuỗi, chuyển chữ thường và bỏ dấu tiếng Việt (kể cả đ -> d) để tìm kiếm không dấu."""
+    text = ' '.join(str(p) for p in parts if p)
+    text = strip_accents(text.lower()).replace('đ', 'd')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def percentile(values, p):
+    """Phân vị thứ p (0-100) theo phương pháp nearest-rank."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[index]
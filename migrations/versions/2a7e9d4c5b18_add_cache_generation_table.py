@@ -0,0 +1,29 @@
+"""Add cache_generation table
+
+Revision ID: 2a7e9d4c5b18
+Revises: 8f4b2c6d1e93
+Create Date: 2026-10-18 19:21:44.173026
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a7e9d4c5b18'
+down_revision = '8f4b2c6d1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = op.create_table('cache_generation',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cache_generation, [{'name': 'reference', 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('cache_generation')
@@ -0,0 +1,41 @@
+"""Add template_upgrade_job table
+
+Revision ID: 5e8a1c7d2f40
+Revises: d3f58a2b6e10
+Create Date: 2026-10-18 13:05:21.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a1c7d2f40'
+down_revision = 'd3f58a2b6e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('template_upgrade_job',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('old_template_id', sa.Integer(), nullable=False),
+    sa.Column('new_template_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='jobstatus'), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('lock_key', sa.String(length=50), nullable=True),
+    sa.Column('created_date', sa.DateTime(), nullable=True),
+    sa.Column('updated_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['new_template_id'], ['template_syllabus.id'], ),
+    sa.ForeignKeyConstraint(['old_template_id'], ['template_syllabus.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lock_key')
+    )
+
+
+def downgrade():
+    op.drop_table('template_upgrade_job')
@@ -0,0 +1,26 @@
+"""Add version column to Syllabus
+
+Revision ID: 7c2d9e4f1a3b
+Revises: 0ee311a41b97
+Create Date: 2026-10-18 09:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d9e4f1a3b'
+down_revision = '0ee311a41b97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('syllabus', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('syllabus', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,54 @@
+"""Add plo_coverage table
+
+Revision ID: 8f4b2c6d1e93
+Revises: 5e8a1c7d2f40
+Create Date: 2026-10-18 17:42:08.519304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4b2c6d1e93'
+down_revision = '5e8a1c7d2f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('plo_coverage',
+    sa.Column('training_program_id', sa.Integer(), nullable=False),
+    sa.Column('plo_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.String(length=10), nullable=False),
+    sa.Column('max_rating', sa.Integer(), nullable=False),
+    sa.Column('avg_rating', sa.Float(), nullable=False),
+    sa.Column('rated_clos', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['plo_id'], ['programme_learning_outcome.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['subject_id'], ['subject.id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['training_program_id'], ['training_program.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('training_program_id', 'plo_id', 'subject_id')
+    )
+    with op.batch_alter_table('plo_coverage', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_plo_coverage_subject_id'), ['subject_id'], unique=False)
+
+    # Điền dữ liệu ban đầu từ các ô CLO-PLO hiện có (tương đương `flask rebuild-plo-coverage`)
+    op.execute("""
+        INSERT INTO plo_coverage (training_program_id, plo_id, subject_id, max_rating, avg_rating, rated_clos)
+        SELECT m.training_program_id, a.plo_id, m.subject_id, MAX(a.rating), AVG(a.rating), COUNT(DISTINCT clo.id)
+        FROM (SELECT DISTINCT tps.training_program_id, s.subject_id
+              FROM training_program_syllabus tps JOIN syllabus s ON s.id = tps.syllabus_id) m
+        JOIN course_objective co ON co.subject_id = m.subject_id
+        JOIN course_learning_outcome clo ON clo.course_objective_id = co.id
+        JOIN course_objective_programme_learning_outcome l ON l.course_objective_id = co.id
+        JOIN clo_plo_association a ON a.clo_id = clo.id AND a.plo_id = l.programme_learning_outcome_id
+        WHERE a.rating > 0
+        GROUP BY m.training_program_id, a.plo_id, m.subject_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('plo_coverage', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_plo_coverage_subject_id'))
+
+    op.drop_table('plo_coverage')
@@ -0,0 +1,26 @@
+"""Add updated_date column to Syllabus
+
+Revision ID: b41e6a0d9c57
+Revises: 7c2d9e4f1a3b
+Create Date: 2026-10-18 10:03:17.204981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e6a0d9c57'
+down_revision = '7c2d9e4f1a3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('syllabus', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_date', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('syllabus', schema=None) as batch_op:
+        batch_op.drop_column('updated_date')
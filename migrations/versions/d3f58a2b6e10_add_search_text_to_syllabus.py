@@ -0,0 +1,53 @@
+"""Add search_text column and full-text index to Syllabus
+
+Revision ID: d3f58a2b6e10
+Revises: b41e6a0d9c57
+Create Date: 2026-10-18 11:26:52.871340
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f58a2b6e10'
+down_revision = 'b41e6a0d9c57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('syllabus', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+        batch_op.create_index('ix_syllabus_search_text', ['search_text'], unique=False, mysql_prefix='FULLTEXT')
+
+    # Điền search_text cho các đề cương sẵn có (tương đương `flask reindex-search`), nếu không chúng sẽ
+    # không xuất hiện trong kết quả tìm kiếm. Bỏ dấu không làm được bằng SQL chung nên tính trong Python.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("""
+        SELECT s.id, s.name, sub.id, sub.name, l.name
+        FROM syllabus s
+        LEFT JOIN subject sub ON sub.id = s.subject_id
+        LEFT JOIN lecturer l ON l.id = s.lecturer_id
+    """)).all()
+    syllabus = sa.table('syllabus', sa.column('id', sa.Integer), sa.column('search_text', sa.Text))
+    values = [{'syllabus_id': row[0], 'search_text': _normalize_search_text(*row[1:])} for row in rows]
+    for start in range(0, len(values), 1000):
+        bind.execute(syllabus.update().where(syllabus.c.id == sa.bindparam('syllabus_id'))
+                     .values(search_text=sa.bindparam('search_text')), values[start:start + 1000])
+
+
+def _normalize_search_text(*parts):
+    # Bản sao cố định của utils.normalize_search_text tại thời điểm tạo revision
+    text = ' '.join(str(p) for p in parts if p).lower()
+    text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+    return re.sub(r'\s+', ' ', text.replace('đ', 'd')).strip()
+
+
+def downgrade():
+    with op.batch_alter_table('syllabus', schema=None) as batch_op:
+        batch_op.drop_index('ix_syllabus_search_text')
+        batch_op.drop_column('search_text')
@@ -0,0 +1,107 @@
+from contextlib import contextmanager
+
+import pytest
+
+# Dữ liệu giả lập: seed 1 ít bản ghi mỗi đề cương, seed 2 nhiều (xem generate_synthetic_data)
+SMALL = dict(objectives_per_subject=1, clos_per_objective=1, assessments_per_syllabus=1, methods_per_assessment=1,
+             sessions_per_syllabus=2, materials=10)
+LARGE = dict(objectives_per_subject=6, clos_per_objective=5, assessments_per_syllabus=6, methods_per_assessment=3,
+             sessions_per_syllabus=30, materials=100)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Ứng dụng chạy trên một tệp SQLite tạm, có dữ liệu danh mục (seed_data) và hai bộ dữ liệu giả lập.
+
+    Ứng dụng đọc DATABASE_URL lúc import nên chỉ import manage_syllabus_app trong fixture này; biến môi
+    trường được trả lại ngay sau đó, thư mục tạm do pytest dọn.
+    """
+    database = tmp_path_factory.mktemp('db') / 'test.db'
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('DATABASE_URL', f'sqlite:///{database}')
+        mp.delenv('DATABASE_REPLICA_URL', raising=False)
+        import manage_syllabus_app.index  # noqa: F401 (đăng ký route và user_loader)
+        from manage_syllabus_app import app, db
+        from manage_syllabus_app.seed_database import seed_data, generate_synthetic_data
+
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        seed_data()
+        for seed, volumes in ((1, SMALL), (2, LARGE)):
+            generate_synthetic_data(seed=seed, subjects=20, syllabuses_per_template=3, log=lambda *args: None,
+                                    **volumes)
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def admin_id(app):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import User, UserRole
+
+    with app.app_context():
+        admin = User(name="Test admin", username="test-admin", password="x", user_role=UserRole.ADMIN)
+        db.session.add(admin)
+        db.session.commit()
+        return admin.id
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(app):
+    """Mỗi test bắt đầu với cache trong tiến trình rỗng, không phụ thuộc thứ tự chạy."""
+    from manage_syllabus_app.cache import reference_cache, fragment_cache, count_cache
+
+    for cache in (reference_cache, fragment_cache, count_cache):
+        cache.invalidate()
+
+
+@pytest.fixture
+def client(app, admin_id):
+    """Test client đã đăng nhập bằng tài khoản quản trị."""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin_id)
+    return client
+
+
+@pytest.fixture
+def syllabus_ids(app):
+    """Trả về hàm lấy id các đề cương giả lập của một seed, theo thứ tự id."""
+    from sqlalchemy import select
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus, Subject
+
+    def get(seed):
+        with app.app_context():
+            return db.session.scalars(select(Syllabus.id).join(Subject).where(Subject.id.like(f"Y{seed:03d}%"))
+                                      .order_by(Syllabus.id)).all()
+
+    return get
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager đếm số câu SQL gửi xuống CSDL trong khối `with`: `with count_queries() as statements`."""
+    from sqlalchemy import event
+    from manage_syllabus_app import db
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+
+    return counting
@@ -0,0 +1,99 @@
+import pytest
+
+
+@pytest.fixture
+def matrix(app, syllabus_ids):
+    """(subject_id, các ô đã có rating của môn, một ô của môn khác); rating của môn được trả lại sau test."""
+    from manage_syllabus_app import db, dao, services
+    from manage_syllabus_app.models import Syllabus
+
+    def rated_cells(syllabus_id):
+        subject_id = db.session.get(Syllabus, syllabus_id).subject_id
+        return subject_id, [{'clo_id': clo_id, 'plo_id': plo_id, 'rating': rating}
+                            for _, clo_id, plo_id, rating in dao.get_clo_plo_matrix(subject_id)
+                            if plo_id is not None and rating is not None]
+
+    with app.app_context():
+        own, other = syllabus_ids(2)[1:3]
+        subject_id, cells = rated_cells(own)
+        foreign = rated_cells(other)[1][0]
+    assert len(cells) >= 3
+    yield subject_id, cells, foreign
+
+    with app.app_context():
+        services.apply_clo_plo_matrix(subject_id, cells)
+
+
+def _delete_cells(cells):
+    from sqlalchemy import delete
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import CloPloAssociation
+
+    for cell in cells:
+        db.session.execute(delete(CloPloAssociation).where(CloPloAssociation.clo_id == cell['clo_id'],
+                                                           CloPloAssociation.plo_id == cell['plo_id']))
+    db.session.commit()
+
+
+def _rating(cell):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import CloPloAssociation
+
+    row = db.session.get(CloPloAssociation, (cell['clo_id'], cell['plo_id']))
+    return None if row is None else row.rating
+
+
+def test_matrix_upsert_inserts_updates_and_rejects(app, matrix, count_queries):
+    from manage_syllabus_app import db, services
+
+    subject_id, cells, foreign = matrix
+    missing, changed, same = cells[:3]
+    new_rating = changed['rating'] % 5 + 1
+    with app.app_context():
+        _delete_cells([missing])
+
+        with count_queries() as statements:
+            results, affected = services.apply_clo_plo_matrix(subject_id, [
+                {**missing, 'rating': 3},
+                {**changed, 'rating': new_rating},
+                same,
+                foreign,
+                {**changed, 'rating': 9},
+                {**missing, 'rating': 4},
+            ])
+        db.session.expire_all()
+
+        assert [r['status'] for r in results] == [200, 200, 200, 404, 400, 200]
+        # Ô gửi trùng: ô sau thắng; ô không đổi không được ghi
+        assert affected == 2
+        assert _rating(missing) == 4
+        assert _rating(changed) == new_rating
+        assert _rating(same) == same['rating']
+        targets = ('INSERT INTO clo_plo_association', 'UPDATE clo_plo_association', 'DELETE FROM clo_plo_association')
+        assert len([s for s in statements if s.startswith(targets)]) == 1
+
+
+def test_ensure_associations_fills_missing_cells_once(app, matrix):
+    from manage_syllabus_app import db, dao
+    from manage_syllabus_app.models import CourseLearningOutcome
+
+    subject_id, cells, _ = matrix
+    removed = cells[:2]
+    with app.app_context():
+        _delete_cells(removed)
+        missing = sum(1 for *_, plo_id, rating in dao.get_clo_plo_matrix(subject_id)
+                      if plo_id is not None and rating is None)
+        assert missing >= len(removed)
+
+        assert dao.ensure_clo_plo_associations(subject_ids=[subject_id]) == missing
+        db.session.commit()
+        assert [_rating(cell) for cell in removed] == [0, 0]
+        assert not [rating for *_, plo_id, rating in dao.get_clo_plo_matrix(subject_id)
+                    if plo_id is not None and rating is None]
+
+        # Gọi lại, kể cả theo phạm vi khác chồng lên, không tạo thêm ô nào
+        co_ids = {db.session.get(CourseLearningOutcome, cell['clo_id']).course_objective_id for cell in cells}
+        assert dao.ensure_clo_plo_associations(subject_ids=[subject_id]) == 0
+        assert dao.ensure_clo_plo_associations(co_ids=co_ids) == 0
+        assert dao.ensure_clo_plo_associations(clo_ids=[cell['clo_id'] for cell in removed]) == 0
+        db.session.commit()
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def matrix_subject(app, syllabus_ids):
+    """Môn học của một đề cương giả lập (môn có đề cương nên ETag dựng từ version)."""
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus
+
+    with app.app_context():
+        return db.session.get(Syllabus, syllabus_ids(2)[0]).subject_id
+
+
+def test_matrix_not_modified_skips_the_view(client, count_queries, matrix_subject):
+    subject_id = matrix_subject
+    first = client.get(f'/subject/{subject_id}/clo-plo-matrix')
+    assert first.get_json()['status'] == 200
+
+    with count_queries() as statements:
+        again = client.get(f'/subject/{subject_id}/clo-plo-matrix', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert not any('clo_plo_association' in statement for statement in statements)
+
+
+def test_matrix_etag_changes_after_rating_update(client, matrix_subject):
+    subject_id = matrix_subject
+    first = client.get(f'/subject/{subject_id}/clo-plo-matrix')
+    etag = first.headers['ETag']
+    cell = first.get_json()['cells'][0]
+    rating = cell['rating'] or 0
+    put = lambda value: client.put(f'/subject/{subject_id}/clo-plo-matrix',
+                                   json={'cells': [{**cell, 'rating': value}]}).get_json()
+    try:
+        assert put(rating % 5 + 1)['affected'] == 1
+        again = client.get(f'/subject/{subject_id}/clo-plo-matrix', headers={'If-None-Match': etag})
+        assert again.status_code == 200
+        assert again.headers['ETag'] != etag
+        assert again.get_json()['cells'][0]['rating'] == rating % 5 + 1
+    finally:
+        put(rating)
+
+
+def test_attribute_group_not_modified(app, client):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import SelectionSubSection
+
+    with app.app_context():
+        sub = db.session.query(SelectionSubSection).first()
+        group_id, subsection_id = sub.attribute_group_id, sub.id
+
+    url = f'/attribute-group/{group_id}?subsection_id={subsection_id}'
+    first = client.get(url)
+    assert first.get_json()['status'] == 200
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
@@ -0,0 +1,60 @@
+PAGE_SIZE = 4
+
+
+def _ids(items):
+    return [syllabus.id for syllabus in items]
+
+
+def test_forward_pages_cover_every_syllabus_once(app):
+    from manage_syllabus_app import db, dao
+    from manage_syllabus_app.models import Syllabus
+
+    with app.app_context():
+        expected = [row.id for row in db.session.query(Syllabus.id).order_by(Syllabus.id)]
+        seen, after, pages = [], None, 0
+        while True:
+            items, next_cursor, prev_cursor = dao.get_syllabuses_keyset(PAGE_SIZE, after=after)
+            assert (prev_cursor is None) == (after is None)
+            seen += _ids(items)
+            pages += 1
+            if next_cursor is None:
+                break
+            assert next_cursor == items[-1].id
+            after = next_cursor
+
+    assert seen == expected
+    assert pages == -(-len(expected) // PAGE_SIZE)
+
+
+def test_backward_pages_mirror_forward_pages(app):
+    from manage_syllabus_app import dao
+
+    with app.app_context():
+        forward, after = [], None
+        while True:
+            items, after, _ = dao.get_syllabuses_keyset(PAGE_SIZE, after=after)
+            forward.append(_ids(items))
+            if after is None:
+                break
+
+        # Từ trang cuối đi ngược bằng `before` lần lượt gặp lại đúng các trang trước đó
+        backward, before = [forward[-1]], forward[-1][0]
+        while before is not None:
+            items, _, before = dao.get_syllabuses_keyset(PAGE_SIZE, before=before)
+            backward.append(_ids(items))
+
+    assert backward[::-1] == forward
+
+
+def test_cursors_apply_filters(app, syllabus_ids):
+    from manage_syllabus_app import db, dao
+    from manage_syllabus_app.models import Syllabus
+
+    with app.app_context():
+        lecturer_id = db.session.get(Syllabus, syllabus_ids(2)[0]).lecturer_id
+        expected = [row.id for row in db.session.query(Syllabus.id).filter_by(lecturer_id=lecturer_id)
+                    .order_by(Syllabus.id)]
+        items, next_cursor, prev_cursor = dao.get_syllabuses_keyset(len(expected), lecturer_id=lecturer_id)
+
+    assert _ids(items) == expected
+    assert next_cursor is None and prev_cursor is None
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.fixture
+def clo_cell(app, syllabus_ids):
+    """(clo_id, plo_id, rating) của một ô CLO - PLO có sẵn trong đề cương giả lập."""
+    from sqlalchemy import select
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import CloPloAssociation
+
+    with app.app_context():
+        return db.session.execute(select(CloPloAssociation.clo_id, CloPloAssociation.plo_id,
+                                         CloPloAssociation.rating).order_by(CloPloAssociation.clo_id)).first()
+
+
+def test_patch_missing_row_is_not_found(client):
+    assert client.patch('/text-subsection/999999', json={'content': "x"}).get_json()['status'] == 400
+    assert client.put('/clo/999999/plo/1', json={'rating': 1}).get_json()['status'] == 400
+
+
+def test_patch_same_value_is_no_change_with_single_update(app, client, count_queries):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import CourseLearningOutcome
+
+    with app.app_context():
+        clo = db.session.query(CourseLearningOutcome).first()
+        clo_id, content = clo.id, clo.content
+
+    with count_queries() as statements:
+        body = client.patch(f'/course-learning-outcome/{clo_id}', json={'content': content}).get_json()
+    assert body['status'] == 200 and body['affected'] == 0
+    assert [s.split()[0] for s in statements if s.split()[0] in ('UPDATE', 'INSERT', 'DELETE')] == ['UPDATE']
+
+    body = client.patch(f'/course-learning-outcome/{clo_id}', json={'content': content + " (sửa)"}).get_json()
+    assert body['status'] == 200 and body['affected'] == 1
+
+
+@pytest.mark.parametrize('rating', [99, -5, 'abc', [1], None])
+def test_update_rating_rejects_invalid_values(app, client, clo_cell, rating):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import CloPloAssociation
+
+    clo_id, plo_id, before = clo_cell
+    assert client.put(f'/clo/{clo_id}/plo/{plo_id}', json={'rating': rating}).get_json()['status'] == 400
+    with app.app_context():
+        assert db.session.get(CloPloAssociation, (clo_id, plo_id)).rating == before
+
+
+def test_update_rating_accepts_zero(app, client, clo_cell):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import CloPloAssociation
+
+    clo_id, plo_id, before = clo_cell
+    try:
+        assert client.put(f'/clo/{clo_id}/plo/{plo_id}', json={'rating': 0}).get_json()['status'] == 200
+        with app.app_context():
+            assert db.session.get(CloPloAssociation, (clo_id, plo_id)).rating == 0
+    finally:
+        client.put(f'/clo/{clo_id}/plo/{plo_id}', json={'rating': before})
@@ -0,0 +1,71 @@
+import pytest
+
+
+def _table():
+    from sqlalchemy import select
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import PloCoverage
+
+    rows = db.session.execute(select(PloCoverage.training_program_id, PloCoverage.plo_id, PloCoverage.subject_id,
+                                     PloCoverage.max_rating, PloCoverage.avg_rating, PloCoverage.rated_clos))
+    return sorted((*row[:4], round(row[4], 6), row[5]) for row in rows)
+
+
+def _rebuilt():
+    """Bảng độ phủ nếu dựng lại toàn bộ (trong một savepoint được hủy ngay, không đổi dữ liệu)."""
+    from manage_syllabus_app import db
+    from manage_syllabus_app.coverage import rebuild_plo_coverage
+
+    savepoint = db.session.begin_nested()
+    rebuild_plo_coverage(db.session)
+    rows = _table()
+    savepoint.rollback()
+    return rows
+
+
+@pytest.fixture
+def program(app, syllabus_ids):
+    """Chương trình đào tạo gồm hai đề cương giả lập có rating; bị xóa sau test."""
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus, TrainingProgram
+
+    with app.app_context():
+        program = TrainingProgram(name="CTĐT kiểm thử độ phủ", academic_year=2025,
+                                  syllabuses=[db.session.get(Syllabus, i) for i in syllabus_ids(2)[:2]])
+        db.session.add(program)
+        db.session.commit()
+        program_id = program.id
+    yield program_id
+
+    with app.app_context():
+        db.session.delete(db.session.get(TrainingProgram, program_id))
+        db.session.commit()
+
+
+def test_incremental_coverage_matches_full_rebuild(app, program, syllabus_ids):
+    from manage_syllabus_app import db, dao, services
+    from manage_syllabus_app.models import Syllabus, TrainingProgram
+
+    with app.app_context():
+        # Thêm chương trình
+        assert [row for row in _table() if row[0] == program]
+        assert _table() == _rebuilt()
+
+        # Sửa rating của một môn trong chương trình
+        subject_id = db.session.get(Syllabus, syllabus_ids(2)[0]).subject_id
+        cells = [{'clo_id': clo_id, 'plo_id': plo_id, 'rating': rating}
+                 for _, clo_id, plo_id, rating in dao.get_clo_plo_matrix(subject_id)
+                 if plo_id is not None and rating is not None]
+        try:
+            services.apply_clo_plo_matrix(subject_id, [{**cell, 'rating': cell['rating'] % 5 + 1}
+                                                       for cell in cells[:3]] + [{**cells[3], 'rating': 0}])
+            assert _table() == _rebuilt()
+        finally:
+            services.apply_clo_plo_matrix(subject_id, cells[:4])
+        assert _table() == _rebuilt()
+
+        # Bỏ một đề cương khỏi chương trình
+        training_program = db.session.get(TrainingProgram, program)
+        training_program.syllabuses.pop()
+        db.session.commit()
+        assert _table() == _rebuilt()
@@ -0,0 +1,65 @@
+def _faculty_queries(statements):
+    return [s for s in statements if 'FROM faculty' in s]
+
+
+def _faculty_names():
+    from manage_syllabus_app import dao
+
+    return {faculty.name for faculty in dao.get_all_faculties()}
+
+
+def test_commit_invalidates_reference_cache_and_bumps_generation(app, count_queries):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.cache import shared_generation
+    from manage_syllabus_app.models import Faculty
+
+    with app.app_context():
+        before = _faculty_names()
+        with count_queries() as statements:
+            assert _faculty_names() == before
+        assert not _faculty_queries(statements)
+
+        generation = shared_generation()
+        db.session.add(Faculty(name="Khoa kiểm thử cache"))
+        db.session.commit()
+
+        assert shared_generation() == generation + 1
+        assert _faculty_names() == before | {"Khoa kiểm thử cache"}
+
+
+def test_rollback_keeps_reference_cache(app, count_queries):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.cache import shared_generation
+    from manage_syllabus_app.models import Faculty
+
+    with app.app_context():
+        before = _faculty_names()
+        generation = shared_generation()
+        db.session.add(Faculty(name="Khoa bị hủy"))
+        db.session.flush()
+        db.session.rollback()
+
+        with count_queries() as statements:
+            assert _faculty_names() == before
+        assert not _faculty_queries(statements)
+        assert shared_generation() == generation
+
+
+def test_write_from_another_worker_is_seen_through_shared_generation(app, count_queries):
+    from sqlalchemy import insert, update
+    from manage_syllabus_app import db
+    from manage_syllabus_app.cache import REFERENCE_GENERATION
+    from manage_syllabus_app.models import Faculty, CacheGeneration
+
+    with app.app_context():
+        before = _faculty_names()
+        # Worker khác ghi thẳng vào CSDL rồi tăng thế hệ: không đi qua session hay cache của tiến trình này
+        with db.engine.begin() as connection:
+            connection.execute(insert(Faculty.__table__).values(name="Khoa của worker khác"))
+            connection.execute(update(CacheGeneration.__table__)
+                               .where(CacheGeneration.name == REFERENCE_GENERATION)
+                               .values(value=CacheGeneration.value + 1))
+
+        with count_queries() as statements:
+            assert _faculty_names() == before | {"Khoa của worker khác"}
+        assert _faculty_queries(statements)
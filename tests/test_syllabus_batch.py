@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.fixture
+def batch_target(app, syllabus_ids):
+    """Hai đề cương khác môn học, kèm tiểu mục văn bản và mục tiêu môn học của từng đề cương."""
+    from sqlalchemy import select
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus, TextSubSection, MainSection, CourseObjective
+
+    def parts(syllabus_id):
+        syllabus = db.session.get(Syllabus, syllabus_id)
+        texts = db.session.scalars(select(TextSubSection.id).join(MainSection)
+                                   .where(MainSection.syllabus_id == syllabus_id).order_by(TextSubSection.id)).all()
+        co_id = db.session.scalar(select(CourseObjective.id).where(CourseObjective.subject_id == syllabus.subject_id))
+        return {'id': syllabus_id, 'subject_id': syllabus.subject_id, 'texts': texts, 'co_id': co_id}
+
+    with app.app_context():
+        own, other = (parts(syllabus_id) for syllabus_id in syllabus_ids(2)[:2])
+    assert own['subject_id'] != other['subject_id']
+    return own, other
+
+
+def _version(app, syllabus_id):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus
+
+    with app.app_context():
+        return db.session.get(Syllabus, syllabus_id).version
+
+
+def test_batch_on_missing_syllabus_is_not_found(client):
+    body = client.post('/syllabus/999999/batch', json={'operations': [{'type': 'text_subsection', 'id': 1,
+                                                                       'content': "x"}]}).get_json()
+    assert body['status'] == 400
+
+
+def test_batch_last_write_wins_and_bumps_version_once(app, client, batch_target):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import TextSubSection, CourseObjective
+
+    own, _ = batch_target
+    first, second = own['texts'][:2]
+    before = _version(app, own['id'])
+
+    body = client.post(f"/syllabus/{own['id']}/batch", json={'operations': [
+        {'type': 'text_subsection', 'id': first, 'content': "Bản nháp 1"},
+        {'type': 'text_subsection', 'id': second, 'content': "Tiểu mục thứ hai"},
+        {'type': 'course_objective', 'id': own['co_id'], 'content': "Mục tiêu mới"},
+        {'type': 'text_subsection', 'id': first, 'content': "Bản cuối"},
+    ]}).get_json()
+
+    assert body['status'] == 200 and body['failed'] == 0
+    with app.app_context():
+        assert db.session.get(TextSubSection, first).content == "Bản cuối"
+        assert db.session.get(TextSubSection, second).content == "Tiểu mục thứ hai"
+        assert db.session.get(CourseObjective, own['co_id']).content == "Mục tiêu mới"
+    assert _version(app, own['id']) == before + 1
+
+
+def test_batch_rejects_records_of_another_syllabus(app, client, batch_target):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import TextSubSection, CourseObjective
+
+    own, other = batch_target
+    with app.app_context():
+        foreign_text = db.session.get(TextSubSection, other['texts'][0]).content
+        foreign_co = db.session.get(CourseObjective, other['co_id']).content
+    before = _version(app, other['id'])
+
+    body = client.post(f"/syllabus/{own['id']}/batch", json={'operations': [
+        {'type': 'text_subsection', 'id': other['texts'][0], 'content': "Ghi lén"},
+        {'type': 'course_objective', 'id': other['co_id'], 'content': "Ghi lén"},
+        {'type': 'text_subsection', 'id': own['texts'][0], 'content': "Hợp lệ"},
+    ]}).get_json()
+
+    assert body['failed'] == 2
+    assert [r['status'] for r in body['results']] == [404, 404, 200]
+    with app.app_context():
+        assert db.session.get(TextSubSection, other['texts'][0]).content == foreign_text
+        assert db.session.get(CourseObjective, other['co_id']).content == foreign_co
+    assert _version(app, other['id']) == before
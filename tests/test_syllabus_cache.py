@@ -0,0 +1,42 @@
+def _fragment_keys(syllabus_id):
+    from manage_syllabus_app.cache import fragment_cache
+
+    with fragment_cache._lock:
+        return {key for key in fragment_cache._data if key[0] == syllabus_id}
+
+
+def test_editing_one_syllabus_keeps_other_syllabus_etag_and_fragments(app, client, syllabus_ids):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import TypeLearningMaterial
+
+    edited, other = syllabus_ids(1)[:2]
+    with app.app_context():
+        type_id = db.session.query(TypeLearningMaterial.id).first()[0]
+
+    first = client.get(f'/syllabus/{other}/')
+    etag = first.headers['ETag']
+    fragments = _fragment_keys(other)
+    assert fragments
+
+    response = client.post(f'/syllabus/{edited}/learning-material',
+                           json={'name': "Học liệu kiểm thử cache", 'type_id': type_id})
+    assert response.get_json()['status'] == 200
+
+    again = client.get(f'/syllabus/{other}/', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert _fragment_keys(other) == fragments
+    # Đề cương vừa sửa thì có ETag mới
+    assert client.get(f'/syllabus/{edited}/').headers['ETag'] != etag
+
+
+def test_syllabus_count_is_refreshed_after_insert_in_same_worker(app):
+    from manage_syllabus_app import db, dao
+    from manage_syllabus_app.models import Syllabus
+
+    with app.app_context():
+        before = dao.count_syllabuses()
+        template = db.session.get(Syllabus, db.session.query(Syllabus.id).first()[0])
+        db.session.add(Syllabus(name="Đề cương đếm", subject_id=template.subject_id, faculty_id=template.faculty_id,
+                                lecturer_id=template.lecturer_id, template_id=template.template_id))
+        db.session.commit()
+        assert dao.count_syllabuses() == before + 1
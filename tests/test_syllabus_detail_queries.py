@@ -0,0 +1,22 @@
+# Số câu SQL tối đa của GET /syllabus/<id>/ khi đề cương chưa có fragment trong cache. data/bench_budgets.json
+# đo lặp lại trên cùng đề cương (fragment đã có sẵn) nên thấp hơn 2 câu: các mục lịch giảng dạy tự nạp buổi học.
+MAX_DETAIL_QUERIES = 22
+
+
+def _detail_queries(client, count_queries, syllabus_id):
+    with count_queries() as statements:
+        response = client.get(f'/syllabus/{syllabus_id}/')
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_detail_query_count_does_not_grow_with_syllabus_size(client, count_queries, syllabus_ids):
+    small_ids, large_ids = syllabus_ids(1), syllabus_ids(2)
+    # Làm nóng cache dữ liệu danh mục bằng một đề cương khác, để hai lần đo đều chưa có fragment riêng
+    _detail_queries(client, count_queries, small_ids[1])
+
+    small = _detail_queries(client, count_queries, small_ids[0])
+    large = _detail_queries(client, count_queries, large_ids[0])
+
+    assert small == large
+    assert large <= MAX_DETAIL_QUERIES
@@ -0,0 +1,94 @@
+import pytest
+
+
+def _quiet(*args):
+    pass
+
+
+@pytest.fixture
+def drifted(app, syllabus_ids):
+    """Một đề cương bị lệch cấu trúc (vị trí một phần khác tệp cấu trúc): (syllabus_id, main_id, vị trí đúng)."""
+    from sqlalchemy import select, update
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import MainSection
+
+    syllabus_id = syllabus_ids(1)[2]
+    with app.app_context():
+        main_id, position = db.session.execute(select(MainSection.id, MainSection.position)
+                                               .where(MainSection.syllabus_id == syllabus_id)
+                                               .order_by(MainSection.id)).first()
+        db.session.execute(update(MainSection).where(MainSection.id == main_id).values(position=99))
+        db.session.commit()
+    yield syllabus_id, main_id, position
+
+    with app.app_context():
+        db.session.execute(update(MainSection).where(MainSection.id == main_id).values(position=position))
+        db.session.commit()
+
+
+def _state(syllabus_id, main_id):
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus, MainSection
+
+    return db.session.get(Syllabus, syllabus_id).version, db.session.get(MainSection, main_id).position
+
+
+def test_dry_run_reports_drift_without_writing(app, drifted):
+    from manage_syllabus_app import services
+
+    syllabus_id, main_id, position = drifted
+    with app.app_context():
+        before = _state(syllabus_id, main_id)
+        records = []
+        stats = services.sync_syllabus_structures(dry_run=True, report=records.append, log=_quiet)
+
+        # Các test khác có thể để lại đề cương lệch cấu trúc: chỉ kiểm tra bản ghi của đề cương đã làm lệch
+        reported = {record['syllabus_id']: record['changes'] for record in records}
+        [change] = reported[syllabus_id]
+        assert change['op'] == 'update_part' and change['field'] == 'position'
+        assert (change['old'], change['new']) == (99, position)
+        assert stats['changes'] == sum(len(changes) for changes in reported.values())
+        assert _state(syllabus_id, main_id) == before
+
+        # Chạy thật thì áp dụng đúng các thay đổi đã báo cáo, sau đó dry-run không còn gì
+        assert services.sync_syllabus_structures(log=_quiet)['changes'] == stats['changes']
+        assert _state(syllabus_id, main_id) == (before[0] + 1, position)
+        records.clear()
+        services.sync_syllabus_structures(dry_run=True, report=records.append, log=_quiet)
+        assert records == []
+
+
+@pytest.mark.parametrize('total', [1, 2, 3, 7])
+def test_shards_partition_syllabuses(app, total):
+    from manage_syllabus_app import db, dao, services
+    from manage_syllabus_app.models import Syllabus
+
+    with app.app_context():
+        expected = [row.id for row in db.session.query(Syllabus.id).order_by(Syllabus.id)]
+        bounds = [services.shard_bounds((index, total)) for index in range(total)]
+        shards = [[row.id for row in dao.get_syllabus_structure_files(id_range)] for id_range in bounds]
+
+    assert bounds[0][0] == expected[0] and bounds[-1][1] > expected[-1]
+    assert all(hi == lo for (_, hi), (lo, _) in zip(bounds, bounds[1:]))
+    assert sorted(sum(shards, [])) == expected
+
+
+def test_each_shard_reports_only_its_own_drift(app, drifted):
+    from manage_syllabus_app import db, services
+    from manage_syllabus_app.models import Syllabus
+
+    syllabus_id, main_id, _ = drifted
+    with app.app_context():
+        count = db.session.query(Syllabus).count()
+        before = _state(syllabus_id, main_id)
+
+    results = [services.run_sync_shard((index, 3), dry_run=True) for index in range(3)]
+
+    assert sum(stats['syllabuses'] for stats in results) == count
+    owners = [index for index, stats in enumerate(results)
+              if syllabus_id in {record['syllabus_id'] for record in stats['report']}]
+    assert len(owners) == 1
+    with app.app_context():
+        lo, hi = services.shard_bounds((owners[0], 3))
+        assert _state(syllabus_id, main_id) == before
+    assert lo <= syllabus_id < hi
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+import pytest
+
+
+@pytest.fixture
+def templates(app, syllabus_ids):
+    """Trả về hàm tạo một cặp (mẫu cũ, mẫu mới): mẫu cũ là mẫu của đề cương giả lập seed 1, mẫu mới chép cấu trúc."""
+    from manage_syllabus_app import db
+    from manage_syllabus_app.models import Syllabus, TemplateSyllabus
+
+    def make(name):
+        with app.app_context():
+            old = db.session.get(Syllabus, syllabus_ids(1)[0]).template
+            new = TemplateSyllabus(name=name, structure=old.structure)
+            db.session.add(new)
+            db.session.commit()
+            return old.id, new.id
+
+    return make
+
+
+def _add_job(old_id, new_id, user_id, age):
+    """Chèn trực tiếp một job chưa kết thúc với heartbeat cách đây `age`, không đưa vào hàng đợi."""
+    from manage_syllabus_app import db, jobs
+    from manage_syllabus_app.models import TemplateUpgradeJob, JobStatus
+
+    job = TemplateUpgradeJob(old_template_id=old_id, new_template_id=new_id, user_id=user_id,
+                             status=JobStatus.RUNNING, lock_key=f"{old_id}-{new_id}",
+                             updated_date=jobs._now() - age)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _upgraded_count(template_id):
+    from manage_syllabus_app import dao
+
+    return len(dao.get_syllabus_ids_by_template(template_id))
+
+
+def test_start_refuses_duplicate_of_live_job(app, admin_id, templates):
+    from manage_syllabus_app import db, jobs
+
+    old_id, new_id = templates("Mẫu kiểm thử job trùng")
+    with app.app_context():
+        live = _add_job(old_id, new_id, admin_id, timedelta(0))
+        try:
+            job, started = jobs.start_template_upgrade(old_id, new_id, admin_id)
+            assert started is False and job.id == live.id
+        finally:
+            live.lock_key = None
+            db.session.commit()
+
+
+def test_claim_is_compare_and_set_and_lost_run_writes_nothing(app, admin_id, templates):
+    from types import SimpleNamespace
+    from manage_syllabus_app import db, dao, jobs
+    from manage_syllabus_app.models import JobStatus
+
+    old_id, new_id = templates("Mẫu kiểm thử giành job")
+    with app.app_context():
+        job = _add_job(old_id, new_id, admin_id, timedelta(hours=1))
+        seen = SimpleNamespace(id=job.id, updated_date=job.updated_date)
+
+        # Hai tiến trình cùng thấy job chết: chỉ một bên giành được
+        assert jobs._claim(seen) is not None
+        assert jobs._claim(seen) is None
+
+        # Lần chạy mang token cũ dừng ngay, không chèn đề cương nào
+        jobs.run_template_upgrade(job.id, seen.updated_date)
+        assert _upgraded_count(new_id) == 0
+        job = dao.get_upgrade_job(job.id)
+        assert job.status == JobStatus.PENDING
+
+        job.lock_key = None
+        db.session.commit()
+
+
+def test_resume_stale_job_runs_to_done_without_duplicates(app, admin_id, templates):
+    from manage_syllabus_app import dao, jobs
+    from manage_syllabus_app.models import JobStatus
+
+    old_id, new_id = templates("Mẫu kiểm thử chạy lại job")
+    with app.app_context():
+        expected = len(dao.get_syllabus_ids_by_template(old_id))
+        assert expected > 0
+        job = _add_job(old_id, new_id, admin_id, timedelta(hours=1))
+
+        [done] = jobs.resume_stale_jobs()
+        assert done.id == job.id and done.status == JobStatus.DONE
+        assert done.processed == done.total == expected
+        assert done.lock_key is None
+        assert _upgraded_count(new_id) == expected
+
+        # Job đã kết thúc không bị chạy lại; job mới cho cùng cặp mẫu bỏ qua đề cương đã tạo
+        assert jobs.resume_stale_jobs() == []
+        _add_job(old_id, new_id, admin_id, timedelta(hours=1))
+        [again] = jobs.resume_stale_jobs()
+        assert again.status == JobStatus.DONE
+        assert _upgraded_count(new_id) == expected